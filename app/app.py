@@ -11,15 +11,27 @@ import threading
 import time
 import signal
 import atexit
+import gzip
 from flask import Flask, render_template, request, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from werkzeug.serving import make_server
 
 # Import our services
 from config import config
 from services.benchmark_manager import BenchmarkManager
+from services.campaign_backend import LocalCampaignBackend
+from services.campaign_runner import CampaignRunner, CampaignError
+from services.capacity_finder import CapacityFinder
 from services.docker_manager import DockerManager
+from services.hdr_analysis import HistogramSet, DEFAULT_PERCENTILES
+from services.metrics_query import MetricsQuery, MetricsQueryError
+from services.metrics_relay import MetricsRelay
+from services.runner_telemetry import RunnerTelemetry
+from services.run_comparison import RunComparator
+from services.setup_job_manager import SetupJobManager
 from services.state_manager import StateManager
+from services.status_cache import StatusCache
+from services.status_delta import StatusDeltaEncoder, strip_volatile_fields
 
 # Configure logging
 logging.basicConfig(
@@ -37,13 +49,50 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
                    ping_timeout=60, ping_interval=25)
 
 # Initialize managers
-state_manager = StateManager()
-benchmark_manager = BenchmarkManager(config, state_manager)
+state_manager = StateManager(persistence_config=config.state_persistence)
 docker_manager = DockerManager()
+benchmark_manager = BenchmarkManager(config, state_manager, docker_client=docker_manager.client)
+setup_job_manager = SetupJobManager(config, benchmark_manager, state_manager)
+metrics_query = MetricsQuery(
+    config.metrics_query.url,
+    max_points=config.metrics_query.max_points,
+    min_step_seconds=config.metrics_query.min_step_seconds,
+    live_ttl=config.metrics_query.live_ttl,
+    finished_ttl=config.metrics_query.finished_ttl,
+    max_entries=config.metrics_query.max_entries,
+    timeout=config.metrics_query.timeout
+)
+metrics_relay = MetricsRelay(
+    config.metrics_relay.forward_url,
+    group_for_instance=benchmark_manager.get_workload_for_test_id,
+    forward_interval=config.metrics_relay.forward_interval,
+    instance_ttl=config.metrics_relay.instance_ttl,
+    forward_instances=config.metrics_relay.forward_instances
+) if config.metrics_relay.enabled else None
+# nb5 runners' own CPU, memory, threads and I/O, pushed next to their benchmark metrics
+runner_telemetry = RunnerTelemetry(
+    config.runner_telemetry.push_url,
+    benchmark_manager.get_telemetry_targets,
+    interval=config.runner_telemetry.interval,
+    timeout=config.runner_telemetry.timeout
+) if config.runner_telemetry.enabled else None
+capacity_finder = CapacityFinder(config, benchmark_manager, metrics_query)
+campaign_runner = CampaignRunner(
+    LocalCampaignBackend(benchmark_manager, setup_job_manager, state_manager),
+    save_checkpoint=benchmark_manager.run_catalog.save_campaign,
+    load_checkpoints=lambda: benchmark_manager.run_catalog.list_campaigns(statuses=["queued", "running"])
+)
+run_comparator = RunComparator(benchmark_manager.results_path, metrics_query, benchmark_manager.run_catalog)
 
 # Global variables for graceful shutdown
 shutdown_event = threading.Event()
 status_thread = None
+log_stream_thread = None
+
+# Log subscriptions: {test_id: {sid}} and the last line sent to each run's room
+log_subscribers = {}
+log_cursors = {}
+log_subscribers_lock = threading.Lock()
 
 def start_status_monitor():
     """Start the status monitoring thread"""
@@ -55,20 +104,18 @@ def start_status_monitor():
 
 def status_monitor_loop():
     """Background thread to monitor and emit status updates"""
-    last_status = None
     # Get status update interval from environment (default 5 seconds)
     update_interval = int(os.getenv('STATUS_UPDATE_INTERVAL', '5'))
 
     while not shutdown_event.is_set():
         try:
-            # Get current status
-            status = get_application_status()
+            # Benchmark exits are pushed by the process reaper and container state by
+            # the Docker event monitor; only refresh containers here while it is down
+            if not docker_manager.is_event_monitor_active():
+                status_cache.invalidate("infrastructure")
 
             # Only emit if status actually changed (reduce unnecessary updates)
-            if status != last_status:
-                socketio.emit('status_update', status)
-                last_status = status.copy() if isinstance(status, dict) else status
-                logger.debug("Status update emitted")
+            publish_status_delta()
 
             # Wait for next update - configurable interval for stability
             shutdown_event.wait(update_interval)
@@ -77,61 +124,177 @@ def status_monitor_loop():
             logger.error(f"Error in status monitor: {e}")
             shutdown_event.wait(update_interval * 2)  # Wait longer on error
 
-def get_application_status():
-    """Get comprehensive application status"""
-    try:
-        # Get infrastructure status
-        vm_status = docker_manager.get_container_status("demo-victoriametrics")
-        grafana_status = docker_manager.get_container_status("demo-grafana")
+def start_log_streamer():
+    """Start the benchmark log streaming thread"""
+    global log_stream_thread
+    if log_stream_thread is None or not log_stream_thread.is_alive():
+        log_stream_thread = threading.Thread(target=log_stream_loop, daemon=True)
+        log_stream_thread.start()
+        logger.info("Log streamer thread started")
 
-        # Get database configuration
-        db_config = state_manager.get_database_config()
+def log_stream_loop():
+    """Background thread to push new benchmark log lines to subscribed clients
 
-        # Get available workloads
-        available_workloads = benchmark_manager.get_available_workloads(db_config)
+    Lines are batched per interval; when a run outpaces a batch only the newest
+    `log_stream_max_lines` are sent and the rest are reported as dropped.
+    """
+    interval = config.benchmark.log_stream_interval
+
+    while not shutdown_event.is_set():
+        try:
+            with log_subscribers_lock:
+                cursors = {test_id: log_cursors.get(test_id, 0) for test_id in log_subscribers}
 
-        # Get setup status
-        setup_status = benchmark_manager.get_setup_status()
+            for test_id, since_seq in cursors.items():
+                logs = benchmark_manager.get_benchmark_logs(
+                    test_id, since_seq=since_seq, limit=config.benchmark.log_stream_max_lines
+                )
+                if not logs.get("success") or (not logs["lines"] and not logs["finished"]):
+                    continue
 
-        # Get workloads ready for benchmarking
-        ready_for_benchmark = benchmark_manager.get_workloads_ready_for_benchmark(db_config)
+                with log_subscribers_lock:
+                    if test_id not in log_subscribers:
+                        continue
+                    log_cursors[test_id] = logs["last_seq"]
+                    if logs["finished"]:
+                        # Final batch: the run's output is complete
+                        del log_subscribers[test_id]
+                        log_cursors.pop(test_id, None)
 
-        # Get running benchmarks
-        running_benchmarks = benchmark_manager.get_running_benchmarks()
+                del logs["success"]
+                socketio.emit('benchmark_logs', logs, to=f"logs:{test_id}")
+
+            shutdown_event.wait(interval)
 
-        return {
-            "infrastructure": {
-                "victoriametrics": vm_status,
-                "grafana": grafana_status,
-                "ready": vm_status.get("status") == "running" and grafana_status.get("status") == "running"
-            },
-            "databases": {
-                "configured": state_manager.is_databases_configured(),
-                "config": db_config
-            },
-            "workloads": {
-                "available": available_workloads,
-                "setup_status": setup_status,
-                "ready_for_benchmark": ready_for_benchmark
-            },
-            "benchmarks": {
-                "running": running_benchmarks
-            }
-        }
+        except Exception as e:
+            logger.error(f"Error in log streamer: {e}")
+            shutdown_event.wait(interval * 4)
+
+def build_infrastructure_status():
+    """Build the infrastructure section of the application status"""
+    vm_status = docker_manager.get_container_status("demo-victoriametrics")
+    grafana_status = docker_manager.get_container_status("demo-grafana")
+
+    return {
+        "victoriametrics": vm_status,
+        "grafana": grafana_status,
+        "ready": vm_status.get("status") == "running" and grafana_status.get("status") == "running"
+    }
+
+def build_databases_status():
+    """Build the databases section of the application status"""
+    return {
+        "configured": state_manager.is_databases_configured(),
+        "config": state_manager.get_database_config()
+    }
+
+def build_workloads_status():
+    """Build the workloads section of the application status"""
+    db_config = state_manager.get_database_config()
+
+    return {
+        "available": benchmark_manager.get_available_workloads(db_config),
+        "setup_status": benchmark_manager.get_setup_status(),
+        "ready_for_benchmark": benchmark_manager.get_workloads_ready_for_benchmark(db_config)
+    }
+
+def build_benchmarks_status():
+    """Build the benchmarks section of the application status"""
+    # Runtime would go stale in the cached snapshot; clients derive it from start_time
+    return {
+        "running": strip_volatile_fields(benchmark_manager.get_running_benchmarks())
+    }
+
+# Status snapshot shared by all readers; manager mutations mark sections dirty
+status_cache = StatusCache({
+    "infrastructure": build_infrastructure_status,
+    "databases": build_databases_status,
+    "workloads": build_workloads_status,
+    "benchmarks": build_benchmarks_status
+})
+state_manager.add_change_listener(status_cache.invalidate)
+benchmark_manager.add_change_listener(status_cache.invalidate)
+docker_manager.add_change_listener(status_cache.invalidate)
+
+def get_application_status():
+    """Get comprehensive application status from the cached snapshot"""
+    try:
+        return status_cache.get_snapshot()
     except Exception as e:
         logger.error(f"Error getting application status: {e}")
         return {"error": str(e)}
 
+# Sequenced delta stream for status_update subscribers
+status_encoder = StatusDeltaEncoder()
+status_publish_lock = threading.RLock()
+
+def publish_status_delta():
+    """Broadcast the changes since the last published status, if any"""
+    # Serialize encode+emit so deltas reach clients in sequence order
+    with status_publish_lock:
+        delta = status_encoder.encode(get_application_status())
+        if delta:
+            socketio.emit('status_delta', delta)
+            logger.debug(f"Status delta {delta['seq']} emitted ({', '.join(delta['sections'])})")
+
+def handle_container_event(container_event):
+    """Push container die/oom/health events to the dashboard immediately"""
+    logger.info(f"Container {container_event['container']}: {container_event['action']}"
+                f"{' ' + container_event['detail'] if container_event['detail'] else ''}")
+    socketio.emit('container_event', container_event)
+    publish_status_delta()
+
+docker_manager.add_container_event_listener(handle_container_event)
+
+def handle_benchmark_terminated(termination):
+    """Push benchmark process exits to the dashboard immediately"""
+    socketio.emit('benchmark_terminated', termination)
+    publish_status_delta()
+
+benchmark_manager.add_termination_listener(handle_benchmark_terminated)
+
+def handle_setup_progress(job):
+    """Push setup job state transitions to the dashboard"""
+    socketio.emit('setup_progress', job)
+
+setup_job_manager.add_progress_listener(handle_setup_progress)
+
+def handle_capacity_progress(search):
+    """Push capacity search steps to the dashboard"""
+    socketio.emit('capacity_progress', search)
+
+capacity_finder.add_progress_listener(handle_capacity_progress)
+
+def handle_campaign_progress(campaign):
+    """Push campaign step transitions to the dashboard"""
+    socketio.emit('campaign_progress', campaign)
+
+campaign_runner.add_progress_listener(handle_campaign_progress)
+
+def handle_live_metrics(live):
+    """Push the relay's live per-workload values to clients"""
+    socketio.emit('live_metrics', live)
+
 # Routes
 @app.route('/')
 def index():
     """Main dashboard page"""
     return render_template('index.html')
 
+def with_runtimes(status):
+    """Copy of a status snapshot with each running benchmark's runtime_seconds filled in as of now"""
+    running = (status.get("benchmarks") or {}).get("running")
+    if not running:
+        return status
+    now = time.time()
+    running = {workload: dict(benchmark, runtime_seconds=now - benchmark["start_time"])
+               for workload, benchmark in running.items()}
+    return dict(status, benchmarks=dict(status["benchmarks"], running=running))
+
 @app.route('/api/status')
 def api_status():
     """Get current application status"""
-    return jsonify(get_application_status())
+    return jsonify(with_runtimes(get_application_status()))
 
 @app.route('/api/infrastructure/start', methods=['POST'])
 def start_infrastructure():
@@ -218,7 +381,7 @@ def get_available_workloads():
 
 @app.route('/api/setup/run', methods=['POST'])
 def run_setup():
-    """Run setup phases for selected workloads"""
+    """Start a background setup job for selected workloads"""
     try:
         data = request.get_json()
         workloads = data.get('workloads', [])
@@ -228,23 +391,186 @@ def run_setup():
             return jsonify({"success": False, "error": "No workloads specified"}), 400
 
         db_config = state_manager.get_database_config()
-        results = []
+        job = setup_job_manager.submit(workloads, db_config, auto_start_benchmarks)
 
-        for workload in workloads:
-            logger.info(f"Running setup for workload: {workload}")
-            result = benchmark_manager.run_setup_phase(workload, db_config, auto_start_benchmarks)
-            results.append(result)
+        return jsonify({
+            "success": True,
+            "job_id": job["job_id"],
+            "job": job
+        }), 202
 
-            # Update setup status
-            state_manager.update_setup_status(workload, result.get("success", False))
+    except Exception as e:
+        logger.error(f"Failed to run setup: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/setup/jobs')
+def list_setup_jobs():
+    """List setup jobs"""
+    try:
         return jsonify({
             "success": True,
-            "results": results
+            "jobs": setup_job_manager.list_jobs()
         })
 
     except Exception as e:
-        logger.error(f"Failed to run setup: {e}")
+        logger.error(f"Failed to list setup jobs: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/setup/jobs/<job_id>')
+def get_setup_job(job_id):
+    """Get the state of a setup job"""
+    job = setup_job_manager.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": f"Setup job {job_id} not found"}), 404
+
+    return jsonify({"success": True, "job": job})
+
+@app.route('/api/setup/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_setup_job(job_id):
+    """Cancel a running setup job"""
+    try:
+        result = setup_job_manager.cancel_job(job_id)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to cancel setup job {job_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/campaigns', methods=['POST'])
+def run_campaign():
+    """Start a campaign from a YAML body, a JSON definition or a file in demo_workloads/campaigns/"""
+    try:
+        if request.is_json:
+            data = request.get_json()
+            if data.get('file'):
+                file_name = os.path.basename(data['file'])
+                campaign_path = os.path.join(config.workloads_path, 'campaigns', file_name)
+                if not os.path.isfile(campaign_path):
+                    return jsonify({"success": False, "error": f"Campaign file {file_name} not found"}), 404
+                with open(campaign_path, 'r') as f:
+                    source = f.read()
+            else:
+                source = data.get('campaign')
+        else:
+            source = request.get_data(as_text=True)
+
+        if not source:
+            return jsonify({"success": False, "error": "No campaign specified"}), 400
+
+        campaign = campaign_runner.submit(source)
+        return jsonify({"success": True, "campaign_id": campaign["campaign_id"], "campaign": campaign}), 202
+
+    except CampaignError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to start campaign: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/campaigns')
+def list_campaigns():
+    """List campaigns of this session, or persisted checkpoints with `history=true`"""
+    try:
+        if request.args.get('history', 'false').lower() == 'true':
+            campaigns = benchmark_manager.run_catalog.list_campaigns(
+                limit=min(request.args.get('limit', 100, type=int), 1000)
+            )
+        else:
+            campaigns = campaign_runner.list_campaigns()
+        return jsonify({"success": True, "campaigns": campaigns})
+
+    except Exception as e:
+        logger.error(f"Failed to list campaigns: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/campaigns/<campaign_id>')
+def get_campaign(campaign_id):
+    """Get a campaign with the state of every step"""
+    campaign = campaign_runner.get_campaign(campaign_id)
+    if not campaign:
+        return jsonify({"success": False, "error": f"Campaign {campaign_id} not found"}), 404
+
+    return jsonify({"success": True, "campaign": campaign})
+
+@app.route('/api/campaigns/<campaign_id>/cancel', methods=['POST'])
+def cancel_campaign(campaign_id):
+    """Cancel a campaign (its teardown steps still run)"""
+    try:
+        result = campaign_runner.cancel_campaign(campaign_id)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to cancel campaign {campaign_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/capacity/run', methods=['POST'])
+def run_capacity_search():
+    """Start a closed-loop search for a workload's highest cycle rate within an SLO"""
+    try:
+        data = request.get_json()
+        workload = data.get('workload')
+        if not workload:
+            return jsonify({"success": False, "error": "No workload specified"}), 400
+
+        db_config = state_manager.get_database_config()
+        result = capacity_finder.submit(
+            workload, db_config,
+            p99_ms=data.get('p99_ms'),
+            max_error_ratio=data.get('max_error_ratio'),
+            start_rate=data.get('start_rate'),
+            max_rate=data.get('max_rate'),
+            settle_seconds=data.get('settle_seconds'),
+            measure_seconds=data.get('measure_seconds'),
+            growth_factor=data.get('growth_factor'),
+            resolution=data.get('resolution'),
+            max_steps=data.get('max_steps'),
+            min_achieved_ratio=data.get('min_achieved_ratio'),
+            final_action=data.get('final_action', 'restore')
+        )
+        if not result["success"]:
+            return jsonify(result), 400
+
+        return jsonify({"success": True, "search_id": result["search_id"], "search": result}), 202
+
+    except Exception as e:
+        logger.error(f"Failed to start capacity search: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/capacity/searches')
+def list_capacity_searches():
+    """List capacity searches of this session, or persisted ones with `history=true`"""
+    try:
+        if request.args.get('history', 'false').lower() == 'true':
+            searches = benchmark_manager.run_catalog.list_capacity_searches(
+                workload=request.args.get('workload'),
+                database=request.args.get('database'),
+                limit=min(request.args.get('limit', 50, type=int), 1000)
+            )
+        else:
+            searches = capacity_finder.list_searches()
+        return jsonify({"success": True, "searches": searches})
+
+    except Exception as e:
+        logger.error(f"Failed to list capacity searches: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/capacity/searches/<search_id>')
+def get_capacity_search(search_id):
+    """Get a capacity search with its rate-vs-latency curve"""
+    search = capacity_finder.get_search(search_id)
+    if not search:
+        return jsonify({"success": False, "error": f"Capacity search {search_id} not found"}), 404
+
+    return jsonify({"success": True, "search": search})
+
+@app.route('/api/capacity/searches/<search_id>/cancel', methods=['POST'])
+def cancel_capacity_search(search_id):
+    """Cancel a running capacity search"""
+    try:
+        result = capacity_finder.cancel_search(search_id)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to cancel capacity search {search_id}: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/benchmarks/start', methods=['POST'])
@@ -254,12 +580,14 @@ def start_benchmark():
         data = request.get_json()
         workload = data.get('workload')
         cycle_rate = data.get('cycle_rate', 10)
+        shards = data.get('shards')
         
         if not workload:
             return jsonify({"success": False, "error": "No workload specified"}), 400
         
         db_config = state_manager.get_database_config()
-        result = benchmark_manager.start_benchmark(workload, cycle_rate, db_config)
+        result = benchmark_manager.start_benchmark(workload, cycle_rate, db_config,
+                                                   shards=int(shards) if shards else None)
         
         return jsonify(result)
         
@@ -305,6 +633,248 @@ def update_cycle_rate():
         logger.error(f"Failed to update cycle rate: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/benchmarks/placement')
+def get_cpu_placement():
+    """Get the host CPU inventory and the cores held by running benchmarks"""
+    if benchmark_manager.cpu_allocator is None:
+        return jsonify({"success": True, "enabled": False})
+    return jsonify(dict(benchmark_manager.cpu_allocator.get_inventory(), success=True, enabled=True))
+
+@app.route('/api/benchmarks/<workload>/resources')
+def get_runner_resources(workload):
+    """Get the CPU, memory and network usage of a running benchmark's runner containers"""
+    try:
+        result = benchmark_manager.get_runner_resources(workload)
+        return jsonify(result), 200 if result["success"] else 404
+
+    except Exception as e:
+        logger.error(f"Failed to get runner resources for {workload}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/benchmarks/runner-pool')
+def get_runner_pool():
+    """Get the pre-started runner pool and the time to first operation of each kind of runner"""
+    try:
+        pool = benchmark_manager.runner_pool
+        return jsonify({
+            "success": True,
+            "enabled": pool is not None,
+            "pool": pool.get_status() if pool else None,
+            "startup": benchmark_manager.run_catalog.get_startup_stats(since=request.args.get('since', type=float))
+        })
+
+    except Exception as e:
+        logger.error(f"Failed to get runner pool: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/runs')
+def list_runs():
+    """List catalogued benchmark runs, newest first"""
+    try:
+        result = benchmark_manager.run_catalog.list_runs(
+            workload=request.args.get('workload'),
+            database=request.args.get('database'),
+            status=request.args.get('status'),
+            run_id=request.args.get('run_id'),
+            since=request.args.get('since', type=float),
+            until=request.args.get('until', type=float),
+            limit=min(request.args.get('limit', 100, type=int), 1000),
+            offset=request.args.get('offset', 0, type=int),
+            group_id=request.args.get('group_id')
+        )
+        return jsonify(dict(result, success=True))
+
+    except Exception as e:
+        logger.error(f"Failed to list runs: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/runs/compare')
+def compare_runs():
+    """Compare candidate runs against baseline runs for throughput and latency regressions"""
+    try:
+        baseline = [test_id for test_id in request.args.get('baseline', '').split(',') if test_id]
+        candidate = [test_id for test_id in request.args.get('candidate', '').split(',') if test_id]
+        if not baseline or not candidate:
+            return jsonify({"success": False, "error": "baseline and candidate test ids are required"}), 400
+        if any(os.path.basename(test_id) != test_id or test_id.startswith('.') for test_id in baseline + candidate):
+            return jsonify({"success": False, "error": "Invalid test id"}), 400
+
+        metrics = [metric for metric in request.args.get('metrics', '').split(',') if metric] or None
+        result = run_comparator.compare(
+            baseline, candidate,
+            warmup_seconds=request.args.get('warmup', 60.0, type=float),
+            threshold=request.args.get('threshold', 0.05, type=float),
+            alpha=request.args.get('alpha', 0.05, type=float),
+            metrics=metrics,
+            source=request.args.get('source', 'auto')
+        )
+        if request.args.get('format') == 'text':
+            return result["report"] + "\n", 200, {"Content-Type": "text/plain; charset=utf-8"}
+        return jsonify(dict(result, success=True))
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except MetricsQueryError as e:
+        logger.warning(f"Failed to load metrics for run comparison: {e}")
+        return jsonify({"success": False, "error": str(e)}), 502
+    except Exception as e:
+        logger.error(f"Failed to compare runs: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/runs/<test_id>')
+def get_run(test_id):
+    """Get a catalogued run with its cycle rate history and summary"""
+    try:
+        result = benchmark_manager.get_run(test_id)
+        if not result["success"]:
+            return jsonify(result), 404
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to get run {test_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/benchmarks/<test_id>/logs')
+def get_benchmark_logs(test_id):
+    """Get recent log lines of a benchmark run"""
+    try:
+        since_seq = request.args.get('since', 0, type=int)
+        limit = request.args.get('lines', type=int)
+        stream = request.args.get('stream')
+
+        if stream not in (None, 'stdout', 'stderr'):
+            return jsonify({"success": False, "error": f"Unknown stream: {stream}"}), 400
+
+        result = benchmark_manager.get_benchmark_logs(test_id, since_seq, limit, stream)
+        if not result["success"]:
+            return jsonify(result), 404
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to get logs for {test_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/benchmarks/<test_id>/metrics')
+def get_benchmark_metrics(test_id):
+    """Get throughput, latency and error series of a benchmark run"""
+    try:
+        window = request.args.get('window', config.metrics_query.default_window_seconds, type=int)
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+
+        run_window = benchmark_manager.get_run_window(test_id)
+        if run_window is None and (start is None or end is None):
+            return jsonify({"success": False, "error": f"Unknown run {test_id}; specify start and end"}), 404
+
+        live = bool(run_window and run_window["live"]) and end is None
+        if end is None:
+            end = run_window["end"]
+        if start is None:
+            start = end - window
+            if run_window and run_window["start"]:
+                start = max(start, run_window["start"])
+        if end <= start:
+            return jsonify({"success": False, "error": "end must be after start"}), 400
+
+        result = metrics_query.get_run_metrics(test_id, start, end, live=live)
+        return jsonify(dict(result, success=True, live=live))
+
+    except MetricsQueryError as e:
+        logger.warning(f"Failed to get metrics for {test_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 502
+    except Exception as e:
+        logger.error(f"Failed to get metrics for {test_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/histograms/percentiles')
+def get_histogram_percentiles():
+    """Get exact latency percentiles from the merged HDR histogram logs of one or more runs"""
+    try:
+        test_ids = [test_id for test_id in request.args.get('test_ids', '').split(',') if test_id]
+        if not test_ids:
+            return jsonify({"success": False, "error": "test_ids is required"}), 400
+        if any(os.path.basename(test_id) != test_id or test_id.startswith('.') for test_id in test_ids):
+            return jsonify({"success": False, "error": "Invalid test id"}), 400
+
+        percentiles = DEFAULT_PERCENTILES
+        if request.args.get('p'):
+            percentiles = [float(p) for p in request.args['p'].split(',')]
+
+        # A shard group's id stands for all of its shards
+        histograms = HistogramSet.from_results(
+            benchmark_manager.results_path,
+            [shard_id for test_id in test_ids for shard_id in benchmark_manager.run_catalog.expand_test_ids(test_id)]
+        )
+        if not histograms.intervals:
+            return jsonify({"success": False, "error": "No histogram logs for these runs"}), 404
+
+        tags = histograms.tags()
+        tag = request.args.get('tag') or histograms.primary_tag()
+        result = histograms.percentiles(percentiles, tag=tag,
+                                        start=request.args.get('start', type=float),
+                                        end=request.args.get('end', type=float))
+        return jsonify(dict(result, success=True, test_ids=test_ids, tags=tags,
+                            time_range=histograms.time_range()))
+
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to compute histogram percentiles: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/v1/import/prometheus', methods=['POST'])
+@app.route('/api/v1/import/prometheus/metrics/job/<job>/instance/<instance>', methods=['POST'])
+def relay_prometheus_push(job=None, instance=None):
+    """Accept an nb5 Prometheus push for the metrics relay (same paths as VictoriaMetrics)"""
+    if metrics_relay is None:
+        return jsonify({"success": False, "error": "Metrics relay is disabled"}), 404
+
+    try:
+        path_labels = {key: value for key, value in (("job", job), ("instance", instance)) if value}
+        body = request.get_data()
+        if request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        samples = metrics_relay.ingest(body.decode('utf-8', errors='replace'), path_labels)
+        return jsonify({"success": True, "samples": samples})
+
+    except Exception as e:
+        logger.error(f"Failed to relay metrics push: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/metrics/live')
+def get_live_metrics():
+    """Get the latest pushed values per workload and test, without querying VictoriaMetrics"""
+    if metrics_relay is None:
+        return jsonify({"success": False, "error": "Metrics relay is disabled"}), 404
+
+    live = metrics_relay.get_live(request.args.get('group'))
+    return jsonify(dict(live, success=True, stats=metrics_relay.get_stats()))
+
+@app.route('/api/metrics/runners')
+def get_runner_telemetry():
+    """Get the latest resource usage sample of each running nb5 runner"""
+    if runner_telemetry is None:
+        return jsonify({"success": False, "error": "Runner telemetry is disabled"}), 404
+
+    return jsonify({"success": True, "runners": runner_telemetry.get_latest(),
+                    "stats": runner_telemetry.get_stats()})
+
+@app.route('/api/logs')
+def get_log_usage():
+    """Get disk usage of the logs/ tree per run"""
+    return jsonify(dict(benchmark_manager.log_lifecycle.get_usage(), success=True))
+
+@app.route('/api/logs/<test_id>')
+def get_log_segments(test_id):
+    """Get the log directories and segments of a run"""
+    result = benchmark_manager.get_log_segments(test_id)
+    if not result["success"]:
+        return jsonify(result), 404
+
+    return jsonify(result)
+
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup():
     """Stop all benchmarks and cleanup"""
@@ -332,12 +902,64 @@ def cleanup():
 def handle_connect():
     """Handle client connection"""
     logger.info("Client connected")
-    emit('status_update', get_application_status())
+    # Bring the stream up to date first so the full status matches the next delta's base
+    with status_publish_lock:
+        publish_status_delta()
+        emit('status_update', status_encoder.get_full_status())
+
+@socketio.on('status_resync')
+def handle_status_resync(data=None):
+    """Send the full status to a client that detected a gap in the delta sequence"""
+    last_seq = (data or {}).get('last_seq')
+    logger.info(f"Client requested status resync (last_seq={last_seq}, current_seq={status_encoder.seq})")
+    emit('status_update', status_encoder.get_full_status())
+
+@socketio.on('subscribe_logs')
+def handle_subscribe_logs(data=None):
+    """Start streaming a benchmark run's log lines to the client"""
+    test_id = (data or {}).get('test_id')
+    logs = benchmark_manager.get_benchmark_logs(test_id, limit=config.benchmark.log_stream_max_lines) \
+        if test_id else {"success": False, "error": "No test_id specified"}
+    if not logs["success"]:
+        emit('benchmark_logs', {"test_id": test_id, "error": logs["error"]})
+        return
+
+    join_room(f"logs:{test_id}")
+    with log_subscribers_lock:
+        if not logs["finished"]:
+            log_subscribers.setdefault(test_id, set()).add(request.sid)
+            # An existing room keeps its cursor; clients skip lines they already have by seq
+            log_cursors.setdefault(test_id, logs["last_seq"])
+
+    # Start the client from the current tail; later lines arrive through the room
+    del logs["success"]
+    emit('benchmark_logs', logs)
+
+@socketio.on('unsubscribe_logs')
+def handle_unsubscribe_logs(data=None):
+    """Stop streaming a benchmark run's log lines to the client"""
+    test_id = (data or {}).get('test_id')
+    if test_id:
+        leave_room(f"logs:{test_id}")
+        remove_log_subscriber(request.sid, test_id)
+
+def remove_log_subscriber(sid, test_id=None):
+    """Drop a client's log subscriptions (one run, or all of them)"""
+    with log_subscribers_lock:
+        for subscribed_id in [test_id] if test_id else list(log_subscribers):
+            subscribers = log_subscribers.get(subscribed_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(sid)
+            if not subscribers:
+                del log_subscribers[subscribed_id]
+                log_cursors.pop(subscribed_id, None)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     logger.info("Client disconnected")
+    remove_log_subscriber(request.sid)
 
 def graceful_shutdown():
     """Graceful shutdown handler"""
@@ -346,6 +968,10 @@ def graceful_shutdown():
     # Signal status monitor to stop
     shutdown_event.set()
 
+    # Keep campaign checkpoints as they are, so stopping benchmarks below is not recorded as failures
+    campaign_runner.stop()
+    docker_manager.stop_event_monitor()
+
     # Stop all running benchmarks
     try:
         running_benchmarks = benchmark_manager.get_running_benchmarks()
@@ -355,11 +981,38 @@ def graceful_shutdown():
     except Exception as e:
         logger.error(f"Error stopping benchmarks during shutdown: {e}")
 
+    # Remove idle and leftover pooled runners
+    if benchmark_manager.runner_pool:
+        try:
+            benchmark_manager.runner_pool.shutdown()
+        except Exception as e:
+            logger.error(f"Error removing runner pool during shutdown: {e}")
+
+    # Forward the last relayed metrics
+    if metrics_relay:
+        metrics_relay.stop()
+    if runner_telemetry:
+        runner_telemetry.stop()
+
+    # Save the log index
+    try:
+        benchmark_manager.log_lifecycle.stop()
+    except Exception as e:
+        logger.error(f"Error saving log index during shutdown: {e}")
+
+    # Close the run catalog (pending summaries are computed on next start)
+    try:
+        benchmark_manager.run_catalog.stop()
+    except Exception as e:
+        logger.error(f"Error closing run catalog during shutdown: {e}")
+
     # Clear state
     try:
         state_manager.clear_all_state()
     except Exception as e:
         logger.error(f"Error clearing state during shutdown: {e}")
+        # Keep whatever was pending rather than losing it
+        state_manager.close()
 
     logger.info("Graceful shutdown completed")
 
@@ -390,7 +1043,20 @@ signal.signal(signal.SIGINT, signal_handler)
 if __name__ == '__main__':
     try:
         # Start status monitoring
+        docker_manager.start_event_monitor()
         start_status_monitor()
+        start_log_streamer()
+        benchmark_manager.remove_orphaned_runners()
+        if benchmark_manager.runner_pool:
+            benchmark_manager.runner_pool.start()
+        if metrics_relay:
+            metrics_relay.add_forward_listener(handle_live_metrics)
+            metrics_relay.start()
+        if runner_telemetry:
+            runner_telemetry.start()
+
+        # Continue campaigns interrupted by the last shutdown
+        campaign_runner.resume()
 
         # Run the application
         logger.info("Starting NoSQLBench Demo Application")
@@ -35,6 +35,111 @@ class BenchmarkConfig:
     use_docker: bool = True
     docker_image: str = "nosqlbench/nosqlbench:5.21.8-preview"  # Update when image is available
     docker_network: str = "host"
+    # Setup phases for workloads on the same database run at most this many at a time
+    setup_concurrency_per_database: int = 1
+    # Apply cycle rate changes in place via demo_workloads/rate_control.js
+    # (restart is the fallback when no acknowledgement arrives within the timeout)
+    live_rate_control: bool = True
+    rate_control_timeout: float = 5.0
+    # Benchmark output: lines kept in memory per run, disk flush cadence and buffer size
+    log_tail_lines: int = 1000
+    log_flush_interval: float = 2.0
+    log_write_buffer_bytes: int = 1 << 20
+    # Socket.IO log channel: push cadence and most lines per push (older lines are dropped)
+    log_stream_interval: float = 0.25
+    log_stream_max_lines: int = 200
+    # HDR interval histograms per benchmark run (results/<test_id>/histograms.hdr)
+    capture_histograms: bool = True
+    histogram_interval: str = "10s"
+    # A benchmark can be split across several nb5 runners, each with a disjoint
+    # slice of `shard_cycles` and an equal share of the cycle rate
+    default_shards: int = 1
+    max_shards: int = 16
+    shard_cycles: int = 3_000_000_000  # The long-running workloads' 3B cycles
+    # Per-run CPU, memory and network of runner containers from the Docker stats stream
+    container_stats: bool = True
+
+@dataclass
+class PlacementConfig:
+    """Configuration for pinning benchmark runners to dedicated host CPUs"""
+    enabled: bool = False  # Give each nb5 runner its own cores (--cpuset-cpus) and memory limit
+    reserved_cpus: str = "0-1"  # cpuset list left to VictoriaMetrics, Grafana and co-located databases
+    cpus_per_runner: int = 2
+    memory_per_runner_mb: int = 2048
+    reserved_memory_mb: int = 4096
+    threads_per_cpu: int = 1  # nb5 threads per allocated core (in place of threads=auto)
+    queue_timeout: float = 0.0  # Wait this long for cores to free up before refusing a run
+
+@dataclass
+class RunnerPoolConfig:
+    """Configuration for pre-started nb5 runner containers (Docker mode)"""
+    enabled: bool = False  # Exec benchmarks into idle runners instead of `docker run` per process
+    size: int = 2  # Idle runners kept ready
+    warmup: bool = True  # Run nb5 once in each new runner before it is used
+    class_data_sharing: bool = True  # Start benchmark JVMs from the warm-up's class data archive
+    refill_interval: float = 5.0
+
+@dataclass
+class RunnerTelemetryConfig:
+    """Configuration for sampling nb5 runners' own resource usage into VictoriaMetrics"""
+    enabled: bool = False
+    interval: float = 5.0  # Seconds between samples (and pushes)
+    push_url: str = "http://localhost:8428"  # VictoriaMetrics as reachable from the app
+    timeout: float = 10.0
+
+@dataclass
+class StatePersistenceConfig:
+    """Configuration for write-behind state persistence"""
+    debounce_seconds: float = 0.2  # Quiet period that ends a burst of mutations
+    max_delay_seconds: float = 2.0  # Upper bound on how long a mutation stays unsaved
+    fsync_policy: str = "always"  # always | interval | never
+    fsync_interval_seconds: float = 5.0
+
+@dataclass
+class LogRetentionConfig:
+    """Configuration for the logs/ lifecycle (rotation, compression, pruning)"""
+    segment_bytes: int = 64 << 20  # Live log files are rotated at this size
+    max_run_bytes: int = 512 << 20  # Per run; oldest segments are dropped beyond this
+    max_total_bytes: int = 5 << 30  # Whole logs/ tree; oldest finished runs are dropped first
+    max_age_seconds: float = 7 * 86400  # Finished runs are removed after this long
+    compress: bool = True  # Gzip rotated segments and finished runs
+    compress_level: int = 6
+    sweep_interval: float = 60.0
+
+@dataclass
+class MetricsQueryConfig:
+    """Configuration for the cached VictoriaMetrics query layer"""
+    url: str = "http://localhost:8428"  # VictoriaMetrics as reachable from this app
+    max_points: int = 300  # Per series; longer windows are downsampled server-side
+    min_step_seconds: int = 10  # nb5 --report-interval
+    live_ttl: float = 10.0  # Cache lifetime of windows of running tests
+    finished_ttl: float = 3600.0  # ... and of finished ones
+    max_entries: int = 256
+    timeout: float = 10.0
+    default_window_seconds: int = 900
+
+@dataclass
+class MetricsRelayConfig:
+    """Configuration for the in-app Prometheus push relay"""
+    enabled: bool = False  # nb5 pushes to the app instead of VictoriaMetrics
+    push_url: str = "http://localhost:5000"  # The app as reachable from nb5
+    forward_url: str = "http://localhost:8428"  # VictoriaMetrics as reachable from the app
+    forward_interval: float = 10.0
+    instance_ttl: float = 30.0  # Instances that stop pushing drop out of aggregates after this
+    forward_instances: bool = False  # Also forward per-test series (needed for per-run metrics history)
+
+@dataclass
+class CapacitySearchConfig:
+    """Defaults for closed-loop capacity searches (overridable per search)"""
+    start_rate: int = 100
+    max_rate: int = 100000
+    growth_factor: float = 2.0  # Rate multiplier while every step meets the SLO
+    resolution: float = 0.05  # Bisection stops when passing/failing rates are this close (relative)
+    max_steps: int = 20
+    settle_seconds: float = 30.0  # Discarded after each rate change
+    measure_seconds: float = 60.0
+    max_error_ratio: float = 0.001
+    min_achieved_ratio: float = 0.95  # Achieved ops/s must reach this share of the target rate
 
 class AppConfig:
     """Main application configuration"""
@@ -43,6 +148,38 @@ class AppConfig:
         self.database = DatabaseConfig()
         self.infrastructure = InfrastructureConfig()
         self.benchmark = BenchmarkConfig()
+        self.placement = PlacementConfig(
+            enabled=os.getenv('CPU_PLACEMENT', 'false').lower() == 'true',
+            reserved_cpus=os.getenv('CPU_PLACEMENT_RESERVED_CPUS', '0-1'),
+            cpus_per_runner=int(os.getenv('CPU_PLACEMENT_CPUS_PER_RUNNER', '2')),
+            queue_timeout=float(os.getenv('CPU_PLACEMENT_QUEUE_SECONDS', '0'))
+        )
+        self.runner_pool = RunnerPoolConfig(
+            enabled=os.getenv('RUNNER_POOL', 'false').lower() == 'true',
+            size=int(os.getenv('RUNNER_POOL_SIZE', '2'))
+        )
+        self.runner_telemetry = RunnerTelemetryConfig(
+            enabled=os.getenv('RUNNER_TELEMETRY', 'false').lower() == 'true',
+            interval=float(os.getenv('RUNNER_TELEMETRY_INTERVAL', '5')),
+            push_url=os.getenv('VICTORIAMETRICS_QUERY_URL', 'http://localhost:8428')
+        )
+        self.state_persistence = StatePersistenceConfig(
+            fsync_policy=os.getenv('STATE_FSYNC_POLICY', 'always')
+        )
+        self.metrics_query = MetricsQueryConfig(
+            url=os.getenv('VICTORIAMETRICS_QUERY_URL', 'http://localhost:8428')
+        )
+        self.metrics_relay = MetricsRelayConfig(
+            enabled=os.getenv('METRICS_RELAY', 'false').lower() == 'true',
+            push_url=os.getenv('METRICS_RELAY_PUSH_URL', 'http://localhost:5000'),
+            forward_url=os.getenv('VICTORIAMETRICS_QUERY_URL', 'http://localhost:8428'),
+            forward_instances=os.getenv('METRICS_RELAY_FORWARD_INSTANCES', 'false').lower() == 'true'
+        )
+        self.capacity_search = CapacitySearchConfig()
+        self.log_retention = LogRetentionConfig(
+            max_total_bytes=int(os.getenv('LOG_MAX_TOTAL_MB', '5120')) << 20,
+            max_age_seconds=float(os.getenv('LOG_MAX_AGE_DAYS', '7')) * 86400
+        )
         
         # Flask configuration
         self.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -61,44 +198,51 @@ class AppConfig:
                 'setup_phases': ['setup.schema', 'setup.rampup'],
                 'run_phase': 'sai_reads_test.sai_reads',
                 'driver': 'cql',
-                'keyspace': 'sai_test'
+                'keyspace': 'sai_test',
+                'cycles_param': 'read_cycles'
             },
             'cassandra_lwt': {
                 'file': 'lwt_longrun.yaml',
                 'setup_phases': ['setup.schema', 'setup.truncating', 'setup.sharding', 'setup.lwt_load'],
                 'run_phase': 'lwt-updates.lwt_live_update',
                 'driver': 'cql',
-                'keyspace': 'lwt_ks'
+                'keyspace': 'lwt_ks',
+                'cycles_param': 'live_cycles'
             },
             'opensearch_basic': {
                 'file': 'opensearch_basic_longrun.yaml',
                 'setup_phases': ['default.pre_cleanup', 'default.schema', 'default.rampup'],
                 'run_phase': 'default.search',
-                'driver': 'opensearch'
+                'driver': 'opensearch',
+                'cycles_param': 'search_count'
             },
             'opensearch_vector': {
                 'file': 'opensearch_vector_search_longrun.yaml',
                 'setup_phases': ['default.pre_cleanup', 'default.schema', 'default.rampup'],
                 'run_phase': 'default.search',
-                'driver': 'opensearch'
+                'driver': 'opensearch',
+                'cycles_param': 'search_count'
             },
             'opensearch_bulk': {
                 'file': 'opensearch_bulk_longrun.yaml',
                 'setup_phases': ['default.pre_cleanup', 'default.schema', 'default.bulk_load'],
                 'run_phase': 'default.verify',
-                'driver': 'opensearch'
+                'driver': 'opensearch',
+                'cycles_param': 'verify_count'
             },
             'presto_analytics': {
                 'file': 'jdbc_analytics_longrun.yaml',
                 'setup_phases': ['default.drop', 'default.schema', 'default.rampup'],
                 'run_phase': 'default.analytics',
-                'driver': 'jdbc'
+                'driver': 'jdbc',
+                'cycles_param': 'analytics_cycles'
             },
             'presto_ecommerce': {
                 'file': 'jdbc_ecommerce_longrun.yaml',
                 'setup_phases': ['default.drop', 'default.schema', 'default.rampup'],
                 'run_phase': 'default.transactions',
-                'driver': 'jdbc'
+                'driver': 'jdbc',
+                'cycles_param': 'transaction_cycles'
             }
         }
 
@@ -5,46 +5,150 @@ import logging
 import psutil
 import signal
 import os
+import re
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from dataclasses import dataclass
 
+import docker
+
+from .container_runner import RUN_LABEL, ContainerProcess, ContainerRun, remove_labelled_containers
+from .cpu_placement import CpuAllocator, Placement
+from .hdr_analysis import HISTOGRAM_LOG_NAME, HistogramSet
+from .log_lifecycle import LogLifecycleManager
+from .log_tail import LogPump
+from .process_reaper import ProcessReaper
+from .run_catalog import RunCatalog
+from .runner_pool import RunnerPool
+from .rate_control import (
+    RATE_CONTROL_SCRIPT, CONTROL_FILE_NAME, ACK_PREFIX,
+    build_rate_control_command, write_rate_control
+)
+from .status_cache import ChangeNotifier
+
 logger = logging.getLogger(__name__)
 
+# nb5 console progress, e.g. "main (remaining,active,completed)=(9000,10,990) 010%"
+PROGRESS_INTERVAL = "1s"
+PROGRESS_PATTERN = re.compile(r"\((?:remaining|pending),(?:active|current),(?:completed|complete)\)=\((\d+),(\d+),(\d+)\)")
+
 @dataclass
 class BenchmarkProcess:
     """Represents a running benchmark process"""
     workload_name: str
     phase: str
-    process: subprocess.Popen
+    process: subprocess.Popen  # Or a ContainerProcess with the same interface, in Docker mode
     cycle_rate: int
     start_time: float
     pid: int
     test_id: str
-    stdout_file: Any = None
-    stderr_file: Any = None
     original_start_time: float = None  # Track original start time for runtime continuity
-
-class BenchmarkManager:
+    control_file: str = None  # Host path of the live cyclerate control file, if enabled
+    control_seq: int = 0
+    run_id: str = None  # Test id of the first process of a benchmark continued across restarts
+    group_id: str = None  # Shared by the shards of one benchmark start (the test id when not sharded)
+    shard: int = 0
+    placement: Placement = None  # Dedicated cores and memory, when CPU placement is enabled
+    runner: str = None  # How nb5 was launched: docker, pool or local
+    container: str = None  # Pooled runner container the process was exec'd into
+    startup_seconds: float = None  # Launch to the first progress report with completed cycles
+
+def split_cycle_rate(cycle_rate: int, shards: int) -> List[int]:
+    """Split a cycle rate into per-shard rates that add up to it"""
+    return [cycle_rate // shards + (1 if shard < cycle_rate % shards else 0) for shard in range(shards)]
+
+def split_cycles(total_cycles: int, shards: int) -> List[Tuple[int, int]]:
+    """Split cycles 0..total_cycles into disjoint, contiguous per-shard ranges"""
+    return [(total_cycles * shard // shards, total_cycles * (shard + 1) // shards) for shard in range(shards)]
+
+def has_completed_cycles(line: str) -> bool:
+    """Whether an nb5 progress line reports at least one completed cycle"""
+    match = PROGRESS_PATTERN.search(line)
+    return bool(match) and int(match.group(3)) > 0
+
+def shard_test_id(group_id: str, shard: int, shards: int) -> str:
+    """Test id of one shard of a benchmark (the group id itself when it is not sharded)"""
+    return group_id if shards == 1 else f"{group_id}-s{shard}"
+
+class BenchmarkManager(ChangeNotifier):
     """Manages NoSQLBench processes for different workloads"""
 
-    def __init__(self, config_obj, state_manager=None):
+    def __init__(self, config_obj, state_manager=None, docker_client=None):
         self.config = config_obj
-        self.running_processes: Dict[str, BenchmarkProcess] = {}
+        # Shards of the running benchmark of each workload, in shard order
+        self.running_processes: Dict[str, List[BenchmarkProcess]] = {}
         self.setup_status: Dict[str, Dict[str, bool]] = {}
+        self.setup_processes: Dict[str, subprocess.Popen] = {}
         self.lock = threading.Lock()
         self.state_manager = state_manager
 
+        # nb5 runner containers are driven through the Docker API (Docker mode)
+        if docker_client is None and config_obj.benchmark.use_docker:
+            docker_client = docker.from_env()
+        self.docker_client = docker_client
+
+        # Exit notifications for benchmark processes (local nb5 or runner containers)
+        self.reaper = ProcessReaper()
+        self.termination_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
         # Ensure logs directory exists (relative to project root)
         logs_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
         os.makedirs(logs_path, exist_ok=True)
         self.logs_path = logs_path
 
+        # Size caps, rotation, compression and age pruning for the logs/ tree
+        retention = config_obj.log_retention
+        self.log_lifecycle = LogLifecycleManager(
+            logs_path,
+            segment_bytes=retention.segment_bytes,
+            max_run_bytes=retention.max_run_bytes,
+            max_total_bytes=retention.max_total_bytes,
+            max_age_seconds=retention.max_age_seconds,
+            compress=retention.compress,
+            compress_level=retention.compress_level,
+            sweep_interval=retention.sweep_interval
+        )
+
+        # Benchmark output is read from pipes into per-run tails and buffered log files
+        self.log_pump = LogPump(
+            tail_lines=config_obj.benchmark.log_tail_lines,
+            flush_interval=config_obj.benchmark.log_flush_interval,
+            write_buffer_bytes=config_obj.benchmark.log_write_buffer_bytes,
+            segment_bytes=retention.segment_bytes,
+            on_segment=self.log_lifecycle.add_segment,
+            on_finished=self.log_lifecycle.finish_run
+        )
+
         # Ensure results directory exists (relative to project root)
         results_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'results')
         os.makedirs(results_path, exist_ok=True)
         self.results_path = results_path
 
+        # History of every benchmark process, kept after it stops
+        self.run_catalog = RunCatalog(os.path.join(results_path, "runs.db"), summarize=self._summarize_run)
+        self._group_summaries: Dict[str, Dict[str, Any]] = {}  # Of finished shard groups, by group id
+
+        # Disjoint host CPUs and memory limits for concurrent runners
+        placement = config_obj.placement
+        self.cpu_allocator = CpuAllocator(
+            reserved_cpus=placement.reserved_cpus,
+            cpus_per_runner=placement.cpus_per_runner,
+            memory_per_runner=placement.memory_per_runner_mb << 20,
+            reserved_memory=placement.reserved_memory_mb << 20,
+            threads_per_cpu=placement.threads_per_cpu
+        ) if placement.enabled else None
+
+        # Idle nb5 containers that benchmark processes are exec'd into (Docker mode)
+        pool = config_obj.runner_pool
+        self.runner_pool = RunnerPool(
+            self.docker_client, config_obj.benchmark.docker_image, config_obj.benchmark.docker_network,
+            {os.path.abspath(config_obj.workloads_path): "/workloads",
+             os.path.abspath(results_path): "/results",
+             os.path.abspath(logs_path): "/logs"},
+            size=pool.size, warmup=pool.warmup, class_data_sharing=pool.class_data_sharing,
+            refill_interval=pool.refill_interval
+        ) if pool.enabled and config_obj.benchmark.use_docker else None
+
     def is_database_configured(self, driver: str, database_config: Dict[str, Any]) -> bool:
         """Check if a database is properly configured"""
         if driver == "cql":
@@ -70,7 +174,9 @@ class BenchmarkManager:
         return available_workloads
     
     def get_workload_command_args(self, workload_name: str, phase: str, cycle_rate: int = None,
-                                 database_config: Dict[str, Any] = None, test_id: str = None) -> List[str]:
+                                 database_config: Dict[str, Any] = None, test_id: str = None,
+                                 group_id: str = None, cycle_range: Tuple[int, int] = None,
+                                 placement: Placement = None, container: str = None) -> List[str]:
         """Build NoSQLBench command arguments for a specific workload and phase"""
         workload_config = self.config.workload_configs.get(workload_name)
         if not workload_config:
@@ -82,46 +188,104 @@ class BenchmarkManager:
 
         # Use Docker if configured
         if self.config.benchmark.use_docker:
-            return self._build_docker_command(workload_name, phase, cycle_rate, database_config, test_id)
+            return self._build_docker_command(workload_name, phase, cycle_rate, database_config, test_id,
+                                              group_id, cycle_range, placement, container)
         else:
-            return self._build_local_command(workload_name, phase, cycle_rate, database_config, test_id)
+            return self._build_local_command(workload_name, phase, cycle_rate, database_config, test_id,
+                                             group_id, cycle_range, placement)
 
     def _build_local_command(self, workload_name: str, phase: str, cycle_rate: int = None,
-                            database_config: Dict[str, Any] = None, test_id: str = None) -> List[str]:
-        """Build local NoSQLBench command arguments"""
+                            database_config: Dict[str, Any] = None, test_id: str = None,
+                            group_id: str = None, cycle_range: Tuple[int, int] = None,
+                            placement: Placement = None) -> List[str]:
+        """Build local NoSQLBench command arguments (a placement's CPUs are applied at launch)"""
         workload_config = self.config.workload_configs.get(workload_name)
 
         cmd = [self.config.benchmark.nosqlbench_command]
         cmd.append(workload_config["file"])
         cmd.append(phase)
 
-        return self._add_common_args(cmd, workload_config, cycle_rate, database_config, test_id)
+        return self._add_common_args(cmd, workload_config, cycle_rate, database_config, test_id,
+                                     group_id=group_id, cycle_range=cycle_range, placement=placement)
 
     def _build_docker_command(self, workload_name: str, phase: str, cycle_rate: int = None,
-                             database_config: Dict[str, Any] = None, test_id: str = None) -> List[str]:
-        """Build Docker command for NoSQLBench"""
+                             database_config: Dict[str, Any] = None, test_id: str = None,
+                             group_id: str = None, cycle_range: Tuple[int, int] = None,
+                             placement: Placement = None, container: str = None) -> List[str]:
+        """Build NoSQLBench arguments for a runner container, whose entrypoint is nb5 (see _spawn)"""
         workload_config = self.config.workload_configs.get(workload_name)
 
         # Create log directory for this specific run
         log_dir = os.path.join(self.logs_path, f"{workload_name}_{phase}_{test_id}")
         os.makedirs(log_dir, exist_ok=True)
 
-        # Build Docker command
-        cmd = [
-            "docker", "run", "--rm",
-            "--name", f"nosqlbench-{workload_name}-{test_id}",
-            "--network", self.config.benchmark.docker_network,
-            "-v", f"{os.path.abspath(self.config.workloads_path)}:/workloads",
-            "-v", f"{os.path.abspath(self.results_path)}:/results",
-            "-v", f"{os.path.abspath(log_dir)}:/logs",
-            self.config.benchmark.docker_image,
-            "--include=/workloads", workload_config['file'], phase
-        ]
+        # Pooled runners have all of logs/ mounted, others only their own run's directory
+        cmd = ["--include=/workloads", workload_config['file'], phase]
+        return self._add_common_args(cmd, workload_config, cycle_rate, database_config, test_id, is_docker=True,
+                                     group_id=group_id, cycle_range=cycle_range, placement=placement,
+                                     docker_logs_dir=f"/logs/{os.path.basename(log_dir)}" if container else "/logs")
 
-        return self._add_common_args(cmd, workload_config, cycle_rate, database_config, test_id, is_docker=True)
+    def _spawn(self, cmd: List[str], workload_name: str, test_id: str, log_dir: str,
+               placement: Placement = None, container: str = None, stdout=subprocess.PIPE, stderr=subprocess.PIPE):
+        """Start nb5 with `cmd`: in a runner container (or pooled runner) through the Docker API in
+        Docker mode, else as a local process group pinned to the placement's CPUs and sized to its memory"""
+        if container:
+            return self.runner_pool.exec(container, cmd, stdout=stdout, stderr=stderr)
+
+        if self.config.benchmark.use_docker:
+            return ContainerRun(
+                self.docker_client, self.config.benchmark.docker_image, cmd,
+                name=f"nosqlbench-{workload_name}-{test_id}",
+                network=self.config.benchmark.docker_network,
+                volumes={os.path.abspath(self.config.workloads_path): "/workloads",
+                         os.path.abspath(self.results_path): "/results",
+                         os.path.abspath(log_dir): "/logs"},
+                labels={RUN_LABEL: test_id},
+                cpuset_cpus=placement.cpuset if placement else None,
+                memory_bytes=placement.memory_bytes if placement else None,
+                stdout=stdout, stderr=stderr
+            )
+
+        def preexec_fn():
+            os.setsid()
+            if placement:
+                os.sched_setaffinity(0, placement.cpus)
+
+        env = None
+        if placement:
+            # Size the JVM (heap included) as it would be under the container memory limit
+            env = dict(os.environ)
+            env["JAVA_TOOL_OPTIONS"] = " ".join(filter(None, [
+                env.get("JAVA_TOOL_OPTIONS"), f"-XX:MaxRAM={placement.memory_bytes}"
+            ]))
+        return subprocess.Popen(cmd, stdout=stdout, stderr=stderr, preexec_fn=preexec_fn, env=env)
+
+    def _signal(self, process, sig: int):
+        """Signal nb5 in its container, or a local process group"""
+        if isinstance(process, ContainerProcess):
+            process.send_signal(sig)
+            return
+        try:
+            os.killpg(os.getpgid(process.pid), sig)
+        except ProcessLookupError:
+            pass
+
+    def remove_orphaned_runners(self) -> List[str]:
+        """Remove runner containers an earlier app process left behind (Docker mode)"""
+        if self.docker_client is None:
+            return []
+        with self.lock:
+            running = {getattr(shard.process, "name", None)
+                       for shards in self.running_processes.values() for shard in shards}
+        removed = remove_labelled_containers(self.docker_client, RUN_LABEL, keep=running)
+        if removed:
+            logger.info(f"Removed {len(removed)} orphaned runner containers: {', '.join(removed)}")
+        return removed
 
     def _add_common_args(self, cmd: List[str], workload_config: dict, cycle_rate: int = None,
-                        database_config: Dict[str, Any] = None, test_id: str = None, is_docker: bool = False) -> List[str]:
+                        database_config: Dict[str, Any] = None, test_id: str = None, is_docker: bool = False,
+                        group_id: str = None, cycle_range: Tuple[int, int] = None,
+                        placement: Placement = None, docker_logs_dir: str = "/logs") -> List[str]:
         """Add common arguments to NoSQLBench command"""
         # Add driver-specific arguments
         driver = workload_config["driver"]
@@ -167,15 +331,23 @@ class BenchmarkManager:
         if cycle_rate:
             cmd.append(f"cyclerate={cycle_rate}")
 
-        # Add threads configuration
-        if self.config.benchmark.threads_auto:
+        # A shard runs its own slice of the cycles; run phases lock `cycles` to a template parameter
+        if cycle_range:
+            cmd.append(f"{workload_config.get('cycles_param', 'cycles')}={cycle_range[0]}..{cycle_range[1]}")
+
+        # Add threads configuration (sized to the runner's own cores when it has a placement)
+        if placement:
+            cmd.append(f"threads={placement.threads}")
+        elif self.config.benchmark.threads_auto:
             cmd.append("threads=auto")
 
         # Add errors mode
         cmd.append(f"errors={self.config.benchmark.errors_mode}")
 
-        # Add VictoriaMetrics reporting with new pattern
+        # Add VictoriaMetrics reporting with new pattern (through the app's relay when enabled)
         vm_endpoint = self.config.infrastructure.victoriametrics_endpoint
+        if self.config.metrics_relay.enabled:
+            vm_endpoint = self.config.metrics_relay.push_url
         metrics_endpoint = f"{vm_endpoint}/api/v1/import/prometheus/metrics/job/nosqlbench/instance/{test_id}"
         cmd.append(f"--report-prompush-to={metrics_endpoint}")
 
@@ -188,22 +360,40 @@ class BenchmarkManager:
         elif driver == "jdbc":
             db_type = "presto"
 
-        # Add labels and reporting interval
-        cmd.append(f"--add-labels=job:nosqlbench,instance:{test_id},db_type:{db_type}")
+        # Add labels and reporting interval (shards of one benchmark share the group label)
+        group_label = f",group:{group_id}" if group_id and group_id != test_id else ""
+        cmd.append(f"--add-labels=job:nosqlbench,instance:{test_id}{group_label},db_type:{db_type}")
         cmd.append("--report-interval=10")
+        # Console progress marks the first completed cycle, for time to first operation
+        cmd.append(f"--progress=console:{PROGRESS_INTERVAL}")
 
         # Add logs directory - different for Docker vs local
         if is_docker:
-            cmd.append("--logs-dir=/logs")
+            cmd.append(f"--logs-dir={docker_logs_dir}")
         else:
             log_dir = os.path.join(self.logs_path, f"{workload_config.get('name', 'unknown')}_{test_id}")
             os.makedirs(log_dir, exist_ok=True)
+            self.log_lifecycle.register_run(test_id, log_dir)
             cmd.append(f"--logs-dir={log_dir}")
 
+        # HDR interval histograms of every timer, for exact merged percentiles later
+        if cycle_rate and self.config.benchmark.capture_histograms:
+            os.makedirs(os.path.join(self.results_path, test_id), exist_ok=True)
+            results_dir = f"/results/{test_id}" if is_docker else os.path.join(self.results_path, test_id)
+            histogram_log = f"{results_dir}/{HISTOGRAM_LOG_NAME}"
+            cmd.append(f"--log-histograms={histogram_log}:.*:{self.config.benchmark.histogram_interval}")
+
         return cmd
     
-    def run_setup_phase(self, workload_name: str, database_config: Dict[str, Any], auto_start_benchmark: bool = True) -> Dict[str, Any]:
-        """Run setup phases for a workload"""
+    def run_setup_phase(self, workload_name: str, database_config: Dict[str, Any], auto_start_benchmark: bool = True,
+                        progress_callback: Callable[[str, str, str], None] = None,
+                        cancel_event: threading.Event = None) -> Dict[str, Any]:
+        """Run setup phases for a workload
+
+        progress_callback(workload, phase, phase_status) is invoked as each phase
+        starts and finishes; setting cancel_event stops before the next phase
+        (use cancel_setup_phase to also kill the running one).
+        """
         workload_config = self.config.workload_configs.get(workload_name)
         if not workload_config:
             return {"success": False, "error": f"Unknown workload: {workload_name}"}
@@ -222,7 +412,14 @@ class BenchmarkManager:
             self.setup_status[workload_name] = {}
 
         for phase in setup_phases:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"Setup for {workload_name} cancelled before phase {phase}")
+                results.append({"phase": phase, "success": False, "error": "Cancelled"})
+                break
+
             logger.info(f"Running setup phase {phase} for {workload_name}")
+            if progress_callback:
+                progress_callback(workload_name, phase, "running")
 
             try:
                 # Generate unique test ID for this setup phase
@@ -235,30 +432,47 @@ class BenchmarkManager:
                 log_dir = os.path.join(self.logs_path, f"{workload_name}_{phase}_{test_id}")
                 os.makedirs(log_dir, exist_ok=True)
 
-                # Capture output to files
+                # Capture output to files (append mode, so the files can be rotated copy-then-truncate)
                 stdout_file = os.path.join(log_dir, "stdout.log")
                 stderr_file = os.path.join(log_dir, "stderr.log")
 
-                with open(stdout_file, 'w') as stdout_f, open(stderr_file, 'w') as stderr_f:
-                    # Run setup phase synchronously
-                    result = subprocess.run(
-                        cmd,
-                        stdout=stdout_f,
-                        stderr=stderr_f,
-                        text=True,
-                        timeout=600  # 10 minute timeout for setup phases
-                    )
-
-                success = result.returncode == 0
+                with open(stdout_file, 'a') as stdout_f, open(stderr_file, 'a') as stderr_f:
+                    # Run setup phase to completion, tracked so it can be cancelled
+                    process = self._spawn(cmd, workload_name, test_id, log_dir, stdout=stdout_f, stderr=stderr_f)
+                    with self.lock:
+                        self.setup_processes[workload_name] = process
+                    self.log_lifecycle.register_run(test_id, log_dir)
+                    try:
+                        return_code = process.wait(timeout=600)  # 10 minute timeout for setup phases
+                    except subprocess.TimeoutExpired:
+                        self._signal(process, signal.SIGKILL)
+                        process.wait()
+                        raise
+                    finally:
+                        with self.lock:
+                            self.setup_processes.pop(workload_name, None)
+                        self.log_lifecycle.finish_run(test_id)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.info(f"Setup phase {phase} cancelled for {workload_name}")
+                    results.append({"phase": phase, "success": False, "error": "Cancelled", "return_code": return_code})
+                    if progress_callback:
+                        progress_callback(workload_name, phase, "cancelled")
+                    break
+
+                success = return_code == 0
                 self.setup_status[workload_name][phase] = success
+                self._notify_change("workloads")
 
                 results.append({
                     "phase": phase,
                     "success": success,
                     "stdout": "",  # Output is captured in files
                     "stderr": "",  # Output is captured in files
-                    "return_code": result.returncode
+                    "return_code": return_code
                 })
+                if progress_callback:
+                    progress_callback(workload_name, phase, "succeeded" if success else "failed")
 
                 if not success:
                     logger.error(f"Setup phase {phase} failed for {workload_name}")
@@ -271,6 +485,8 @@ class BenchmarkManager:
                     "success": False,
                     "error": "Timeout"
                 })
+                if progress_callback:
+                    progress_callback(workload_name, phase, "failed")
                 break
             except Exception as e:
                 logger.error(f"Error running setup phase {phase} for {workload_name}: {e}")
@@ -279,6 +495,8 @@ class BenchmarkManager:
                     "success": False,
                     "error": str(e)
                 })
+                if progress_callback:
+                    progress_callback(workload_name, phase, "failed")
                 break
 
         all_success = all(result.get("success", False) for result in results)
@@ -305,9 +523,49 @@ class BenchmarkManager:
             "benchmark_started": benchmark_started
         }
     
-    def start_benchmark(self, workload_name: str, cycle_rate: int,
-                       database_config: Dict[str, Any], original_start_time: float = None) -> Dict[str, Any]:
-        """Start a long-running benchmark"""
+    def cancel_setup_phase(self, workload_name: str) -> bool:
+        """Terminate the setup phase process currently running for a workload"""
+        with self.lock:
+            process = self.setup_processes.get(workload_name)
+
+        if process is None or process.poll() is not None:
+            return False
+
+        self._signal(process, signal.SIGTERM)
+        logger.info(f"Terminated setup phase for {workload_name} (PID: {process.pid})")
+        return True
+
+    def start_benchmark(self, workload_name: str, cycle_rate: int, database_config: Dict[str, Any],
+                       original_start_time: float = None, run_id: str = None, shards: int = None) -> Dict[str, Any]:
+        """Start a long-running benchmark as `shards` nb5 runners (continuing `run_id` when restarted)"""
+        shards = shards or self.config.benchmark.default_shards
+        workload_config = self.config.workload_configs.get(workload_name)
+        if not workload_config:
+            return {"success": False, "error": f"Unknown workload: {workload_name}"}
+
+        # Generate unique test ID for this benchmark run (each shard's is derived from it)
+        group_id = f"{workload_name}_{workload_config['run_phase']}_run_{uuid.uuid4().hex[:8]}"
+        placements = [None] * shards
+        if (self.cpu_allocator and workload_name not in self.running_processes and
+                1 <= shards <= self.config.benchmark.max_shards):
+            # Placement may wait for cores, so it happens before taking the lock
+            placements = self.cpu_allocator.allocate(group_id, shards, self.config.placement.queue_timeout)
+            if placements is None:
+                return {"success": False,
+                        "error": f"Not enough free CPUs or memory for {shards} runners of {workload_name} "
+                                 f"({self.config.placement.cpus_per_runner} CPUs each, "
+                                 f"{self.cpu_allocator.get_inventory()['free_cpus']} free)"}
+
+        result = self._start_runners(workload_name, cycle_rate, database_config, group_id, placements,
+                                     original_start_time, run_id, shards)
+        if not result.get("success") and self.cpu_allocator:
+            self.cpu_allocator.release(group_id)
+        return result
+
+    def _start_runners(self, workload_name: str, cycle_rate: int, database_config: Dict[str, Any], group_id: str,
+                       placements: List[Optional[Placement]], original_start_time: float, run_id: str,
+                       shards: int) -> Dict[str, Any]:
+        """Launch all shards of a benchmark under `group_id`"""
         with self.lock:
             # Check if benchmark is already running
             if workload_name in self.running_processes:
@@ -324,78 +582,152 @@ class BenchmarkManager:
                     "error": f"Setup not completed for {workload_name}"
                 }
             
-            workload_config = self.config.workload_configs.get(workload_name)
-            if not workload_config:
-                return {"success": False, "error": f"Unknown workload: {workload_name}"}
+            workload_config = self.config.workload_configs[workload_name]
 
             # Check if the required database is configured
             driver = workload_config["driver"]
             if not self.is_database_configured(driver, database_config):
                 db_name = {"cql": "Cassandra", "opensearch": "OpenSearch", "jdbc": "Presto"}.get(driver, driver)
                 return {"success": False, "error": f"{db_name} database is not configured for workload {workload_name}"}
+
+            if not 1 <= shards <= self.config.benchmark.max_shards:
+                return {"success": False, "error": f"Shards must be between 1 and {self.config.benchmark.max_shards}"}
+            if cycle_rate and cycle_rate < shards:
+                return {"success": False, "error": f"Cycle rate {cycle_rate} is too low for {shards} shards"}
             
             try:
                 run_phase = workload_config["run_phase"]
-                # Generate unique test ID for this benchmark run
-                test_id = f"{workload_name}_{run_phase}_run_{uuid.uuid4().hex[:8]}"
-                cmd = self.get_workload_command_args(
-                    workload_name, run_phase, cycle_rate, database_config, test_id
-                )
-                
-
-                
-                logger.info(f"Starting benchmark {workload_name} with command: {' '.join(cmd)}")
-
-                # Create log directory for this specific benchmark run
-                log_dir = f"logs/{workload_name}_{run_phase}_{test_id}"
-                os.makedirs(log_dir, exist_ok=True)
-
-                # Open log files for capturing output
-                stdout_file = os.path.join(log_dir, "stdout.log")
-                stderr_file = os.path.join(log_dir, "stderr.log")
-
-                stdout_f = open(stdout_file, 'w')
-                stderr_f = open(stderr_file, 'w')
-
-                # Start process
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=stdout_f,
-                    stderr=stderr_f,
-                    text=True,
-                    preexec_fn=os.setsid  # Create new process group
-                )
-                
-                # Store process info
+                rates = split_cycle_rate(cycle_rate, shards) if cycle_rate else [cycle_rate] * shards
+                cycle_ranges = (split_cycles(self.config.benchmark.shard_cycles, shards) if shards > 1
+                                else [None])
                 current_time = time.time()
-                benchmark_process = BenchmarkProcess(
-                    workload_name=workload_name,
-                    phase=run_phase,
-                    process=process,
-                    cycle_rate=cycle_rate,
-                    start_time=current_time,
-                    pid=process.pid,
-                    test_id=test_id,
-                    stdout_file=stdout_f,
-                    stderr_file=stderr_f,
-                    original_start_time=original_start_time or current_time
-                )
-                
-                self.running_processes[workload_name] = benchmark_process
+
+                benchmark_processes = []
+                try:
+                    for shard in range(shards):
+                        benchmark_processes.append(self._start_shard(
+                            workload_name, run_phase, driver, rates[shard], database_config,
+                            shard_test_id(group_id, shard, shards), group_id, shard, cycle_ranges[shard],
+                            current_time, original_start_time or current_time, run_id or group_id,
+                            placements[shard]
+                        ))
+                except Exception:
+                    # A benchmark runs with all of its shards or not at all
+                    for benchmark_process in benchmark_processes:
+                        self._kill(benchmark_process)
+                        self.run_catalog.record_finish(benchmark_process.test_id, "failed")
+                    raise
+
+                self.running_processes[workload_name] = benchmark_processes
+                self._notify_change("benchmarks")
                 
-                return {
+                result = {
                     "success": True,
                     "workload": workload_name,
-                    "pid": process.pid,
-                    "cycle_rate": cycle_rate
+                    "pid": benchmark_processes[0].pid,
+                    "cycle_rate": cycle_rate,
+                    "test_id": group_id,
+                    "shards": shards
                 }
+                if placements[0]:
+                    result["cpusets"] = [placement.cpuset for placement in placements]
+                return result
                 
             except Exception as e:
                 logger.error(f"Failed to start benchmark {workload_name}: {e}")
                 return {"success": False, "error": str(e)}
+
+    def _start_shard(self, workload_name: str, run_phase: str, driver: str, cycle_rate: int,
+                     database_config: Dict[str, Any], test_id: str, group_id: str, shard: int,
+                     cycle_range: Optional[Tuple[int, int]], start_time: float, original_start_time: float,
+                     run_id: str, placement: Placement = None) -> BenchmarkProcess:
+        """Launch one nb5 runner of a benchmark (lock must be held)"""
+        launched_at = time.time()
+
+        # Exec into a pre-started runner when one is idle, else start a container or process
+        container = self.runner_pool.acquire() if self.runner_pool else None
+        if container and placement and not self.runner_pool.update_resources(
+                container, placement.cpuset, placement.memory_bytes):
+            self.runner_pool.discard(container)
+            container = None
+        runner = "pool" if container else ("docker" if self.config.benchmark.use_docker else "local")
+
+        cmd = self.get_workload_command_args(
+            workload_name, run_phase, cycle_rate, database_config, test_id, group_id, cycle_range, placement,
+            container
+        )
+        control_file = None
+        if self.config.benchmark.live_rate_control:
+            cmd, control_file = self._with_rate_control(cmd, workload_name, run_phase, test_id, container)
+
+        logger.info(f"Starting benchmark {workload_name} with command: {' '.join(cmd)}")
+
+        # Create log directory for this specific benchmark run
+        log_dir = os.path.join(self.logs_path, f"{workload_name}_{run_phase}_{test_id}")
+        os.makedirs(log_dir, exist_ok=True)
+
+        # Output is pumped into the run's log tail and log files
+        stdout_file = os.path.join(log_dir, "stdout.log")
+        stderr_file = os.path.join(log_dir, "stderr.log")
+
+        try:
+            process = self._spawn(cmd, workload_name, test_id, log_dir, placement, container)
+        except Exception:
+            if container:
+                self.runner_pool.discard(container)
+            raise
+        self.log_lifecycle.register_run(test_id, log_dir, owned_files=("stdout.log", "stderr.log"))
+        tail = self.log_pump.attach(test_id, process, stdout_file, stderr_file)
+        if isinstance(process, ContainerProcess) and self.config.benchmark.container_stats:
+            process.watch_stats()
+
+        # Store process info
+        benchmark_process = BenchmarkProcess(
+            workload_name=workload_name,
+            phase=run_phase,
+            process=process,
+            cycle_rate=cycle_rate,
+            start_time=start_time,
+            pid=process.pid,
+            test_id=test_id,
+            original_start_time=original_start_time,
+            control_file=control_file,
+            run_id=run_id,
+            group_id=group_id,
+            shard=shard,
+            placement=placement,
+            runner=runner,
+            container=container
+        )
+        self.run_catalog.record_start(
+            test_id, run_id, workload_name, run_phase,
+            self.get_database_label(driver, database_config), driver, cycle_rate,
+            log_dir=log_dir, results_dir=os.path.join(self.results_path, test_id),
+            started_at=start_time, rate_method="start" if run_id == group_id else "restart",
+            group_id=group_id, runner=runner
+        )
+        # The first progress report with completed cycles, with or without live rate control
+        tail.on_match(has_completed_cycles, lambda timestamp, _: self._on_first_operation(
+            benchmark_process, timestamp - launched_at))
+        self.reaper.watch(process, lambda _: self._on_benchmark_exit(benchmark_process))
+        return benchmark_process
+
+    def _on_first_operation(self, benchmark_process: BenchmarkProcess, startup_seconds: float):
+        """Record a runner's time from launch to its first completed cycles"""
+        benchmark_process.startup_seconds = startup_seconds
+        self.run_catalog.record_startup(benchmark_process.test_id, startup_seconds)
+        logger.info(f"Benchmark {benchmark_process.test_id} reached its first operation "
+                    f"{startup_seconds:.2f}s after launch ({benchmark_process.runner})")
+        self._notify_change("benchmarks")
+
+    def _kill(self, benchmark_process: BenchmarkProcess):
+        """SIGKILL a runner (and remove its pooled container), if it is still there"""
+        self._signal(benchmark_process.process, signal.SIGKILL)
+        if benchmark_process.container:
+            self.runner_pool.discard(benchmark_process.container)
     
-    def stop_benchmark(self, workload_name: str) -> Dict[str, Any]:
-        """Stop a running benchmark"""
+    def stop_benchmark(self, workload_name: str, status: str = "stopped") -> Dict[str, Any]:
+        """Stop all shards of a running benchmark (`status` is what the run catalog records)"""
         with self.lock:
             if workload_name not in self.running_processes:
                 return {
@@ -403,122 +735,393 @@ class BenchmarkManager:
                     "error": f"Benchmark {workload_name} is not running"
                 }
             
-            benchmark_process = self.running_processes[workload_name]
+            benchmark_processes = self.running_processes[workload_name]
             
             try:
-                # Terminate the process group
-                os.killpg(os.getpgid(benchmark_process.pid), signal.SIGTERM)
-
-                # Wait for process to terminate
-                benchmark_process.process.wait(timeout=10)
-
-                # Close log files
-                if benchmark_process.stdout_file:
-                    benchmark_process.stdout_file.close()
-                if benchmark_process.stderr_file:
-                    benchmark_process.stderr_file.close()
+                # Terminate every shard, then wait for them together
+                for benchmark_process in benchmark_processes:
+                    self._signal(benchmark_process.process, signal.SIGTERM)
+
+                deadline = time.monotonic() + 10
+                force_killed = False
+                for benchmark_process in benchmark_processes:
+                    try:
+                        benchmark_process.process.wait(timeout=max(deadline - time.monotonic(), 0))
+                        self.run_catalog.record_finish(benchmark_process.test_id, status,
+                                                       benchmark_process.process.returncode)
+                    except subprocess.TimeoutExpired:
+                        # Force kill if graceful termination failed
+                        self._kill(benchmark_process)
+                        self.run_catalog.record_finish(benchmark_process.test_id, "killed")
+                        force_killed = True
 
                 # Remove from running processes
                 del self.running_processes[workload_name]
+                self._release_placement(benchmark_processes[0].group_id)
+                self._notify_change("benchmarks")
 
                 # Use original start time for final runtime calculation
-                runtime = time.time() - benchmark_process.original_start_time
-                
-                return {
+                result = {
                     "success": True,
                     "workload": workload_name,
-                    "runtime_seconds": runtime
+                    "runtime_seconds": time.time() - benchmark_processes[0].original_start_time
                 }
-                
-            except subprocess.TimeoutExpired:
-                # Force kill if graceful termination failed
-                try:
-                    os.killpg(os.getpgid(benchmark_process.pid), signal.SIGKILL)
-
-                    # Close log files
-                    if benchmark_process.stdout_file:
-                        benchmark_process.stdout_file.close()
-                    if benchmark_process.stderr_file:
-                        benchmark_process.stderr_file.close()
-
-                    del self.running_processes[workload_name]
-                    return {
-                        "success": True,
-                        "workload": workload_name,
-                        "note": "Force killed"
-                    }
-                except Exception as e:
-                    return {"success": False, "error": f"Failed to kill process: {e}"}
+                if force_killed:
+                    result["note"] = "Force killed"
+                return result
+
             except Exception as e:
                 logger.error(f"Error stopping benchmark {workload_name}: {e}")
                 return {"success": False, "error": str(e)}
     
+    def _release_placement(self, group_id: str):
+        """Free a benchmark's cores and memory for queued and later runs"""
+        if self.cpu_allocator:
+            self.cpu_allocator.release(group_id)
+
+    def _with_rate_control(self, cmd: List[str], workload_name: str, run_phase: str,
+                           test_id: str, container: str = None) -> Tuple[List[str], Optional[str]]:
+        """Run the benchmark under the rate control script; returns (cmd, host control file)"""
+        workload_config = self.config.workload_configs[workload_name]
+        log_dir = os.path.join(self.logs_path, f"{workload_name}_{run_phase}_{test_id}")
+        control_file = os.path.join(log_dir, CONTROL_FILE_NAME)
+
+        if self.config.benchmark.use_docker:
+            script_path = f"/workloads/{RATE_CONTROL_SCRIPT}"
+            # Pooled runners see all of logs/ at /logs, others only their own run's directory
+            script_control_file = (f"/logs/{os.path.basename(log_dir)}/{CONTROL_FILE_NAME}" if container
+                                   else f"/logs/{CONTROL_FILE_NAME}")
+        else:
+            script_path = os.path.join(os.path.abspath(self.config.workloads_path), RATE_CONTROL_SCRIPT)
+            script_control_file = os.path.abspath(control_file)
+
+        try:
+            cmd = build_rate_control_command(
+                cmd, workload_config["file"], run_phase,
+                os.path.join(self.config.workloads_path, workload_config["file"]),
+                script_path, script_control_file
+            )
+            return cmd, control_file
+        except Exception as e:
+            logger.warning(f"Live rate control unavailable for {workload_name}, rate changes will restart it: {e}")
+            return cmd, None
+
     def update_cycle_rate(self, workload_name: str, new_cycle_rate: int,
                          database_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Update cycle rate by restarting the benchmark"""
-        # Capture original start time and current runtime before stopping
+        """Update cycle rate in place through the control files, restarting the benchmark as a fallback"""
+        acknowledgements = []
+        with self.lock:
+            benchmark_processes = self.running_processes.get(workload_name)
+            if benchmark_processes and new_cycle_rate < len(benchmark_processes):
+                return {"success": False,
+                        "error": f"Cycle rate {new_cycle_rate} is too low for {len(benchmark_processes)} shards"}
+            if benchmark_processes and all(bp.control_file for bp in benchmark_processes):
+                # Every shard takes its share of the new rate
+                rates = split_cycle_rate(new_cycle_rate, len(benchmark_processes))
+                for benchmark_process, rate in zip(benchmark_processes, rates):
+                    benchmark_process.control_seq += 1
+                    tail = self.log_pump.get_tail(benchmark_process.test_id)
+                    acknowledgements.append((benchmark_process, rate, benchmark_process.control_seq, tail, tail.seq))
+                    write_rate_control(benchmark_process.control_file, benchmark_process.control_seq, rate)
+
+        if acknowledgements:
+            deadline = time.monotonic() + self.config.benchmark.rate_control_timeout
+            if all(tail.wait_for_line(f"{ACK_PREFIX} seq={seq} ", since_seq,
+                                      timeout=max(deadline - time.monotonic(), 0))
+                   for _, _, seq, tail, since_seq in acknowledgements):
+                with self.lock:
+                    for benchmark_process, rate, _, _, _ in acknowledgements:
+                        benchmark_process.cycle_rate = rate
+                for benchmark_process, rate, _, _, _ in acknowledgements:
+                    self.run_catalog.record_rate_change(benchmark_process.test_id, rate, "live")
+                self._notify_change("benchmarks")
+                logger.info(f"Updated cycle rate for {workload_name} to {new_cycle_rate} in place")
+                return {
+                    "success": True,
+                    "workload": workload_name,
+                    "pid": acknowledgements[0][0].pid,
+                    "cycle_rate": new_cycle_rate,
+                    "method": "live"
+                }
+            logger.warning(f"No acknowledgement of cycle rate change for {workload_name}, restarting it")
+
+        # Capture original start time, current runtime and shard count before stopping
         original_start_time = None
+        run_id = None
+        shards = None
         current_runtime = 0
         with self.lock:
             if workload_name in self.running_processes:
-                benchmark_process = self.running_processes[workload_name]
+                benchmark_process = self.running_processes[workload_name][0]
                 original_start_time = benchmark_process.original_start_time
+                run_id = benchmark_process.run_id
+                shards = len(self.running_processes[workload_name])
                 current_runtime = time.time() - benchmark_process.original_start_time
                 logger.info(f"Updating cycle rate for {workload_name}: preserving original_start_time={original_start_time}, current_runtime={current_runtime:.1f}s")
 
         # Stop current benchmark
-        stop_result = self.stop_benchmark(workload_name)
+        stop_result = self.stop_benchmark(workload_name, status="restarted")
         if not stop_result["success"]:
             return stop_result
 
         # Start with new cycle rate, preserving original start time
         time.sleep(1)  # Brief pause
-        start_result = self.start_benchmark(workload_name, new_cycle_rate, database_config, original_start_time)
+        start_result = self.start_benchmark(workload_name, new_cycle_rate, database_config,
+                                            original_start_time, run_id, shards)
 
         if start_result.get("success"):
+            start_result["method"] = "restart"
             logger.info(f"Successfully restarted {workload_name} with new cycle rate {new_cycle_rate}, runtime continuity preserved")
 
         return start_result
     
+    def get_workload_for_test_id(self, test_id: str) -> str:
+        """Get the workload a test id belongs to (the test id itself if none matches)"""
+        matches = [name for name in self.config.workload_configs if test_id.startswith(f"{name}_")]
+        return max(matches, key=len) if matches else test_id
+
+    def get_run_window(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Get when a run (or shard group) started and ended (end is now while it is running), if known"""
+        with self.lock:
+            for benchmark_processes in self.running_processes.values():
+                for benchmark_process in benchmark_processes:
+                    if test_id in (benchmark_process.test_id, benchmark_process.group_id):
+                        return {"start": benchmark_process.start_time, "end": time.time(), "live": True}
+
+        run = self.run_catalog.get_run(test_id)
+        if run is not None:
+            return {"start": run["started_at"], "end": run["ended_at"] or time.time(), "live": False}
+
+        shards = self.run_catalog.list_runs(group_id=test_id, limit=self.config.benchmark.max_shards)["runs"]
+        if shards:
+            ended = [shard["ended_at"] for shard in shards]
+            return {"start": min(shard["started_at"] for shard in shards),
+                    "end": time.time() if None in ended else max(ended), "live": False}
+
+        run_logs = self.log_lifecycle.get_run_logs(test_id)
+        if run_logs is None:
+            return None
+        # Only the last activity is indexed for uncatalogued runs
+        return {"start": None, "end": run_logs["updated_at"], "live": run_logs["active"]}
+
+    def get_run(self, test_id: str) -> Dict[str, Any]:
+        """Get a catalogued run with its cycle rate history (a group id gets its shards and merged summary)"""
+        run = self.run_catalog.get_run(test_id)
+        if run is None:
+            shard_ids = self.run_catalog.expand_test_ids(test_id)
+            if shard_ids == [test_id]:
+                return {"success": False, "error": f"Unknown run {test_id}"}
+            run = self._group_run(test_id, [self.run_catalog.get_run(shard_id) for shard_id in shard_ids])
+
+        run["success"] = True
+        return run
+
+    def _group_run(self, group_id: str, shards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the catalogued shards of a group into one logical run"""
+        first = shards[0]
+        ended = [shard["ended_at"] for shard in shards]
+        rates = [shard["cycle_rate"] for shard in shards]
+        statuses = {shard["status"] for shard in shards}
+        # The group did as well as its worst shard
+        status = next((candidate for candidate in ("running", "failed", "killed", "interrupted")
+                       if candidate in statuses), first["status"])
+
+        run = {key: first[key] for key in ("run_id", "workload", "phase", "database", "driver", "runner")}
+        run.update(
+            test_id=group_id,
+            group_id=group_id,
+            status=status,
+            started_at=min(shard["started_at"] for shard in shards),
+            ended_at=None if None in ended else max(ended),
+            exit_code=next((shard["exit_code"] for shard in shards if shard["exit_code"]), first["exit_code"]),
+            cycle_rate=None if None in rates else sum(rates),
+            summary=None,
+            shards=shards
+        )
+        if run["ended_at"] is not None:
+            run["runtime_seconds"] = run["ended_at"] - run["started_at"]
+            # Shard summaries are per process; the group's is merged from all their histograms
+            if group_id not in self._group_summaries:
+                try:
+                    self._group_summaries[group_id] = self._summarize_run(group_id) or {}
+                except Exception as e:
+                    logger.warning(f"Failed to summarize run {group_id}: {e}")
+                    return run
+            run["summary"] = self._group_summaries[group_id]
+        return run
+
+    def get_database_label(self, driver: str, database_config: Dict[str, Any]) -> str:
+        """Identify the target database of a run as <type>:<host>:<port>"""
+        db_type, prefix = {"cql": ("cassandra", "cassandra"), "opensearch": ("opensearch", "opensearch"),
+                           "jdbc": ("presto", "presto")}.get(driver, (driver, driver))
+        host = database_config.get(f"{prefix}_host", "")
+        port = database_config.get(f"{prefix}_port", "")
+        return f"{db_type}:{host}:{port}"
+
+    def _summarize_run(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Summary statistics of a finished run (or of all shards of a group id) from its HDR histogram logs"""
+        return HistogramSet.from_results(self.results_path, self.run_catalog.expand_test_ids(test_id)).summary()
+
+    def get_log_segments(self, test_id: str) -> Dict[str, Any]:
+        """Get the indexed log directories and segments of a run"""
+        run_logs = self.log_lifecycle.get_run_logs(test_id)
+        if run_logs is None:
+            return {"success": False, "error": f"No logs for run {test_id}"}
+
+        run_logs["success"] = True
+        return run_logs
+
+    def get_benchmark_logs(self, test_id: str, since_seq: Union[int, Dict[str, int]] = 0, limit: int = None,
+                           stream: str = None) -> Dict[str, Any]:
+        """Get the in-memory log tail of a running or recently finished benchmark run
+
+        A shard group's id merges the tails of its shards by arrival time: each
+        line carries its shard's test id, `last_seq` maps shard test ids to their
+        cursors and `since_seq` takes either that map or one seq for every shard.
+        """
+        tail = self.log_pump.get_tail(test_id)
+        if tail is not None:
+            result = tail.read(since_seq.get(test_id, 0) if isinstance(since_seq, dict) else since_seq,
+                               limit, stream)
+            for entry in result["lines"]:
+                entry["test_id"] = test_id
+            result["success"] = True
+            return result
+
+        with self.lock:
+            shard_ids = [shard.test_id for benchmark_processes in self.running_processes.values()
+                         for shard in benchmark_processes if shard.group_id == test_id]
+        if not shard_ids:
+            shard_ids = [shard_id for shard_id in self.run_catalog.expand_test_ids(test_id) if shard_id != test_id]
+        tails = [tail for tail in (self.log_pump.get_tail(shard_id) for shard_id in shard_ids) if tail is not None]
+        if not tails:
+            return {"success": False, "error": f"No logs for run {test_id}"}
+
+        lines, last_seq, dropped, finished = [], {}, 0, True
+        for tail in tails:
+            shard_since = since_seq.get(tail.test_id, 0) if isinstance(since_seq, dict) else since_seq
+            shard_logs = tail.read(shard_since, limit, stream)
+            for entry in shard_logs["lines"]:
+                entry["test_id"] = tail.test_id
+            lines.extend(shard_logs["lines"])
+            last_seq[tail.test_id] = shard_logs["last_seq"]
+            dropped += shard_logs["dropped"]
+            finished = finished and shard_logs["finished"]
+
+        lines.sort(key=lambda entry: entry["timestamp"])
+        if limit is not None and len(lines) > limit:
+            dropped += len(lines) - limit
+            lines = lines[-limit:]
+        return {
+            "success": True,
+            "test_id": test_id,
+            "lines": lines,
+            "last_seq": last_seq,
+            "dropped": dropped,
+            "finished": finished
+        }
+
+    def add_termination_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked when a benchmark process exits on its own"""
+        self.termination_listeners.append(listener)
+
+    def get_runner_resources(self, workload_name: str) -> Dict[str, Any]:
+        """Get the latest CPU, memory and network usage of each runner container of a running benchmark"""
+        with self.lock:
+            benchmark_processes = list(self.running_processes.get(workload_name, []))
+        if not benchmark_processes:
+            return {"success": False, "error": f"Benchmark {workload_name} is not running"}
+
+        return {
+            "success": True,
+            "workload": workload_name,
+            "runners": [{"test_id": shard.test_id, "runner": shard.runner,
+                         "resources": getattr(shard.process, "resources", None)}
+                        for shard in benchmark_processes]
+        }
+
+    def get_telemetry_targets(self) -> List[Dict[str, Any]]:
+        """Running runners to sample: test id, group, runner kind, PID and container (if any)"""
+        with self.lock:
+            return [{"test_id": shard.test_id, "group_id": shard.group_id, "runner": shard.runner,
+                     "pid": shard.pid, "container_id": getattr(shard.process, "container_id", None),
+                     "resources": getattr(shard.process, "resources", None)}
+                    for benchmark_processes in self.running_processes.values() for shard in benchmark_processes]
+
+    def _on_benchmark_exit(self, benchmark_process: BenchmarkProcess):
+        """Handle a benchmark process exit reported by the reaper
+
+        A shard leaves its group; the benchmark terminates with its last shard.
+        """
+        workload_name = benchmark_process.workload_name
+        if benchmark_process.container:
+            # Runners are used once; the pool replaces them
+            self.runner_pool.discard(benchmark_process.container)
+
+        with self.lock:
+            # Stopped or restarted benchmarks have already been removed or replaced
+            benchmark_processes = self.running_processes.get(workload_name, [])
+            if not any(shard is benchmark_process for shard in benchmark_processes):
+                return
+
+            remaining = [shard for shard in benchmark_processes if shard is not benchmark_process]
+            if remaining:
+                self.running_processes[workload_name] = remaining
+            else:
+                del self.running_processes[workload_name]
+                self._release_placement(benchmark_process.group_id)
+
+        return_code = benchmark_process.process.returncode
+        self._notify_change("benchmarks")
+        self.run_catalog.record_finish(benchmark_process.test_id, "exited" if return_code == 0 else "failed",
+                                       return_code)
+        if remaining:
+            logger.warning(f"Shard {benchmark_process.shard} of benchmark {workload_name} (PID: {benchmark_process.pid}) "
+                           f"terminated with return code {return_code}, {len(remaining)} shards still running")
+            return
+        logger.info(f"Benchmark {workload_name} (PID: {benchmark_process.pid}) terminated with return code {return_code}")
+
+        termination = {
+            "workload": workload_name,
+            "phase": benchmark_process.phase,
+            "pid": benchmark_process.pid,
+            "test_id": benchmark_process.group_id,
+            "return_code": return_code,
+            "runtime_seconds": time.time() - benchmark_process.original_start_time
+        }
+        for listener in self.termination_listeners:
+            try:
+                listener(termination)
+            except Exception as e:
+                logger.error(f"Termination listener failed for {workload_name}: {e}")
+
     def get_running_benchmarks(self) -> Dict[str, Dict[str, Any]]:
         """Get status of all running benchmarks"""
+        # Exited processes are removed by the reaper, so no per-call poll() is needed
         with self.lock:
             status = {}
-            terminated_workloads = []
-
-            # Create a copy of items to avoid "dictionary changed size during iteration"
-            for workload_name, benchmark_process in list(self.running_processes.items()):
-                # Check if process is still running
-                if benchmark_process.process.poll() is None:
-                    # Use original start time for runtime calculation to maintain continuity across restarts
-                    runtime = time.time() - benchmark_process.original_start_time
-                    status[workload_name] = {
-                        "status": "running",
-                        "pid": benchmark_process.pid,
-                        "cycle_rate": benchmark_process.cycle_rate,
-                        "runtime_seconds": runtime,
-                        "phase": benchmark_process.phase,
-                        "start_time": benchmark_process.original_start_time  # Add start time for frontend
-                    }
-                    # Debug logging for runtime tracking (can be removed later)
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"Runtime for {workload_name}: {runtime:.1f}s (original_start: {benchmark_process.original_start_time}, current_start: {benchmark_process.start_time})")
-                else:
-                    # Process has terminated
-                    status[workload_name] = {
-                        "status": "terminated",
-                        "return_code": benchmark_process.process.returncode
-                    }
-                    # Close log files and mark for cleanup
-                    if benchmark_process.stdout_file:
-                        benchmark_process.stdout_file.close()
-                    if benchmark_process.stderr_file:
-                        benchmark_process.stderr_file.close()
-                    terminated_workloads.append(workload_name)
-
-            # Clean up terminated processes after iteration
-            for workload_name in terminated_workloads:
-                del self.running_processes[workload_name]
+
+            for workload_name, benchmark_processes in self.running_processes.items():
+                # Shards are reported as one benchmark, under their group id and combined rate
+                benchmark_process = benchmark_processes[0]
+                # Use original start time for runtime calculation to maintain continuity across restarts
+                runtime = time.time() - benchmark_process.original_start_time
+                status[workload_name] = {
+                    "status": "running",
+                    "pid": benchmark_process.pid,
+                    "cycle_rate": sum(shard.cycle_rate or 0 for shard in benchmark_processes),
+                    "runtime_seconds": runtime,
+                    "phase": benchmark_process.phase,
+                    "test_id": benchmark_process.group_id,
+                    "start_time": benchmark_process.original_start_time,  # Add start time for frontend
+                    "shards": len(benchmark_processes),
+                    "test_ids": [shard.test_id for shard in benchmark_processes],
+                    "pids": [shard.pid for shard in benchmark_processes],
+                    "runner": benchmark_process.runner,
+                    "startup_seconds": [shard.startup_seconds for shard in benchmark_processes]
+                }
+                if benchmark_process.placement:
+                    status[workload_name]["cpusets"] = [shard.placement.cpuset for shard in benchmark_processes]
 
             return status
     
@@ -568,19 +1171,17 @@ class BenchmarkManager:
         errors = []
 
         with self.lock:
-            for workload_name, benchmark_process in list(self.running_processes.items()):
+            for workload_name, benchmark_processes in list(self.running_processes.items()):
                 try:
-                    # Force kill the process group
-                    os.killpg(os.getpgid(benchmark_process.pid), signal.SIGKILL)
-
-                    # Close log files
-                    if benchmark_process.stdout_file:
-                        benchmark_process.stdout_file.close()
-                    if benchmark_process.stderr_file:
-                        benchmark_process.stderr_file.close()
+                    # Force kill the process group of every shard
+                    for benchmark_process in benchmark_processes:
+                        self._kill(benchmark_process)
+                        self.run_catalog.record_finish(benchmark_process.test_id, "killed")
+                    self._release_placement(benchmark_processes[0].group_id)
 
                     stopped.append(workload_name)
-                    logger.info(f"Force killed benchmark: {workload_name} (PID: {benchmark_process.pid})")
+                    logger.info(f"Force killed benchmark: {workload_name} "
+                                f"(PIDs: {', '.join(str(shard.pid) for shard in benchmark_processes)})")
 
                 except Exception as e:
                     errors.append(f"{workload_name}: {str(e)}")
@@ -588,5 +1189,6 @@ class BenchmarkManager:
 
             # Clear all running processes
             self.running_processes.clear()
+            self._notify_change("benchmarks")
 
         return {"stopped": stopped, "errors": errors}
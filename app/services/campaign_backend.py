@@ -0,0 +1,47 @@
+import threading
+import logging
+from typing import Dict, List, Any
+
+from .setup_job_manager import FINISHED_STATES as SETUP_FINISHED_STATES
+
+logger = logging.getLogger(__name__)
+
+class LocalCampaignBackend:
+    """Runs campaign steps against local benchmarks (BenchmarkManager / SetupJobManager)"""
+
+    def __init__(self, benchmark_manager, setup_job_manager, state_manager, poll_interval: float = 2.0):
+        self.benchmark_manager = benchmark_manager
+        self.setup_job_manager = setup_job_manager
+        self.state_manager = state_manager
+        self.poll_interval = poll_interval
+
+    def setup(self, workloads: List[str], abort_event: threading.Event) -> Dict[str, Any]:
+        """Run the workloads' setup as a setup job and wait for it, cancelling it on abort"""
+        job = self.setup_job_manager.submit(workloads, self.state_manager.get_database_config(),
+                                            auto_start_benchmarks=False)
+        while job["status"] not in SETUP_FINISHED_STATES:
+            if abort_event.wait(self.poll_interval):
+                self.setup_job_manager.cancel_job(job["job_id"])
+            job = self.setup_job_manager.get_job(job["job_id"]) or {"status": "failed"}
+
+        if job["status"] != "completed":
+            errors = [result.get("error") for result in job.get("results", []) if not result.get("success")]
+            return {"success": False, "error": f"Setup job {job.get('job_id')} {job['status']}"
+                    + (f": {'; '.join(str(error) for error in errors)}" if errors else "")}
+        return {"success": True, "job_id": job["job_id"]}
+
+    def start(self, workload: str, rate: int) -> Dict[str, Any]:
+        """Start a benchmark"""
+        return self.benchmark_manager.start_benchmark(workload, rate, self.state_manager.get_database_config())
+
+    def update_rate(self, workload: str, rate: int) -> Dict[str, Any]:
+        """Change a running benchmark's cycle rate"""
+        return self.benchmark_manager.update_cycle_rate(workload, rate, self.state_manager.get_database_config())
+
+    def stop(self, workload: str) -> Dict[str, Any]:
+        """Stop a benchmark"""
+        return self.benchmark_manager.stop_benchmark(workload)
+
+    def is_running(self, workload: str) -> bool:
+        """Whether a benchmark is running for the workload"""
+        return workload in self.benchmark_manager.get_running_benchmarks()
@@ -0,0 +1,380 @@
+import threading
+import time
+import logging
+import uuid
+from typing import Dict, List, Optional, Any, Callable
+from dataclasses import dataclass, field
+
+from .hdr_analysis import HistogramSet
+from .metrics_query import MetricsQuery, MetricsQueryError
+
+logger = logging.getLogger(__name__)
+
+# Terminal capacity search states
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+# nb5 timers record nanoseconds
+NANOS_PER_MS = 1e6
+
+@dataclass
+class CapacitySearch:
+    """A closed-loop search for the highest cycle rate of a workload that meets an SLO"""
+    search_id: str
+    workload: str
+    database: str
+    slo: Dict[str, Any]  # {"p99_ms", "max_error_ratio", "min_achieved_ratio"}
+    start_rate: int
+    max_rate: int
+    settle_seconds: float
+    measure_seconds: float
+    growth_factor: float
+    resolution: float
+    max_steps: int
+    final_action: str  # restore | capacity | stop
+    status: str = "queued"
+    phase: str = "ramp"  # ramp | bisect
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    capacity_rate: Optional[int] = None
+    current_rate: Optional[int] = None
+    curve: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the search"""
+        return {
+            "search_id": self.search_id,
+            "workload": self.workload,
+            "database": self.database,
+            "slo": dict(self.slo),
+            "start_rate": self.start_rate,
+            "max_rate": self.max_rate,
+            "settle_seconds": self.settle_seconds,
+            "measure_seconds": self.measure_seconds,
+            "status": self.status,
+            "phase": self.phase,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "capacity_rate": self.capacity_rate,
+            "current_rate": self.current_rate,
+            "curve": list(self.curve),
+            "error": self.error
+        }
+
+class CapacityFinder:
+    """Finds the maximum sustainable cycle rate of a workload under a latency/error SLO
+
+    The search drives a running benchmark (starting it if needed) through
+    `BenchmarkManager.update_cycle_rate`: it multiplies the rate by
+    `growth_factor` until a step misses the SLO or `max_rate` is reached,
+    then bisects between the last passing and first failing rates until
+    they are within `resolution` (relative). Each step waits `settle_seconds`
+    after the change and then measures for `measure_seconds`: ops/s and
+    p50/p99 from the run's HDR histogram intervals in that window
+    (VictoriaMetrics series when none were captured) and errors from
+    VictoriaMetrics. A step passes when p99 is within the SLO, the error
+    ratio is at most `max_error_ratio` and the achieved rate is at least
+    `min_achieved_ratio` of the target. Every step is kept as a point of
+    the rate-vs-latency curve, persisted in the run catalog.
+    """
+
+    def __init__(self, config_obj, benchmark_manager, metrics_query: MetricsQuery = None,
+                 max_finished_searches: int = 50):
+        self.config = config_obj
+        self.benchmark_manager = benchmark_manager
+        self.metrics_query = metrics_query
+        self.max_finished_searches = max_finished_searches
+        self.searches: Dict[str, CapacitySearch] = {}
+        self.lock = threading.Lock()
+        self.progress_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_progress_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with the search dict after every step"""
+        self.progress_listeners.append(listener)
+
+    def submit(self, workload: str, database_config: Dict[str, Any], p99_ms: float,
+               max_error_ratio: float = None, start_rate: int = None, max_rate: int = None,
+               settle_seconds: float = None, measure_seconds: float = None, growth_factor: float = None,
+               resolution: float = None, max_steps: int = None, min_achieved_ratio: float = None,
+               final_action: str = "restore") -> Dict[str, Any]:
+        """Start a capacity search for a workload in the background"""
+        defaults = self.config.capacity_search
+        workload_config = self.config.workload_configs.get(workload)
+        if not workload_config:
+            return {"success": False, "error": f"Unknown workload: {workload}"}
+        if p99_ms is None or p99_ms <= 0:
+            return {"success": False, "error": "A positive p99_ms SLO is required"}
+        if final_action not in ("restore", "capacity", "stop"):
+            return {"success": False, "error": f"Unknown final_action: {final_action}"}
+
+        start_rate = int(start_rate or defaults.start_rate)
+        max_rate = int(max_rate or defaults.max_rate)
+        growth_factor = float(growth_factor or defaults.growth_factor)
+        if start_rate < 1 or max_rate < start_rate:
+            return {"success": False, "error": "Rates must satisfy 1 <= start_rate <= max_rate"}
+        if growth_factor <= 1:
+            return {"success": False, "error": "growth_factor must be greater than 1"}
+
+        search = CapacitySearch(
+            search_id=uuid.uuid4().hex[:12],
+            workload=workload,
+            database=self.benchmark_manager.get_database_label(workload_config["driver"], database_config),
+            slo={
+                "p99_ms": float(p99_ms),
+                "max_error_ratio": defaults.max_error_ratio if max_error_ratio is None else float(max_error_ratio),
+                "min_achieved_ratio": defaults.min_achieved_ratio if min_achieved_ratio is None
+                else float(min_achieved_ratio)
+            },
+            start_rate=start_rate,
+            max_rate=max_rate,
+            settle_seconds=defaults.settle_seconds if settle_seconds is None else float(settle_seconds),
+            measure_seconds=float(measure_seconds or defaults.measure_seconds),
+            growth_factor=growth_factor,
+            resolution=float(resolution or defaults.resolution),
+            max_steps=int(max_steps or defaults.max_steps),
+            final_action=final_action
+        )
+
+        with self.lock:
+            active = [s for s in self.searches.values() if s.workload == workload and s.status not in FINISHED_STATES]
+            if active:
+                return {"success": False, "error": f"Capacity search {active[0].search_id} is already running for {workload}"}
+            self.searches[search.search_id] = search
+            self._prune_finished_searches()
+
+        threading.Thread(target=self._run_search, args=(search, database_config), daemon=True).start()
+        logger.info(f"Started capacity search {search.search_id} for {workload} (p99 <= {p99_ms}ms)")
+
+        return dict(search.to_dict(), success=True)
+
+    def get_search(self, search_id: str) -> Optional[Dict[str, Any]]:
+        """Get a capacity search, live or persisted"""
+        with self.lock:
+            search = self.searches.get(search_id)
+            if search:
+                return search.to_dict()
+        return self.benchmark_manager.run_catalog.get_capacity_search(search_id)
+
+    def list_searches(self) -> List[Dict[str, Any]]:
+        """List capacity searches of this session, newest first"""
+        with self.lock:
+            searches = sorted(self.searches.values(), key=lambda search: search.started_at, reverse=True)
+            return [search.to_dict() for search in searches]
+
+    def cancel_search(self, search_id: str) -> Dict[str, Any]:
+        """Cancel a capacity search after its current step"""
+        with self.lock:
+            search = self.searches.get(search_id)
+            if not search:
+                return {"success": False, "error": f"Capacity search {search_id} not found"}
+            if search.status in FINISHED_STATES:
+                return {"success": False, "error": f"Capacity search {search_id} already {search.status}"}
+            search.cancel_event.set()
+
+        logger.info(f"Cancellation requested for capacity search {search_id}")
+        return {"success": True, "search_id": search_id}
+
+    def _run_search(self, search: CapacitySearch, database_config: Dict[str, Any]):
+        """Ramp up, then bisect, until the capacity is bracketed within the resolution"""
+        with self.lock:
+            search.status = "running"
+        self._publish(search)
+
+        running = self.benchmark_manager.get_running_benchmarks().get(search.workload)
+        initial_rate = running["cycle_rate"] if running else None
+
+        try:
+            good, bad = 0, None
+            rate = search.start_rate
+            for _ in range(search.max_steps):
+                point = self._measure_step(search, rate, database_config)
+                if point is None:
+                    break
+                if point["passed"]:
+                    good = rate
+                    with self.lock:
+                        search.capacity_rate = rate
+                else:
+                    bad = rate
+
+                if bad is None:
+                    if rate >= search.max_rate:
+                        break
+                    rate = min(max(int(rate * search.growth_factor), rate + 1), search.max_rate)
+                else:
+                    with self.lock:
+                        search.phase = "bisect"
+                    if bad - good <= max(1, good * search.resolution):
+                        break
+                    rate = (good + bad) // 2
+                    if rate in (good, bad):
+                        break
+
+            with self.lock:
+                search.status = "cancelled" if search.cancel_event.is_set() else "completed"
+        except Exception as e:
+            logger.error(f"Capacity search {search.search_id} failed: {e}")
+            with self.lock:
+                search.status = "failed"
+                search.error = str(e)
+
+        self._finish(search, database_config, initial_rate)
+
+    def _measure_step(self, search: CapacitySearch, rate: int,
+                      database_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply a rate, let it settle, measure it and record the curve point (None when cancelled)"""
+        if search.cancel_event.is_set():
+            return None
+        with self.lock:
+            search.current_rate = rate
+        self._publish(search)
+
+        if search.workload in self.benchmark_manager.get_running_benchmarks():
+            result = self.benchmark_manager.update_cycle_rate(search.workload, rate, database_config)
+        else:
+            result = self.benchmark_manager.start_benchmark(search.workload, rate, database_config)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", f"Could not apply cycle rate {rate}"))
+
+        if search.cancel_event.wait(search.settle_seconds):
+            return None
+        running = self.benchmark_manager.get_running_benchmarks().get(search.workload)
+        if running is None:
+            raise RuntimeError(f"Benchmark {search.workload} stopped during the search")
+        test_id = running["test_id"]
+        test_ids = running.get("test_ids") or [test_id]
+
+        start = time.time()
+        if search.cancel_event.wait(search.measure_seconds):
+            return None
+        end = time.time()
+
+        point = dict(self._measure(test_id, start, end, search.cancel_event, test_ids), rate=rate, test_id=test_id,
+                     start=start, end=end)
+        point["passed"] = self._meets_slo(point, rate, search.slo)
+        logger.info(f"Capacity search {search.search_id}: rate {rate} -> "
+                    f"{point['achieved_ops_per_second']} ops/s, p99 {point['p99_ms']}ms, "
+                    f"{'pass' if point['passed'] else 'fail'}")
+
+        with self.lock:
+            search.curve.append(point)
+        self.benchmark_manager.run_catalog.save_capacity_search(search.to_dict())
+        self._publish(search)
+        return point
+
+    def _measure(self, test_id: str, start: float, end: float, cancel_event: threading.Event,
+                 test_ids: List[str] = None) -> Dict[str, Any]:
+        """Achieved ops/s, p50/p99 and errors of a run (merged over its shards' `test_ids`) between start and end"""
+        point: Dict[str, Any] = {"achieved_ops_per_second": None, "p50_ms": None, "p99_ms": None,
+                                 "errors": None, "error_ratio": None, "source": None}
+
+        # Histogram intervals are written when they close; wait for the one covering `end`
+        deadline = time.time() + self._histogram_interval_seconds() * 2
+        while True:
+            histograms = HistogramSet.from_results(self.benchmark_manager.results_path, test_ids or [test_id])
+            time_range = histograms.time_range()
+            if (time_range and time_range[1] >= end) or time.time() >= deadline or cancel_event.wait(1.0):
+                break
+
+        tag = histograms.primary_tag()
+        selected = histograms.select(tag, start, end) if tag else []
+        if selected:
+            result = histograms.percentiles((50.0, 99.0), tag=tag, start=start, end=end)
+            # Shards log the same window side by side, so count wall-clock time once
+            seconds = (max(interval.start + interval.length for interval in selected)
+                       - min(interval.start for interval in selected))
+            point.update({
+                "achieved_ops_per_second": result["count"] / seconds if seconds else None,
+                "p50_ms": result["percentiles"]["50"] / NANOS_PER_MS,
+                "p99_ms": result["percentiles"]["99"] / NANOS_PER_MS,
+                "source": "histograms"
+            })
+
+        if self.metrics_query is None:
+            return point
+        try:
+            series = self.metrics_query.get_run_metrics(test_id, start, end, live=True)["series"]
+        except MetricsQueryError as e:
+            logger.warning(f"No VictoriaMetrics series for {test_id}: {e}")
+            return point
+
+        if point["source"] is None:
+            ops = [value for value in series["ops_per_second"] if value is not None]
+            p50 = [value for value in series["p50"] if value is not None]
+            p99 = [value for value in series["p99"] if value is not None]
+            point.update({
+                "achieved_ops_per_second": sum(ops) / len(ops) if ops else None,
+                "p50_ms": max(p50) / NANOS_PER_MS if p50 else None,
+                "p99_ms": max(p99) / NANOS_PER_MS if p99 else None,
+                "source": "victoriametrics"
+            })
+
+        # Error counters are cumulative; the window's errors are their increase
+        errors = [value for value in series["errors"] if value is not None]
+        if errors:
+            point["errors"] = max(0.0, errors[-1] - errors[0])
+            if point["achieved_ops_per_second"]:
+                operations = point["achieved_ops_per_second"] * (end - start)
+                point["error_ratio"] = point["errors"] / operations
+        return point
+
+    def _meets_slo(self, point: Dict[str, Any], rate: int, slo: Dict[str, Any]) -> bool:
+        """Whether a measured step satisfies the SLO (unmeasured latency or throughput fails)"""
+        if point["p99_ms"] is None or point["achieved_ops_per_second"] is None:
+            return False
+        if point["p99_ms"] > slo["p99_ms"]:
+            return False
+        if point["achieved_ops_per_second"] < rate * slo["min_achieved_ratio"]:
+            return False
+        if point["error_ratio"] is not None and point["error_ratio"] > slo["max_error_ratio"]:
+            return False
+        return True
+
+    def _finish(self, search: CapacitySearch, database_config: Dict[str, Any], initial_rate: Optional[int]):
+        """Leave the benchmark as requested and persist the search"""
+        try:
+            if search.final_action == "capacity" and search.capacity_rate:
+                self.benchmark_manager.update_cycle_rate(search.workload, search.capacity_rate, database_config)
+            elif search.final_action == "stop" or (search.final_action == "restore" and initial_rate is None):
+                self.benchmark_manager.stop_benchmark(search.workload)
+            elif search.final_action == "restore":
+                self.benchmark_manager.update_cycle_rate(search.workload, initial_rate, database_config)
+        except Exception as e:
+            logger.error(f"Capacity search {search.search_id} could not apply final action: {e}")
+
+        with self.lock:
+            search.finished_at = time.time()
+            search.current_rate = None
+        self.benchmark_manager.run_catalog.save_capacity_search(search.to_dict())
+        logger.info(f"Capacity search {search.search_id} {search.status}: capacity {search.capacity_rate}")
+        self._publish(search)
+
+    def _histogram_interval_seconds(self) -> float:
+        """nb5 histogram interval in seconds (from e.g. "10s")"""
+        interval = self.config.benchmark.histogram_interval
+        try:
+            if interval.endswith("ms"):
+                return float(interval[:-2]) / 1000.0
+            return float(interval.rstrip("s"))
+        except ValueError:
+            return 10.0
+
+    def _publish(self, search: CapacitySearch):
+        """Notify progress listeners of a search update"""
+        with self.lock:
+            search_dict = search.to_dict()
+        for listener in self.progress_listeners:
+            try:
+                listener(search_dict)
+            except Exception as e:
+                logger.error(f"Capacity progress listener failed: {e}")
+
+    def _prune_finished_searches(self):
+        """Drop the oldest finished searches beyond the retention limit (lock must be held)"""
+        finished = sorted(
+            (search for search in self.searches.values() if search.status in FINISHED_STATES),
+            key=lambda search: search.started_at
+        )
+        for search in finished[:max(0, len(finished) - self.max_finished_searches)]:
+            del self.searches[search.search_id]
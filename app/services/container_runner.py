@@ -0,0 +1,280 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Any, Iterable
+
+from docker.errors import DockerException, NotFound, APIError
+
+logger = logging.getLogger(__name__)
+
+# Label carrying the test id of the nb5 run a runner container belongs to
+RUN_LABEL = "nosqlbench-demo.run"
+# Label on every runner container (run or pool), which DockerManager subscribes to events by
+RUNNER_LABEL = "nosqlbench-demo.runner"
+
+def parse_container_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce one Docker stats sample to CPU, memory, process and network usage"""
+    cpu_stats = stats.get("cpu_stats") or {}
+    precpu_stats = stats.get("precpu_stats") or {}
+    cpu_delta = (cpu_stats.get("cpu_usage", {}).get("total_usage", 0) -
+                 precpu_stats.get("cpu_usage", {}).get("total_usage", 0))
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+    online_cpus = cpu_stats.get("online_cpus") or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+
+    # Page cache is reclaimable, so it is left out like `docker stats` does (cgroup v2, then v1)
+    memory_stats = stats.get("memory_stats") or {}
+    memory_detail = memory_stats.get("stats") or {}
+    memory_bytes = memory_stats.get("usage")
+    if memory_bytes is not None:
+        memory_bytes -= memory_detail.get("inactive_file", memory_detail.get("total_inactive_file", 0))
+
+    # Containers on the host network have no interfaces of their own
+    networks = stats.get("networks")
+    return {
+        "cpu_percent": cpu_delta / system_delta * online_cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0,
+        "memory_bytes": memory_bytes,
+        "memory_limit_bytes": memory_stats.get("limit"),
+        "pids": (stats.get("pids_stats") or {}).get("current"),
+        "network_rx_bytes": sum(nic.get("rx_bytes", 0) for nic in networks.values()) if networks else None,
+        "network_tx_bytes": sum(nic.get("tx_bytes", 0) for nic in networks.values()) if networks else None,
+        "sampled_at": time.time()
+    }
+
+def remove_labelled_containers(client, label: str, keep: Iterable[str] = ()) -> List[str]:
+    """Force-remove containers carrying `label` (e.g. left behind by an earlier app process), except `keep`"""
+    removed = []
+    for container in client.containers.list(all=True, filters={"label": label}):
+        if container.name in keep:
+            continue
+        try:
+            container.remove(force=True)
+            removed.append(container.name)
+        except NotFound:
+            pass
+        except APIError as e:
+            logger.warning(f"Failed to remove container {container.name}: {e}")
+    return removed
+
+class ContainerProcess(ABC):
+    """A process run through the Docker API, with the parts of the subprocess.Popen interface we use
+
+    Output is demultiplexed from the Docker stream into pipes (`stdout`/`stderr`
+    with subprocess.PIPE, as for Popen) or written to the given files. The exit
+    status is collected once the output stream ends.
+    """
+
+    def __init__(self, client, name: str, stdout=subprocess.PIPE, stderr=subprocess.PIPE):
+        self.client = client
+        self.name = name
+        self.container_id = None  # Container the process runs in, once it exists
+        self.pid = None
+        self.returncode = None
+        self.stdout = None
+        self.stderr = None
+        self.resources: Optional[Dict[str, Any]] = None  # Latest stats sample, when watched
+        self._exited = threading.Event()
+        self._out_fd = self._output_fd(stdout, "stdout")
+        self._err_fd = self._output_fd(stderr, "stderr")
+
+    def _output_fd(self, target, stream: str) -> int:
+        """Descriptor the forwarder writes a stream to (the write end of a pipe for PIPE)"""
+        if target == subprocess.PIPE:
+            read_fd, write_fd = os.pipe()
+            setattr(self, stream, os.fdopen(read_fd, 'rb', buffering=0))
+            return write_fd
+        return os.dup(target.fileno())
+
+    def _close_fds(self):
+        """Give up the output descriptors of a process that never started"""
+        for fd in (self._out_fd, self._err_fd):
+            os.close(fd)
+        for pipe in (self.stdout, self.stderr):
+            if pipe is not None:
+                pipe.close()
+
+    def _start(self, output):
+        """Forward `output` ((stdout, stderr) chunks) until it ends, then collect the exit status"""
+        threading.Thread(target=self._forward_output, args=(output,), daemon=True).start()
+
+    def _forward_output(self, output):
+        """Copy output chunks to their descriptors; runs until the process's output ends"""
+        fds = [self._out_fd, self._err_fd]
+        try:
+            for chunks in output:
+                for index, data in enumerate(chunks):
+                    if data and fds[index] is not None:
+                        try:
+                            self._write(fds[index], data)
+                        except OSError:
+                            # Nobody reads this stream any more; keep draining the other
+                            os.close(fds[index])
+                            fds[index] = None
+        except Exception as e:
+            logger.warning(f"Output stream of {self.name} failed: {e}")
+        finally:
+            for fd in fds:
+                if fd is not None:
+                    os.close(fd)
+
+        try:
+            self.returncode = self._exit_status()
+        except Exception as e:
+            logger.error(f"Failed to get the exit status of {self.name}: {e}")
+            self.returncode = -1
+        self._exited.set()
+        self._cleanup()
+
+    @staticmethod
+    def _write(fd: int, data: bytes):
+        """Write all of `data` to a blocking descriptor"""
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def wait(self, timeout: float = None) -> int:
+        """Wait for the exit status, raising subprocess.TimeoutExpired like Popen.wait"""
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.name, timeout)
+        return self.returncode
+
+    def poll(self) -> Optional[int]:
+        """Exit status, or None while running"""
+        return self.returncode
+
+    def terminate(self):
+        """Ask nb5 to shut down (SIGTERM)"""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        """Kill nb5 (SIGKILL)"""
+        self.send_signal(signal.SIGKILL)
+
+    def watch_stats(self):
+        """Keep `resources` up to date from the container's stats stream while the process runs"""
+        threading.Thread(target=self._stats_loop, daemon=True).start()
+
+    def _stats_loop(self):
+        """Record stats samples (one per second from Docker) until the process exits"""
+        try:
+            for stats in self.client.api.stats(self.container_id, decode=True, stream=True):
+                if self._exited.is_set():
+                    break
+                if stats.get("read", "").startswith("0001-01-01"):
+                    continue  # Zero sample of a container that is not running yet
+                self.resources = parse_container_stats(stats)
+        except (DockerException, OSError) as e:
+            if not self._exited.is_set():
+                logger.warning(f"Stats stream of {self.name} failed: {e}")
+
+    @abstractmethod
+    def send_signal(self, sig: int):
+        """Signal the process"""
+
+    @abstractmethod
+    def _exit_status(self) -> int:
+        """Exit status of the process, once its output has ended"""
+
+    def _cleanup(self):
+        """Release what the process held in Docker after it exited"""
+
+class ContainerRun(ContainerProcess):
+    """nb5 in a container of its own (the `docker run --rm` equivalent); the container is removed on exit"""
+
+    def __init__(self, client, image: str, command: List[str], name: str, network: str,
+                 volumes: Dict[str, str], labels: Dict[str, str] = None, cpuset_cpus: str = None,
+                 memory_bytes: int = None, stdout=subprocess.PIPE, stderr=subprocess.PIPE):
+        super().__init__(client, name, stdout, stderr)
+        self.oom_killed = False
+        limits = {}
+        if memory_bytes:
+            # Swap is capped at the memory limit so a runner cannot page instead of failing
+            limits = {"mem_limit": memory_bytes, "memswap_limit": memory_bytes}
+
+        try:
+            self.container = client.containers.create(
+                image, command, name=name, network=network, labels=dict(labels or {}, **{RUNNER_LABEL: "run"}),
+                volumes={host_path: {"bind": path, "mode": "rw"} for host_path, path in volumes.items()},
+                cpuset_cpus=cpuset_cpus, **limits
+            )
+        except Exception:
+            self._close_fds()
+            raise
+        self.container_id = self.container.id
+
+        try:
+            # Attached before starting, so no output is missed
+            output = client.api.attach(self.container.id, stdout=True, stderr=True, stream=True, demux=True)
+            self.container.start()
+            self.container.reload()
+            self.pid = self.container.attrs["State"].get("Pid") or None
+        except Exception:
+            self._close_fds()
+            self._cleanup()
+            raise
+        self._start(output)
+
+    def send_signal(self, sig: int):
+        """Signal the container's nb5 process"""
+        try:
+            self.container.kill(signal=int(sig))
+        except (NotFound, APIError):
+            pass  # Already exited (409) or removed
+
+    def _exit_status(self) -> int:
+        """Container exit status, noting whether it was OOM killed"""
+        status_code = self.container.wait()["StatusCode"]
+        self.container.reload()
+        self.oom_killed = bool(self.container.attrs["State"].get("OOMKilled"))
+        if self.oom_killed:
+            logger.warning(f"Runner container {self.name} was killed for exceeding its memory limit")
+        return status_code
+
+    def _cleanup(self):
+        """Remove the container"""
+        try:
+            self.container.remove(force=True)
+        except NotFound:
+            pass
+        except APIError as e:
+            logger.warning(f"Failed to remove runner container {self.name}: {e}")
+
+class ContainerExec(ContainerProcess):
+    """nb5 exec'd into a running container (a pooled runner)"""
+
+    def __init__(self, client, container: str, command: List[str], workdir: str = None,
+                 stdout=subprocess.PIPE, stderr=subprocess.PIPE):
+        super().__init__(client, container, stdout, stderr)
+        self.container_id = container
+        try:
+            self.exec_id = client.api.exec_create(container, command, stdout=True, stderr=True,
+                                                  workdir=workdir)["Id"]
+            output = client.api.exec_start(self.exec_id, stream=True, demux=True)
+            state = client.api.exec_inspect(self.exec_id)
+            self.pid = state.get("Pid") or None
+            self.container_id = state.get("ContainerID") or container
+        except Exception:
+            self._close_fds()
+            raise
+        self._start(output)
+
+    def send_signal(self, sig: int):
+        """Signal nb5 through an exec of kill, as exec'd processes cannot be signalled through the API"""
+        # kill -1 reaches every process of the container but its init (sleep) and kill itself
+        try:
+            exec_id = self.client.api.exec_create(self.container_id, ["kill", f"-{int(sig)}", "-1"])["Id"]
+            self.client.api.exec_start(exec_id)
+        except (NotFound, APIError):
+            pass
+
+    def _exit_status(self) -> int:
+        """Exit code of the exec (set shortly after its output stream closes)"""
+        for _ in range(50):
+            state = self.client.api.exec_inspect(self.exec_id)
+            if not state.get("Running") and state.get("ExitCode") is not None:
+                return state["ExitCode"]
+            time.sleep(0.1)
+        return -1
@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """Parse a cpuset list such as "0-3,6" into CPU numbers"""
+    cpus = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    """Format CPU numbers as a cpuset list ("0-3,6")"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+@dataclass
+class Placement:
+    """Cores and memory reserved for one nb5 runner"""
+    cpus: List[int]
+    memory_bytes: int
+    threads: int
+
+    @property
+    def cpuset(self) -> str:
+        return format_cpu_list(self.cpus)
+
+class CpuAllocator:
+    """Hands out disjoint CPU sets and memory budgets to nb5 runners from the host's inventory
+
+    Reserved CPUs and memory are left to VictoriaMetrics, Grafana and
+    co-located databases. Requests that do not fit wait for running
+    benchmarks to release their cores, up to a timeout.
+    """
+
+    def __init__(self, reserved_cpus: str = "", cpus_per_runner: int = 2, memory_per_runner: int = 2 << 30,
+                 reserved_memory: int = 0, threads_per_cpu: int = 1):
+        if hasattr(os, "sched_getaffinity"):
+            host_cpus = sorted(os.sched_getaffinity(0))
+        else:
+            host_cpus = list(range(psutil.cpu_count() or 1))
+        reserved = set(parse_cpu_list(reserved_cpus))
+
+        self.cpus = [cpu for cpu in host_cpus if cpu not in reserved]
+        self.reserved_cpus = sorted(reserved.intersection(host_cpus))
+        self.memory_bytes = max(psutil.virtual_memory().total - reserved_memory, 0)
+        self.cpus_per_runner = cpus_per_runner
+        self.memory_per_runner = memory_per_runner
+        self.threads_per_cpu = threads_per_cpu
+
+        # Placements of each benchmark (shard group), keyed by its group id
+        self.allocations: Dict[str, List[Placement]] = {}
+        self.condition = threading.Condition()
+
+        logger.info(f"CPU placement: {len(self.cpus)} CPUs ({format_cpu_list(self.cpus)}) for runners, "
+                    f"{self.cpus_per_runner} per runner, {len(self.reserved_cpus)} reserved")
+
+    def capacity(self) -> int:
+        """How many runners the host holds when none are running"""
+        return min(len(self.cpus) // self.cpus_per_runner, self.memory_bytes // self.memory_per_runner)
+
+    def allocate(self, key: str, runners: int, timeout: float = 0) -> Optional[List[Placement]]:
+        """Reserve placements for `runners` runners, waiting up to `timeout` seconds for room (None if none)"""
+        if runners > self.capacity():
+            return None
+
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                placements = self._try_allocate(runners)
+                if placements is not None:
+                    self.allocations[key] = placements
+                    return placements
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                logger.info(f"Waiting up to {remaining:.0f}s for {runners * self.cpus_per_runner} free CPUs for {key}")
+                self.condition.wait(remaining)
+
+    def _try_allocate(self, runners: int) -> Optional[List[Placement]]:
+        """Carve placements out of the free CPUs and memory (condition must be held)"""
+        used = {cpu for placements in self.allocations.values() for placement in placements for cpu in placement.cpus}
+        free = [cpu for cpu in self.cpus if cpu not in used]
+        used_memory = sum(placement.memory_bytes for placements in self.allocations.values()
+                          for placement in placements)
+
+        if (len(free) < runners * self.cpus_per_runner or
+                self.memory_bytes - used_memory < runners * self.memory_per_runner):
+            return None
+
+        placements = []
+        for runner in range(runners):
+            cpus = free[runner * self.cpus_per_runner:(runner + 1) * self.cpus_per_runner]
+            placements.append(Placement(cpus=cpus, memory_bytes=self.memory_per_runner,
+                                        threads=len(cpus) * self.threads_per_cpu))
+        return placements
+
+    def release(self, key: str):
+        """Return a benchmark's placements to the free pool"""
+        with self.condition:
+            if self.allocations.pop(key, None) is not None:
+                self.condition.notify_all()
+
+    def get_inventory(self) -> Dict[str, Any]:
+        """Host CPU/memory inventory and current placements"""
+        with self.condition:
+            allocations = {key: [{"cpuset": placement.cpuset, "memory_bytes": placement.memory_bytes,
+                                  "threads": placement.threads} for placement in placements]
+                           for key, placements in self.allocations.items()}
+            used = sum(len(placement.cpus) for placements in self.allocations.values() for placement in placements)
+
+        return {
+            "cpus": format_cpu_list(self.cpus),
+            "reserved_cpus": format_cpu_list(self.reserved_cpus),
+            "free_cpus": len(self.cpus) - used,
+            "cpus_per_runner": self.cpus_per_runner,
+            "memory_bytes": self.memory_bytes,
+            "memory_per_runner": self.memory_per_runner,
+            "capacity": self.capacity(),
+            "allocations": allocations
+        }
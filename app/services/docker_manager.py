@@ -1,12 +1,43 @@
 import docker
+import threading
 import time
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Any, Callable
 from docker.errors import DockerException, NotFound, APIError
 
+from .container_runner import RUNNER_LABEL
+from .status_cache import ChangeNotifier
+
 logger = logging.getLogger(__name__)
 
-class DockerManager:
+# Containers tracked by the Docker event subscriber
+DEMO_CONTAINERS = ("demo-victoriametrics", "demo-grafana")
+RUNNER_CONTAINER_PREFIX = "nosqlbench-"
+
+# One event stream per filter (Docker ANDs different filter keys): the demo containers by name
+# and nb5 runner containers by label
+EVENT_FILTERS = (
+    {"type": "container", "container": list(DEMO_CONTAINERS)},
+    {"type": "container", "label": RUNNER_LABEL},
+)
+
+# Container event actions mapped to the resulting container status
+EVENT_STATUS = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "kill": None,  # Followed by "die"; status unchanged until then
+    "oom": None,   # Followed by "die"; recorded as a flag
+}
+
+# Event actions pushed to listeners as soon as they arrive
+ALERT_ACTIONS = ("die", "oom", "health_status")
+
+class DockerManager(ChangeNotifier):
     """Manages Docker containers for Grafana and VictoriaMetrics"""
     
     def __init__(self):
@@ -17,6 +48,15 @@ class DockerManager:
         except DockerException as e:
             logger.error(f"Failed to initialize Docker client: {e}")
             raise
+
+        # Container state table maintained from the Docker events API
+        self.container_states: Dict[str, Dict[str, Any]] = {}
+        self.states_lock = threading.Lock()
+        self.event_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._events_streams = []
+        self._events_thread = None
+        self._events_synced = threading.Event()
+        self._events_stop = threading.Event()
     
     def _ensure_network(self):
         """Ensure the demo network exists"""
@@ -87,6 +127,8 @@ class DockerManager:
         except APIError as e:
             logger.error(f"Failed to start VictoriaMetrics: {e}")
             raise
+        finally:
+            self._notify_change("infrastructure")
     
     def start_grafana(self, port: int = 3001, vm_endpoint: str = "http://demo-victoriametrics:8428") -> Dict[str, str]:
         """Start Grafana container with VictoriaMetrics as datasource"""
@@ -159,6 +201,8 @@ class DockerManager:
         except APIError as e:
             logger.error(f"Failed to start Grafana: {e}")
             raise
+        finally:
+            self._notify_change("infrastructure")
     
     def _wait_for_container_health(self, container, port: int, health_path: str, timeout: int = 60):
         """Wait for container to be healthy"""
@@ -274,9 +318,23 @@ class DockerManager:
         except APIError as e:
             logger.error(f"Failed to stop container {container_name}: {e}")
             raise
+        finally:
+            self._notify_change("infrastructure")
     
     def get_container_status(self, container_name: str) -> Dict[str, str]:
         """Get status of a container"""
+        # Served from the event-driven state table when the subscriber is live
+        if self._events_synced.is_set() and self._is_tracked_container(container_name):
+            with self.states_lock:
+                state = self.container_states.get(container_name)
+                if state:
+                    return dict(state)
+            return {
+                "name": container_name,
+                "status": "not_found",
+                "id": None
+            }
+
         try:
             container = self.client.containers.get(container_name)
             return {
@@ -306,3 +364,147 @@ class DockerManager:
                 errors.append(f"{container_name}: {str(e)}")
         
         return {"stopped": stopped, "errors": errors}
+
+    def add_container_event_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback for die/oom/health events of tracked containers"""
+        self.event_listeners.append(listener)
+
+    def start_event_monitor(self):
+        """Start the background Docker events subscriber"""
+        if self._events_thread is None or not self._events_thread.is_alive():
+            self._events_stop.clear()
+            self._events_thread = threading.Thread(target=self._event_monitor_loop, daemon=True)
+            self._events_thread.start()
+            logger.info("Docker event monitor thread started")
+
+    def stop_event_monitor(self):
+        """Stop the Docker events subscriber"""
+        self._events_stop.set()
+        self._events_synced.clear()
+        self._close_event_streams()
+
+    def _close_event_streams(self):
+        """Close the open event streams, ending the threads reading them"""
+        for stream in list(self._events_streams):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def is_event_monitor_active(self) -> bool:
+        """Check if container status is being served from the event stream"""
+        return self._events_synced.is_set()
+
+    def _is_tracked_container(self, container_name: str) -> bool:
+        """Check if a container is tracked by the event subscriber"""
+        return container_name in DEMO_CONTAINERS or container_name.startswith(RUNNER_CONTAINER_PREFIX)
+
+    def _event_monitor_loop(self):
+        """Subscribe to container events, resyncing the state table on every (re)connect"""
+        while not self._events_stop.is_set():
+            try:
+                # Open the streams before listing so no event between the two is lost
+                self._events_streams = [self.client.events(decode=True, filters=filters)
+                                        for filters in EVENT_FILTERS]
+                self._sync_container_states()
+                self._events_synced.set()
+                self._notify_change("infrastructure")
+
+                # Extra streams are read on helper threads; any stream ending closes them all
+                readers = [threading.Thread(target=self._read_event_stream, args=(stream,), daemon=True)
+                           for stream in self._events_streams[1:]]
+                for reader in readers:
+                    reader.start()
+                self._read_event_stream(self._events_streams[0])
+                for reader in readers:
+                    reader.join()
+
+            except Exception as e:
+                if not self._events_stop.is_set():
+                    logger.error(f"Docker event stream failed: {e}")
+            finally:
+                self._events_synced.clear()
+                self._close_event_streams()
+                self._events_streams = []
+
+            # Reads fall back to direct API calls until the stream is re-established
+            self._events_stop.wait(5)
+
+    def _read_event_stream(self, stream):
+        """Apply the events of one stream until it ends, then close the others"""
+        try:
+            for event in stream:
+                self._handle_container_event(event)
+        except Exception as e:
+            if not self._events_stop.is_set():
+                logger.error(f"Docker event stream failed: {e}")
+        finally:
+            self._close_event_streams()
+
+    def _sync_container_states(self):
+        """Rebuild the state table from a full container listing"""
+        states = {}
+        for container in self.client.containers.list(all=True):
+            if self._is_tracked_container(container.name):
+                states[container.name] = {
+                    "name": container.name,
+                    "status": container.status,
+                    "id": container.id
+                }
+
+        with self.states_lock:
+            self.container_states = states
+        logger.info(f"Synced {len(states)} tracked container states from Docker")
+
+    def _handle_container_event(self, event: Dict[str, Any]):
+        """Apply a Docker container event to the state table"""
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        container_name = attributes.get("name", "")
+        if not self._is_tracked_container(container_name):
+            return
+
+        action = event.get("Action", "")
+        # Health events arrive as "health_status: healthy"
+        action_name, _, action_detail = action.partition(": ")
+
+        with self.states_lock:
+            if action_name == "destroy":
+                self.container_states.pop(container_name, None)
+                state = {"name": container_name, "status": "not_found", "id": None}
+            else:
+                state = self.container_states.setdefault(container_name, {
+                    "name": container_name,
+                    "status": "unknown",
+                    "id": event.get("Actor", {}).get("ID")
+                })
+                state["id"] = event.get("Actor", {}).get("ID", state["id"])
+                if EVENT_STATUS.get(action_name):
+                    state["status"] = EVENT_STATUS[action_name]
+                if action_name == "start":
+                    state.pop("exit_code", None)
+                    state.pop("oom_killed", None)
+                elif action_name == "die":
+                    state["exit_code"] = int(attributes.get("exitCode", -1))
+                elif action_name == "oom":
+                    state["oom_killed"] = True
+                elif action_name == "health_status":
+                    state["health"] = action_detail
+                state = dict(state)
+
+        # Runner containers are not part of the infrastructure section
+        if container_name in DEMO_CONTAINERS:
+            self._notify_change("infrastructure")
+
+        if action_name in ALERT_ACTIONS:
+            container_event = {
+                "container": container_name,
+                "action": action_name,
+                "detail": action_detail or None,
+                "state": state,
+                "time": event.get("time", time.time())
+            }
+            for listener in self.event_listeners:
+                try:
+                    listener(container_event)
+                except Exception as e:
+                    logger.error(f"Container event listener failed: {e}")
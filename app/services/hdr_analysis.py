@@ -0,0 +1,218 @@
+import base64
+import glob
+import math
+import os
+import re
+import struct
+import zlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File nb5 writes HDR interval histograms to, inside results/<test_id>/
+HISTOGRAM_LOG_NAME = "histograms.hdr"
+
+# HdrHistogram V2 encoding cookie bases (compressed wrapper, then the inner histogram);
+# bits 4-7 of a cookie carry the word size and are ignored
+COMPRESSED_COOKIE_V2 = 0x1c849304
+ENCODING_COOKIE_V2 = 0x1c849303
+V2_HEADER = struct.Struct(">iiiiqqd")
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99, 100.0)
+
+@dataclass
+class IntervalHistogram:
+    """One interval of an HDR histogram log, as distinct recorded values and their counts"""
+    tag: Optional[str]
+    start: float  # Epoch seconds
+    length: float
+    values: np.ndarray  # int64, highest equivalent value of each non-empty bucket
+    counts: np.ndarray  # int64
+
+def _decode_zigzag_varints(payload: np.ndarray) -> np.ndarray:
+    """Decode a ZigZag LEB128 byte stream into int64 values, vectorized"""
+    if payload.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    last_bytes = (payload & 0x80) == 0
+    # Values have at most 9 bytes; only the 9th carries a full 8 bits (not needed below 2^56)
+    ends = np.flatnonzero(last_bytes)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    value_ids = np.repeat(np.arange(ends.size), ends - starts + 1)
+    positions = np.arange(ends[-1] + 1) - starts[value_ids]
+
+    parts = (payload[:ends[-1] + 1] & 0x7f).astype(np.uint64) << (np.uint64(7) * positions.astype(np.uint64))
+    raw = np.add.reduceat(parts, starts)
+    return (raw >> np.uint64(1)).astype(np.int64) ^ -(raw & np.uint64(1)).astype(np.int64)
+
+def decode_histogram(encoded: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode a base64 compressed V2 HdrHistogram into (values, counts) of its non-empty buckets"""
+    data = base64.b64decode(encoded)
+    cookie, length = struct.unpack(">ii", data[:8])
+    if cookie & ~0xf0 != COMPRESSED_COOKIE_V2:
+        raise ValueError(f"Unsupported histogram encoding cookie {cookie:#x}")
+    inner = zlib.decompress(data[8:8 + length])
+
+    (cookie, payload_length, normalizing_offset, significant_digits,
+     lowest, _highest, _ratio) = V2_HEADER.unpack(inner[:V2_HEADER.size])
+    if cookie & ~0xf0 != ENCODING_COOKIE_V2:
+        raise ValueError(f"Unsupported histogram encoding cookie {cookie:#x}")
+    if normalizing_offset != 0:
+        raise ValueError("Shifted (normalized) histograms are not supported")
+
+    entries = _decode_zigzag_varints(np.frombuffer(inner, dtype=np.uint8, offset=V2_HEADER.size,
+                                                   count=payload_length))
+    # Positive entries are counts; negative ones are runs of empty buckets
+    steps = np.where(entries < 0, -entries, 1)
+    indexes = np.cumsum(steps) - steps
+    filled = entries > 0
+    indexes, counts = indexes[filled], entries[filled]
+
+    # Bucket index -> value, following HdrHistogram's layout
+    unit_magnitude = int(math.floor(math.log2(max(lowest, 1))))
+    sub_bucket_count_magnitude = int(math.ceil(math.log2(2 * 10 ** significant_digits)))
+    half_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+    sub_bucket_half_count = 1 << half_magnitude
+
+    bucket_indexes = (indexes >> half_magnitude) - 1
+    sub_bucket_indexes = (indexes & (sub_bucket_half_count - 1)) + sub_bucket_half_count
+    first_bucket = bucket_indexes < 0
+    sub_bucket_indexes = np.where(first_bucket, sub_bucket_indexes - sub_bucket_half_count, sub_bucket_indexes)
+    bucket_indexes = np.where(first_bucket, 0, bucket_indexes)
+
+    shifts = bucket_indexes + unit_magnitude
+    lowest_equivalent = sub_bucket_indexes << shifts
+    values = lowest_equivalent + (np.int64(1) << shifts) - 1
+    return values.astype(np.int64), counts.astype(np.int64)
+
+def read_histogram_log(path: str) -> List[IntervalHistogram]:
+    """Read every interval histogram of an HdrHistogram log file"""
+    start_time = None
+    base_time = None
+    intervals = []
+
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                match = re.match(r"#\[(StartTime|BaseTime): ([\d.]+)", line)
+                if match and match.group(1) == "StartTime":
+                    start_time = float(match.group(2))
+                elif match:
+                    base_time = float(match.group(2))
+                continue
+            if line.startswith('"'):
+                continue
+
+            fields = line.split(",")
+            tag = None
+            if fields[0].startswith("Tag="):
+                tag = fields.pop(0)[len("Tag="):]
+            try:
+                start, length = float(fields[0]), float(fields[1])
+                values, counts = decode_histogram(fields[3])
+            except (IndexError, ValueError, zlib.error) as e:
+                logger.warning(f"Skipping unreadable histogram interval in {path}: {e}")
+                continue
+
+            # Timestamps are relative to BaseTime, or to StartTime unless already absolute
+            if base_time is not None:
+                start += base_time
+            elif start_time is not None and start < 365 * 86400:
+                start += start_time
+            intervals.append(IntervalHistogram(tag, start, length, values, counts))
+
+    return intervals
+
+class HistogramSet:
+    """Interval histograms of one or more runs (shards, restarts), merged on demand
+
+    Merging adds counts per recorded value across all selected intervals, so
+    percentiles are exact to the histograms' resolution rather than averages
+    of per-interval summaries.
+    """
+
+    def __init__(self, intervals: Iterable[IntervalHistogram] = ()):
+        self.intervals = list(intervals)
+
+    @classmethod
+    def from_results(cls, results_path: str, test_ids: Iterable[str]) -> "HistogramSet":
+        """Load the histogram logs of runs under results/<test_id>/"""
+        intervals = []
+        for test_id in test_ids:
+            for path in sorted(glob.glob(os.path.join(results_path, test_id, f"{HISTOGRAM_LOG_NAME}*"))):
+                intervals.extend(read_histogram_log(path))
+        return cls(intervals)
+
+    def tags(self) -> List[str]:
+        """Distinct tags (metric names) in the set"""
+        return sorted({interval.tag for interval in self.intervals if interval.tag})
+
+    def primary_tag(self) -> Optional[str]:
+        """Tag of the successful-operation timer (nb5's result-success), if present"""
+        return next((tag for tag in self.tags() if tag.endswith("result-success")), None)
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Optional[Dict[str, Any]]:
+        """Percentiles of the primary timer over the whole set, plus its throughput"""
+        tag = self.primary_tag()
+        time_range = self.time_range()
+        if tag is None or time_range is None:
+            return None
+        result = self.percentiles(percentiles, tag=tag)
+        duration = time_range[1] - time_range[0]
+        result["ops_per_second"] = result["count"] / duration if duration > 0 else None
+        return result
+
+    def time_range(self) -> Optional[Tuple[float, float]]:
+        """Earliest start and latest end of the intervals"""
+        if not self.intervals:
+            return None
+        return (min(interval.start for interval in self.intervals),
+                max(interval.start + interval.length for interval in self.intervals))
+
+    def select(self, tag: str = None, start: float = None, end: float = None) -> List[IntervalHistogram]:
+        """Intervals of `tag` starting within [start, end)"""
+        return [interval for interval in self.intervals
+                if (tag is None or interval.tag == tag)
+                and (start is None or interval.start >= start)
+                and (end is None or interval.start < end)]
+
+    def merge(self, tag: str = None, start: float = None, end: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Merge the intervals of `tag` starting within [start, end) into sorted (values, counts)"""
+        selected = self.select(tag, start, end)
+        if not selected:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        values = np.concatenate([interval.values for interval in selected])
+        counts = np.concatenate([interval.counts for interval in selected])
+        unique_values, inverse = np.unique(values, return_inverse=True)
+        merged_counts = np.zeros(unique_values.size, dtype=np.int64)
+        np.add.at(merged_counts, inverse, counts)
+        return unique_values, merged_counts
+
+    def percentiles(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES, tag: str = None,
+                    start: float = None, end: float = None) -> Dict[str, Any]:
+        """Exact percentiles of the merged distribution (HdrHistogram's rounding rules)"""
+        values, counts = self.merge(tag, start, end)
+        total = int(counts.sum())
+        result = {"tag": tag, "start": start, "end": end, "count": total, "percentiles": {}}
+        if total == 0:
+            return result
+
+        cumulative = np.cumsum(counts)
+        requested = np.clip(np.asarray(list(percentiles), dtype=np.float64), 0.0, 100.0)
+        ranks = np.maximum(np.floor(requested / 100.0 * total + 0.5), 1).astype(np.int64)
+        positions = np.searchsorted(cumulative, ranks, side="left")
+        positions = np.minimum(positions, values.size - 1)
+
+        result["percentiles"] = {f"{p:g}": int(values[i]) for p, i in zip(requested, positions)}
+        result["min"] = int(values[0])
+        result["max"] = int(values[-1])
+        result["mean"] = float(np.dot(values.astype(np.float64), counts) / total)
+        return result
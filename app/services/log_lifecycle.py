@@ -0,0 +1,425 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Any, Iterable
+
+from .state_persister import WriteBehindPersister
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.json"
+
+# Test ids are <workload>_<phase>_(run|setup)_<hex>, with -s<n> for a shard; run directories
+# are named <workload>_<phase>_<test_id> (runner output) or <name>_<test_id> (local nb5 --logs-dir)
+RUN_SUFFIX_PATTERN = re.compile(r"_(?:run|setup)_[0-9a-f]{8}(?:-s[0-9]+)?$")
+
+def test_id_for_dir(name: str) -> Optional[str]:
+    """Recover the test id from a run directory name, or None if it is not one"""
+    match = RUN_SUFFIX_PATTERN.search(name)
+    if not match:
+        return None
+
+    head = name[:match.start()]
+    half = len(head) // 2
+    if len(head) % 2 == 1 and head[half] == "_" and head[:half] == head[half + 1:]:
+        head = head[half + 1:]
+    elif head.startswith("unknown_"):
+        head = head[len("unknown_"):]
+    return head + match.group(0)
+
+class LogLifecycleManager:
+    """Rotates, compresses and prunes the per-run directories under logs/
+
+    Every run (test_id) owns one or more directories and the segments in
+    them. The index of runs and segments is kept in memory and saved to
+    logs/index.json, so caps are enforced and lookups answered without
+    walking the tree; only the directories of active runs are stat'ed.
+
+    - Files written by the LogPump are rotated by the pump itself, which
+      reports each closed segment through add_segment().
+    - Other live files (nb5 --logs-dir output) above `segment_bytes` are
+      rotated copy-then-truncate, so nb5 keeps its open file descriptor and
+      never needs a restart.
+    - Rotated segments, and every file of a finished run, are gzipped in
+      the background.
+    - Finished runs older than `max_age_seconds` are removed; runs above
+      `max_run_bytes` lose their oldest segments; above `max_total_bytes`
+      the oldest finished runs go first, then old segments of active runs.
+    """
+
+    def __init__(self, logs_path: str, segment_bytes: int = 64 << 20, max_run_bytes: int = 512 << 20,
+                 max_total_bytes: int = 5 << 30, max_age_seconds: float = 7 * 86400,
+                 compress: bool = True, compress_level: int = 6, sweep_interval: float = 60.0):
+        self.logs_path = os.path.abspath(logs_path)
+        self.segment_bytes = segment_bytes
+        self.max_run_bytes = max_run_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compress = compress
+        self.compress_level = compress_level
+        self.sweep_interval = sweep_interval
+
+        self.condition = threading.Condition()
+        # {test_id: {"dirs": [...], "active": bool, "updated_at": float, "owned": [...],
+        #            "segments": {relpath: {"bytes": int, "live": bool, "compressed": bool, "closed_at": float}}}}
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self._compress_queue: deque = deque()
+        self._sweep_requested = False
+        self._stopped = False
+
+        self._load_index()
+        self.persister = WriteBehindPersister(
+            os.path.join(self.logs_path, INDEX_FILE_NAME), self._snapshot,
+            debounce_seconds=1.0, max_delay_seconds=10.0, fsync_policy="never"
+        )
+        self.persister.mark_dirty()
+
+        self._thread = threading.Thread(target=self._lifecycle_loop, daemon=True)
+        self._thread.start()
+
+    def register_run(self, test_id: str, log_dir: str, owned_files: Iterable[str] = ()):
+        """Record a directory of a starting run; `owned_files` are rotated by their writer"""
+        rel_dir = os.path.relpath(os.path.abspath(log_dir), self.logs_path)
+        with self.condition:
+            run = self.runs.setdefault(test_id, self._new_run())
+            if rel_dir not in run["dirs"]:
+                run["dirs"].append(rel_dir)
+            run["owned"].extend(os.path.join(rel_dir, name) for name in owned_files)
+            run["active"] = True
+            run["updated_at"] = time.time()
+        self.persister.mark_dirty()
+
+    def add_segment(self, test_id: str, path: str):
+        """Record a segment rotated out of a live file and queue it for compression"""
+        with self.condition:
+            run = self.runs.get(test_id)
+            if run is None:
+                return
+            relpath = self._record_segment(run, path, live=False)
+            if relpath and self.compress:
+                self._compress_queue.append((test_id, relpath))
+                self.condition.notify()
+        self.persister.mark_dirty()
+
+    def finish_run(self, test_id: str):
+        """Mark a run finished; its files are compressed and become eligible for pruning"""
+        with self.condition:
+            run = self.runs.get(test_id)
+            if run is None or not run["active"]:
+                return
+            run["active"] = False
+            run["updated_at"] = time.time()
+            self._sweep_requested = True
+            self.condition.notify()
+        self.persister.mark_dirty()
+
+    def get_run_logs(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Get a run's directories and segments from the index"""
+        with self.condition:
+            run = self.runs.get(test_id)
+            if run is None:
+                return None
+            segments = [dict(info, path=os.path.join(self.logs_path, relpath))
+                        for relpath, info in sorted(run["segments"].items())]
+            return {
+                "test_id": test_id,
+                "active": run["active"],
+                "updated_at": run["updated_at"],
+                "dirs": [os.path.join(self.logs_path, rel_dir) for rel_dir in run["dirs"]],
+                "segments": segments,
+                "total_bytes": sum(segment["bytes"] for segment in segments)
+            }
+
+    def get_usage(self) -> Dict[str, Any]:
+        """Get disk usage per run and overall, from the index"""
+        with self.condition:
+            runs = {
+                test_id: {
+                    "active": run["active"],
+                    "updated_at": run["updated_at"],
+                    "segments": len(run["segments"]),
+                    "total_bytes": self._run_bytes(run)
+                }
+                for test_id, run in self.runs.items()
+            }
+        return {
+            "runs": runs,
+            "total_bytes": sum(run["total_bytes"] for run in runs.values()),
+            "max_total_bytes": self.max_total_bytes
+        }
+
+    def stop(self):
+        """Stop the lifecycle thread and save the index"""
+        with self.condition:
+            self._stopped = True
+            self.condition.notify()
+        self.persister.stop()
+
+    def _new_run(self) -> Dict[str, Any]:
+        """Empty index entry for a run"""
+        return {"dirs": [], "active": False, "updated_at": time.time(), "owned": [], "segments": {}}
+
+    def _run_bytes(self, run: Dict[str, Any]) -> int:
+        """Indexed size of a run's segments"""
+        return sum(info["bytes"] for info in run["segments"].values())
+
+    def _record_segment(self, run: Dict[str, Any], path: str, live: bool) -> Optional[str]:
+        """Add or refresh a file in a run's index entry (lock held)"""
+        relpath = os.path.relpath(os.path.abspath(path), self.logs_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            run["segments"].pop(relpath, None)
+            return None
+
+        info = run["segments"].setdefault(relpath, {"compressed": path.endswith(".gz")})
+        info["bytes"] = stat.st_size
+        info["live"] = live
+        info["closed_at"] = None if live else info.get("closed_at") or stat.st_mtime
+        run["updated_at"] = max(run["updated_at"], stat.st_mtime)
+        return relpath
+
+    def _load_index(self):
+        """Load the saved index and add any run directories it does not know about"""
+        index_path = os.path.join(self.logs_path, INDEX_FILE_NAME)
+        try:
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    self.runs = json.load(f).get("runs", {})
+                logger.info(f"Loaded log index with {len(self.runs)} run(s)")
+        except Exception as e:
+            logger.error(f"Failed to load log index, rebuilding: {e}")
+            self.runs = {}
+        self._index_unknown_dirs()
+
+        # Nothing from a previous process is still being written by us; pick up
+        # what runs that were live then wrote after the index was last saved
+        for run in self.runs.values():
+            if run["active"]:
+                for rel_dir in run["dirs"]:
+                    for path in self._walk_files(os.path.join(self.logs_path, rel_dir)):
+                        self._record_segment(run, path, live=False)
+            run["active"] = False
+            for info in run["segments"].values():
+                if info["live"]:
+                    info["live"] = False
+                    info["closed_at"] = info.get("closed_at") or run["updated_at"]
+        if self.compress:
+            self._compress_queue.extend((test_id, relpath) for test_id, run in self.runs.items()
+                                        for relpath, info in run["segments"].items() if not info["compressed"])
+
+    def _index_unknown_dirs(self):
+        """Add run directories missing from the index (no index yet, or saved before a crash)"""
+        known = {rel_dir for run in self.runs.values() for rel_dir in run["dirs"]}
+        added = 0
+        for entry in os.scandir(self.logs_path):
+            test_id = test_id_for_dir(entry.name)
+            if entry.name in known or not entry.is_dir() or not test_id:
+                continue
+            added += 1
+            if test_id not in self.runs:
+                self.runs[test_id] = dict(self._new_run(), updated_at=0)
+            run = self.runs[test_id]
+            run["dirs"].append(entry.name)
+            for path in self._walk_files(entry.path):
+                self._record_segment(run, path, live=False)
+        if added:
+            logger.info(f"Indexed {added} run directory(s) under {self.logs_path}")
+
+    def _walk_files(self, directory: str) -> List[str]:
+        """Files below a run directory"""
+        files = []
+        for root, _, names in os.walk(directory):
+            files.extend(os.path.join(root, name) for name in names if not name.endswith(".tmp"))
+        return files
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Index document for the persister"""
+        with self.condition:
+            return {"runs": json.loads(json.dumps(self.runs))}
+
+    def _lifecycle_loop(self):
+        """Compress queued segments as they arrive and sweep on an interval"""
+        next_sweep = time.monotonic()
+        while True:
+            with self.condition:
+                while not self._stopped and not self._compress_queue and not self._sweep_requested:
+                    remaining = next_sweep - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self._stopped:
+                    return
+                item = self._compress_queue.popleft() if self._compress_queue else None
+                sweep = self._sweep_requested or time.monotonic() >= next_sweep
+
+            try:
+                if item:
+                    self._compress_segment(*item)
+                elif sweep:
+                    with self.condition:
+                        self._sweep_requested = False
+                    self._sweep()
+                    next_sweep = time.monotonic() + self.sweep_interval
+            except Exception as e:
+                logger.error(f"Log lifecycle error: {e}")
+
+    def _sweep(self):
+        """Refresh active runs, rotate oversized live files, queue compression and enforce caps"""
+        with self.condition:
+            active = {test_id: (list(run["dirs"]), set(run["owned"]))
+                      for test_id, run in self.runs.items() if run["active"]}
+            finished = [test_id for test_id, run in self.runs.items()
+                        if not run["active"] and any(info["live"] or not info["compressed"]
+                                                     for info in run["segments"].values())]
+
+        for test_id, (dirs, owned) in active.items():
+            paths = [path for rel_dir in dirs for path in self._walk_files(os.path.join(self.logs_path, rel_dir))]
+            for path in paths:
+                relpath = os.path.relpath(path, self.logs_path)
+                with self.condition:
+                    run = self.runs.get(test_id)
+                    known = run["segments"].get(relpath) if run else None
+                    if run is None or (known and not known["live"]):
+                        continue
+                    self._record_segment(run, path, live=True)
+                    size = run["segments"].get(relpath, {}).get("bytes", 0)
+                if relpath not in owned and self.segment_bytes and size >= self.segment_bytes:
+                    self._copy_truncate(test_id, path)
+
+        for test_id in finished:
+            with self.condition:
+                run = self.runs.get(test_id)
+                if run is None:
+                    continue
+                for relpath, info in list(run["segments"].items()):
+                    if info["live"]:
+                        self._record_segment(run, os.path.join(self.logs_path, relpath), live=False)
+                if self.compress:
+                    self._compress_queue.extend((test_id, relpath) for relpath, info in run["segments"].items()
+                                                if not info["compressed"])
+
+        self._enforce_limits()
+        self.persister.mark_dirty()
+
+    def _copy_truncate(self, test_id: str, path: str):
+        """Rotate a file held open by another process: copy it out, then truncate it in place
+
+        Lines written between the copy and the truncate are lost; writers that
+        do not append (O_APPEND) leave a sparse hole at the start of the file.
+        """
+        number = 1
+        while os.path.exists(f"{path}.{number}") or os.path.exists(f"{path}.{number}.gz"):
+            number += 1
+        segment_path = f"{path}.{number}"
+
+        with open(path, 'rb') as source, open(segment_path, 'wb') as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+        os.truncate(path, 0)
+        logger.info(f"Rotated {path} to {segment_path}")
+        self.add_segment(test_id, segment_path)
+
+    def _compress_segment(self, test_id: str, relpath: str):
+        """Gzip a closed segment next to itself and swap it in the index"""
+        path = os.path.join(self.logs_path, relpath)
+        with self.condition:
+            run = self.runs.get(test_id)
+            info = run and run["segments"].get(relpath)
+            if not info or info["compressed"] or info["live"]:
+                return
+
+        gz_path = f"{path}.gz"
+        try:
+            with open(path, 'rb') as source, gzip.open(f"{gz_path}.tmp", 'wb', self.compress_level) as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            os.replace(f"{gz_path}.tmp", gz_path)
+            os.unlink(path)
+        except FileNotFoundError:
+            with self.condition:
+                run["segments"].pop(relpath, None)
+            return
+
+        with self.condition:
+            if run["segments"].pop(relpath, None) is None:
+                # Pruned while compressing
+                self._remove_file(gz_path)
+                return
+            # Compressing is not activity: keep the run's age and the segment's place in line
+            updated_at = run["updated_at"]
+            self._record_segment(run, gz_path, live=False)
+            run["segments"][os.path.relpath(gz_path, self.logs_path)]["closed_at"] = info["closed_at"]
+            run["updated_at"] = updated_at
+        self.persister.mark_dirty()
+
+    def _enforce_limits(self):
+        """Apply age, per-run and global caps using the indexed sizes"""
+        now = time.time()
+        with self.condition:
+            # Age: whole finished runs, and closed segments of active ones
+            for test_id, run in list(self.runs.items()):
+                if not run["active"] and now - run["updated_at"] > self.max_age_seconds:
+                    self._remove_run(test_id, "expired")
+                    continue
+                for relpath, info in list(run["segments"].items()):
+                    if not info["live"] and info["closed_at"] and now - info["closed_at"] > self.max_age_seconds:
+                        self._remove_segment(run, relpath)
+
+            # Per run: oldest closed segments first
+            for test_id, run in self.runs.items():
+                if self._run_bytes(run) > self.max_run_bytes:
+                    for relpath in self._closed_segments(run):
+                        if self._run_bytes(run) <= self.max_run_bytes:
+                            break
+                        self._remove_segment(run, relpath)
+                    logger.info(f"Trimmed logs of {test_id} to {self._run_bytes(run)} bytes")
+
+            # Global: oldest finished runs, then oldest closed segments of active runs
+            total = sum(self._run_bytes(run) for run in self.runs.values())
+            if total <= self.max_total_bytes:
+                return
+
+            finished = sorted((run["updated_at"], test_id) for test_id, run in self.runs.items() if not run["active"])
+            for _, test_id in finished:
+                if total <= self.max_total_bytes:
+                    return
+                total -= self._run_bytes(self.runs[test_id])
+                self._remove_run(test_id, "over the total log size cap")
+
+            segments = sorted((info["closed_at"], test_id, relpath)
+                              for test_id, run in self.runs.items()
+                              for relpath, info in run["segments"].items() if not info["live"])
+            for _, test_id, relpath in segments:
+                if total <= self.max_total_bytes:
+                    return
+                total -= self.runs[test_id]["segments"][relpath]["bytes"]
+                self._remove_segment(self.runs[test_id], relpath)
+
+    def _closed_segments(self, run: Dict[str, Any]) -> List[str]:
+        """A run's rotated/finished segments, oldest first"""
+        return sorted((relpath for relpath, info in run["segments"].items() if not info["live"]),
+                      key=lambda relpath: run["segments"][relpath]["closed_at"] or 0)
+
+    def _remove_segment(self, run: Dict[str, Any], relpath: str):
+        """Delete a segment file and drop it from the index (lock held)"""
+        self._remove_file(os.path.join(self.logs_path, relpath))
+        run["segments"].pop(relpath, None)
+
+    def _remove_run(self, test_id: str, reason: str):
+        """Delete a run's directories and drop it from the index (lock held)"""
+        run = self.runs.pop(test_id)
+        for rel_dir in run["dirs"]:
+            shutil.rmtree(os.path.join(self.logs_path, rel_dir), ignore_errors=True)
+        logger.info(f"Removed logs of {test_id} ({reason})")
+
+    def _remove_file(self, path: str):
+        """Delete a file that may already be gone"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
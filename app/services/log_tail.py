@@ -0,0 +1,282 @@
+import os
+import selectors
+import subprocess
+import threading
+import time
+import logging
+from collections import deque, OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longest line kept in a tail; longer lines (and unterminated output) are split
+MAX_LINE_LENGTH = 4096
+
+class LogTail:
+    """Fixed-size ring buffer of the most recent output lines of one run"""
+
+    def __init__(self, test_id: str, max_lines: int = 1000):
+        self.test_id = test_id
+        self.condition = threading.Condition()
+        self.lines = deque(maxlen=max_lines)  # (seq, stream, timestamp, line)
+        self.seq = 0
+        self.finished = False
+        self.line_watches: List[Tuple[Callable[[str], bool], Callable[[float, str], None]]] = []
+
+    def append(self, stream: str, lines: List[str]):
+        """Add lines read from a stream"""
+        now = time.time()
+        matched = []
+        with self.condition:
+            for line in lines:
+                self.seq += 1
+                self.lines.append((self.seq, stream, now, line))
+                matched.extend(self._match_watches(now, line))
+            self.condition.notify_all()
+
+        for callback, timestamp, line in matched:
+            callback(timestamp, line)
+
+    def on_line(self, prefix: str, callback: Callable[[float, str], None]):
+        """Invoke callback(timestamp, line) once for the first line starting with `prefix`"""
+        self.on_match(lambda line: line.startswith(prefix), callback)
+
+    def on_match(self, predicate: Callable[[str], bool], callback: Callable[[float, str], None]):
+        """Invoke callback(timestamp, line) once for the first line `predicate` accepts
+
+        Lines already in the buffer count; later ones are matched on the pump thread.
+        """
+        with self.condition:
+            for _, _, timestamp, line in self.lines:
+                if predicate(line):
+                    break
+            else:
+                self.line_watches.append((predicate, callback))
+                return
+        callback(timestamp, line)
+
+    def _match_watches(self, timestamp: float, line: str) -> List[Tuple[Callable, float, str]]:
+        """Remove and return the watches a new line satisfies (condition must be held)"""
+        if not self.line_watches:
+            return []
+        matched = [(callback, timestamp, line) for predicate, callback in self.line_watches if predicate(line)]
+        if matched:
+            self.line_watches = [watch for watch in self.line_watches if not watch[0](line)]
+        return matched
+
+    def finish(self):
+        """Mark the run's output as complete"""
+        with self.condition:
+            self.finished = True
+            self.line_watches = []
+            self.condition.notify_all()
+
+    def read(self, since_seq: int = 0, limit: int = None, stream: str = None) -> Dict[str, Any]:
+        """Get lines after `since_seq` (the newest `limit` of them) and how many were lost"""
+        with self.condition:
+            entries = [entry for entry in self.lines
+                       if entry[0] > since_seq and (stream is None or entry[1] == stream)]
+            oldest_seq = self.lines[0][0] if self.lines else self.seq + 1
+            last_seq = self.seq
+            finished = self.finished
+
+        # Lines evicted from the buffer, or skipped by the limit, before the caller saw them
+        dropped = max(0, oldest_seq - since_seq - 1) if since_seq < last_seq else 0
+        if limit is not None and len(entries) > limit:
+            dropped += len(entries) - limit
+            entries = entries[-limit:]
+
+        return {
+            "test_id": self.test_id,
+            "lines": [{"seq": seq, "stream": stream_name, "timestamp": timestamp, "line": line}
+                      for seq, stream_name, timestamp, line in entries],
+            "last_seq": last_seq,
+            "dropped": dropped,
+            "finished": finished
+        }
+
+    def wait_for_line(self, prefix: str, since_seq: int, timeout: float) -> bool:
+        """Block until a line starting with `prefix` arrives after `since_seq`"""
+        deadline = time.time() + timeout
+
+        def found():
+            return any(seq > since_seq and line.startswith(prefix) for seq, _, _, line in self.lines)
+
+        with self.condition:
+            while not found():
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.finished:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+class _PipeState:
+    """Read-side state of one process output pipe"""
+
+    def __init__(self, tail: LogTail, stream: str, path: str, log_file):
+        self.tail = tail
+        self.stream = stream
+        self.path = path
+        self.log_file = log_file
+        self.partial = b""
+        self.unflushed_since = None
+        self.segment_written = 0
+        self.segments = 0
+
+class LogPump:
+    """Reads the output pipes of many processes on one selector thread
+
+    Each pipe is drained without blocking into its run's LogTail and into a
+    large write buffer on disk, flushed every `flush_interval` seconds, so
+    neither nb5 nor readers of the log files ever wait on each other.
+    Files reaching `segment_bytes` are rotated to <file>.<n> and reported to
+    `on_segment(test_id, path)`; `on_finished(test_id)` follows the last EOF.
+    """
+
+    def __init__(self, tail_lines: int = 1000, flush_interval: float = 2.0,
+                 write_buffer_bytes: int = 1 << 20, max_finished_tails: int = 20,
+                 segment_bytes: int = 0, on_segment: Callable[[str, str], None] = None,
+                 on_finished: Callable[[str], None] = None):
+        self.tail_lines = tail_lines
+        self.flush_interval = flush_interval
+        self.write_buffer_bytes = write_buffer_bytes
+        self.max_finished_tails = max_finished_tails
+        self.segment_bytes = segment_bytes
+        self.on_segment = on_segment
+        self.on_finished = on_finished
+
+        self.lock = threading.Lock()
+        self.tails: "OrderedDict[str, LogTail]" = OrderedDict()
+        self._open_pipes: Dict[str, int] = {}  # {test_id: pipes not yet at EOF}
+        self._selector = selectors.DefaultSelector()
+        self._pending: List[tuple] = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._pump_loop, daemon=True)
+        self._thread.start()
+
+    def attach(self, test_id: str, process: subprocess.Popen, stdout_path: str, stderr_path: str) -> LogTail:
+        """Start capturing a process started with stdout/stderr=PIPE"""
+        tail = LogTail(test_id, self.tail_lines)
+        pipes = [(process.stdout, "stdout", stdout_path), (process.stderr, "stderr", stderr_path)]
+
+        with self.lock:
+            self.tails[test_id] = tail
+            self._open_pipes[test_id] = len(pipes)
+            for pipe, stream, path in pipes:
+                os.set_blocking(pipe.fileno(), False)
+                log_file = open(path, 'wb', buffering=self.write_buffer_bytes)
+                self._pending.append((pipe, _PipeState(tail, stream, path, log_file)))
+        os.write(self._wakeup_w, b'\0')
+
+        return tail
+
+    def get_tail(self, test_id: str) -> Optional[LogTail]:
+        """Get the tail of a running or recently finished run"""
+        with self.lock:
+            return self.tails.get(test_id)
+
+    def _pump_loop(self):
+        """Dispatch readable pipes and flush disk buffers on schedule"""
+        while True:
+            try:
+                for key, _ in self._selector.select(timeout=self.flush_interval):
+                    if key.data is None:
+                        self._register_pending()
+                    else:
+                        self._read_pipe(key.fileobj, key.data)
+                self._flush_due()
+            except Exception as e:
+                logger.error(f"Log pump error: {e}")
+
+    def _register_pending(self):
+        """Drain the wakeup pipe and start watching newly attached pipes"""
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self.lock:
+            pending, self._pending = self._pending, []
+        for pipe, state in pending:
+            self._selector.register(pipe, selectors.EVENT_READ, state)
+
+    def _read_pipe(self, pipe, state: _PipeState):
+        """Read what is available from a pipe into the tail and the log file"""
+        try:
+            data = os.read(pipe.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.warning(f"Failed to read {state.stream} of {state.tail.test_id}: {e}")
+            data = b""
+
+        if not data:
+            self._close_pipe(pipe, state)
+            return
+
+        state.log_file.write(data)
+        state.segment_written += len(data)
+        if state.unflushed_since is None:
+            state.unflushed_since = time.monotonic()
+        if self.segment_bytes and state.segment_written >= self.segment_bytes:
+            self._rotate(state)
+
+        chunks = (state.partial + data).split(b"\n")
+        state.partial = chunks.pop()
+        if len(state.partial) > MAX_LINE_LENGTH:
+            chunks.append(state.partial)
+            state.partial = b""
+
+        lines = []
+        for chunk in chunks:
+            line = chunk.decode('utf-8', errors='replace').rstrip("\r")
+            lines.extend(line[i:i + MAX_LINE_LENGTH] for i in range(0, max(len(line), 1), MAX_LINE_LENGTH))
+        state.tail.append(state.stream, lines)
+
+    def _close_pipe(self, pipe, state: _PipeState):
+        """Handle EOF: flush the last partial line and close the log file"""
+        self._selector.unregister(pipe)
+        pipe.close()
+        if state.partial:
+            state.tail.append(state.stream, [state.partial.decode('utf-8', errors='replace')])
+            state.partial = b""
+        state.log_file.close()
+
+        test_id = state.tail.test_id
+        with self.lock:
+            self._open_pipes[test_id] -= 1
+            if self._open_pipes[test_id] > 0:
+                return
+            del self._open_pipes[test_id]
+            self.tails.move_to_end(test_id)
+            finished = [tid for tid in self.tails if tid not in self._open_pipes]
+            for tid in finished[:max(0, len(finished) - self.max_finished_tails)]:
+                del self.tails[tid]
+        state.tail.finish()
+        if self.on_finished:
+            self.on_finished(test_id)
+
+    def _rotate(self, state: _PipeState):
+        """Close the current segment of a log file, hand it off and start a new one"""
+        state.log_file.close()
+        state.segments += 1
+        segment_path = f"{state.path}.{state.segments}"
+        os.replace(state.path, segment_path)
+        state.log_file = open(state.path, 'wb', buffering=self.write_buffer_bytes)
+        state.segment_written = 0
+        state.unflushed_since = None
+        if self.on_segment:
+            self.on_segment(state.tail.test_id, segment_path)
+
+    def _flush_due(self):
+        """Flush log files whose oldest unflushed write is older than the flush interval"""
+        now = time.monotonic()
+        for key in list(self._selector.get_map().values()):
+            state = key.data
+            if state is not None and state.unflushed_since is not None and \
+                    now - state.unflushed_since >= self.flush_interval:
+                state.log_file.flush()
+                state.unflushed_since = None
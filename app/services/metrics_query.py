@@ -0,0 +1,158 @@
+import math
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Series per run, as pushed by nb5 with --add-labels=...,instance:<test_id>[,group:<group id>]
+# ({sel} is the run's label selector, {step} the downsampling step)
+SERIES_QUERIES = {
+    "ops_per_second": 'sum(avg_over_time(result_success_1mRate{{{sel}}}[{step}s]))',
+    "p50": 'max(max_over_time(result_success_bucket{{{sel},le="0.5"}}[{step}s]))',
+    "p99": 'max(max_over_time(result_success_bucket{{{sel},le="0.99"}}[{step}s]))',
+    "p999": 'max(max_over_time(result_success_bucket{{{sel},le="0.999"}}[{step}s]))',
+    "errors": 'sum(max_over_time({{__name__=~"errors_.*",__name__!="errors_total",{sel}}}[{step}s]))'
+}
+
+class MetricsQueryError(Exception):
+    """Raised when VictoriaMetrics cannot answer a query"""
+
+class MetricsQuery:
+    """Per-run throughput/latency/error series from VictoriaMetrics, cached per window
+
+    All series of a run are fetched in one query_range call (MetricsQL
+    union), downsampled server-side to at most `max_points` steps. Window
+    ends are aligned to the step, so every viewer asking within the same
+    step shares one cache entry, and concurrent misses for the same window
+    wait on a single in-flight query. Entries expire after `live_ttl` for
+    running tests and `finished_ttl` for finished ones; the least recently
+    used are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, base_url: str, max_points: int = 300, min_step_seconds: int = 10,
+                 live_ttl: float = 10.0, finished_ttl: float = 3600.0, max_entries: int = 256,
+                 timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.max_points = max_points
+        self.min_step_seconds = min_step_seconds
+        self.live_ttl = live_ttl
+        self.finished_ttl = finished_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, threading.Event] = {}
+        self.session = requests.Session()
+        self.stats = {"hits": 0, "misses": 0, "queries": 0, "errors": 0}
+
+    def get_run_metrics(self, test_id: str, start: float, end: float, live: bool = False) -> Dict[str, Any]:
+        """Get a run's series between `start` and `end` (epoch seconds)"""
+        step = self._step_for(end - start)
+        aligned_end = math.ceil(end / step) * step
+        aligned_start = max(0, math.floor(start / step) * step)
+        key = (test_id, aligned_start, aligned_end, step)
+
+        while True:
+            with self.lock:
+                cached = self._cache.get(key)
+                if cached and cached[0] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return cached[1]
+
+                in_flight = self._in_flight.get(key)
+                if in_flight is None:
+                    self._in_flight[key] = threading.Event()
+                    self.stats["misses"] += 1
+                    break
+
+            # Another viewer is fetching this window; use its result
+            in_flight.wait(self.timeout)
+
+        try:
+            result = self._query(test_id, aligned_start, aligned_end, step)
+            with self.lock:
+                ttl = self.live_ttl if live else self.finished_ttl
+                self._cache[key] = (time.monotonic() + ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            return result
+        finally:
+            with self.lock:
+                self._in_flight.pop(key).set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache and query counters"""
+        with self.lock:
+            return dict(self.stats, entries=len(self._cache))
+
+    def _step_for(self, duration: float) -> int:
+        """Downsampling step that keeps a window within max_points"""
+        return max(self.min_step_seconds, int(math.ceil(duration / self.max_points)))
+
+    def _query(self, test_id: str, start: int, end: int, step: int) -> Dict[str, Any]:
+        """Fetch all series of a run in one query_range call"""
+        # A shard group's id also selects its shards' series (instance <group id>-s<n>)
+        pattern = re.escape(test_id) + "(-s[0-9]+)?"
+        escaped = pattern.replace("\\", "\\\\").replace('"', '\\"')
+        selector = f'instance=~"{escaped}"'
+        query = "union(" + ",".join(
+            f'label_set({expr.format(sel=selector, step=step)},"series","{name}")'
+            for name, expr in SERIES_QUERIES.items()
+        ) + ")"
+
+        with self.lock:
+            self.stats["queries"] += 1
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/v1/query_range",
+                params={"query": query, "start": start, "end": end, "step": f"{step}s"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            raise MetricsQueryError(f"VictoriaMetrics query failed: {e}")
+
+        if body.get("status") != "success":
+            with self.lock:
+                self.stats["errors"] += 1
+            raise MetricsQueryError(f"VictoriaMetrics query failed: {body.get('error', 'unknown error')}")
+
+        return self._compact(test_id, start, end, step, body["data"]["result"])
+
+    def _compact(self, test_id: str, start: int, end: int, step: int,
+                 results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Lay the series out on one shared timestamp axis, null where a series has no point"""
+        timestamps = list(range(start, end + 1, step))
+        index = {timestamp: i for i, timestamp in enumerate(timestamps)}
+        series: Dict[str, List[Optional[float]]] = {name: [None] * len(timestamps) for name in SERIES_QUERIES}
+
+        for result in results:
+            name = result["metric"].get("series")
+            if name not in series:
+                continue
+            for timestamp, value in result.get("values", []):
+                i = index.get(int(timestamp))
+                if i is not None:
+                    number = float(value)
+                    series[name][i] = None if math.isnan(number) else number
+
+        return {
+            "test_id": test_id,
+            "start": start,
+            "end": end,
+            "step": step,
+            "timestamps": timestamps,
+            "series": series
+        }
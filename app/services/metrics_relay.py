@@ -0,0 +1,242 @@
+import gzip
+import re
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)(?:\s+(-?\d+))?\s*$')
+LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+# Headline values per group/instance, named like the metrics query series
+SUMMARY_SERIES = {
+    "ops_per_second": ("result_success_1mRate", None),
+    "p50": ("result_success_bucket", "0.5"),
+    "p99": ("result_success_bucket", "0.99"),
+    "p999": ("result_success_bucket", "0.999")
+}
+
+# Labels naming one benchmark start, dropped from the per-workload aggregates
+PER_RUN_LABELS = ("group",)
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def parse_prometheus_text(text: str) -> List[Tuple[str, Dict[str, str], float]]:
+    """Parse Prometheus text exposition into (name, labels, value) samples"""
+    samples = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        if not match:
+            continue
+        name, labels_text, value, _ = match.groups()
+        try:
+            number = float(value)
+        except ValueError:
+            continue
+        labels = {key: raw.replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")
+                  for key, raw in LABEL_PATTERN.findall(labels_text or "")}
+        samples.append((name, labels, number))
+    return samples
+
+def aggregate_function(name: str) -> Callable[[List[float]], float]:
+    """How a metric combines across instances: rates and counts add up, the rest keep the worst"""
+    if name.endswith(("Rate", "_total", "_count", "_sum")) or name.startswith("errors_"):
+        return sum
+    if name.endswith("_min"):
+        return min
+    return max
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Render labels for the text exposition format"""
+    escaped = (key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+class MetricsRelay:
+    """Receives nb5 Prometheus pushes and forwards per-group aggregates to VictoriaMetrics
+
+    nb5 pushes its full metric set per process. The relay keeps only the
+    latest value of every series per instance (test id), and every
+    `forward_interval` seconds sends one gzipped import to VictoriaMetrics
+    with the series combined across the instances of each group (workload),
+    labelled instance=<group>. Groups outlive restarts and shards, so VM
+    sees a stable set of series; per-instance series are forwarded only with
+    `forward_instances`. Instances that stop pushing for `instance_ttl`
+    seconds drop out. The latest values are readable without a VM round trip.
+    """
+
+    def __init__(self, forward_url: str, group_for_instance: Callable[[str], str] = None,
+                 forward_interval: float = 10.0, instance_ttl: float = 30.0,
+                 forward_instances: bool = False, timeout: float = 10.0):
+        self.import_url = f"{forward_url.rstrip('/')}/api/v1/import/prometheus"
+        self.group_for_instance = group_for_instance or (lambda instance: instance)
+        self.forward_interval = forward_interval
+        self.instance_ttl = instance_ttl
+        self.forward_instances = forward_instances
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        # {instance: {"group": str, "received_at": float, "series": {SeriesKey: value}}}
+        self.instances: Dict[str, Dict[str, Any]] = {}
+        self.forward_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.session = requests.Session()
+        self.stats = {"pushes": 0, "samples": 0, "forwards": 0, "forward_errors": 0, "forwarded_series": 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start forwarding on an interval"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._forward_loop, daemon=True)
+            self._thread.start()
+            logger.info(f"Metrics relay forwarding to {self.import_url} every {self.forward_interval}s")
+
+    def stop(self):
+        """Stop forwarding after a final batch"""
+        self._stop_event.set()
+        self.forward()
+
+    def add_forward_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback receiving the live summary after each forward"""
+        self.forward_listeners.append(listener)
+
+    def ingest(self, text: str, extra_labels: Dict[str, str] = None) -> int:
+        """Take a push; `extra_labels` (job/instance from the push path) override the body's"""
+        extra_labels = extra_labels or {}
+        received = {}
+        for name, labels, value in parse_prometheus_text(text):
+            labels.update(extra_labels)
+            instance = labels.pop("instance", None) or "unknown"
+            received.setdefault(instance, {})[(name, tuple(sorted(labels.items())))] = value
+
+        now = time.time()
+        with self.lock:
+            for instance, series in received.items():
+                entry = self.instances.get(instance)
+                if entry is None:
+                    entry = self.instances[instance] = {"group": self.group_for_instance(instance), "series": {}}
+                # A push carries the full set; series missing from it are gone
+                entry["series"] = series
+                entry["received_at"] = now
+            self.stats["pushes"] += 1
+            self.stats["samples"] += sum(len(series) for series in received.values())
+        return sum(len(series) for series in received.values())
+
+    def get_live(self, group: str = None) -> Dict[str, Any]:
+        """Get headline values per group and instance from the latest pushes"""
+        with self.lock:
+            self._expire()
+            instances = {instance: entry for instance, entry in self.instances.items()
+                         if group is None or entry["group"] == group}
+            groups: Dict[str, Dict[str, Any]] = {}
+            for instance, entry in instances.items():
+                groups.setdefault(entry["group"], {"instances": []})["instances"].append(instance)
+
+            result = {
+                "groups": {
+                    name: dict(info, summary=self._summarize(self._aggregate(info["instances"])))
+                    for name, info in groups.items()
+                },
+                "instances": {
+                    instance: {
+                        "group": entry["group"],
+                        "received_at": entry["received_at"],
+                        "summary": self._summarize(entry["series"])
+                    }
+                    for instance, entry in instances.items()
+                }
+            }
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get push and forward counters"""
+        with self.lock:
+            return dict(self.stats, instances=len(self.instances))
+
+    def forward(self) -> bool:
+        """Send the current aggregates (and instances, if enabled) to VictoriaMetrics"""
+        timestamp_ms = int(time.time() * 1000)
+        lines = []
+        with self.lock:
+            self._expire()
+            groups: Dict[str, List[str]] = {}
+            for instance, entry in self.instances.items():
+                groups.setdefault(entry["group"], []).append(instance)
+
+            for group, instances in groups.items():
+                for (name, labels), value in self._aggregate(instances).items():
+                    lines.append(f"{name}{_format_labels(labels + (('instance', group),))} {value} {timestamp_ms}")
+                lines.append(f'relay_instances{{job="nosqlbench",instance="{group}"}} {len(instances)} {timestamp_ms}')
+
+            if self.forward_instances:
+                for instance, entry in self.instances.items():
+                    for (name, labels), value in entry["series"].items():
+                        lines.append(f"{name}{_format_labels(labels + (('instance', instance),))} "
+                                     f"{value} {int(entry['received_at'] * 1000)}")
+
+        if not lines:
+            return True
+
+        try:
+            response = self.session.post(
+                self.import_url,
+                data=gzip.compress(("\n".join(lines) + "\n").encode("utf-8")),
+                headers={"Content-Encoding": "gzip", "Content-Type": "text/plain"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            with self.lock:
+                self.stats["forwards"] += 1
+                self.stats["forwarded_series"] += len(lines)
+            return True
+        except requests.RequestException as e:
+            with self.lock:
+                self.stats["forward_errors"] += 1
+            logger.warning(f"Failed to forward {len(lines)} series to VictoriaMetrics: {e}")
+            return False
+
+    def _forward_loop(self):
+        """Forward every interval and hand the live summary to listeners"""
+        while not self._stop_event.wait(self.forward_interval):
+            try:
+                self.forward()
+                if self.forward_listeners:
+                    live = self.get_live()
+                    for listener in self.forward_listeners:
+                        listener(live)
+            except Exception as e:
+                logger.error(f"Metrics relay error: {e}")
+
+    def _expire(self):
+        """Drop instances that stopped pushing (lock held)"""
+        cutoff = time.time() - self.instance_ttl
+        for instance in [instance for instance, entry in self.instances.items() if entry["received_at"] < cutoff]:
+            del self.instances[instance]
+
+    def _aggregate(self, instances: List[str]) -> Dict[SeriesKey, float]:
+        """Combine the series of several instances by name and labels other than per-run ones (lock held)"""
+        values: Dict[SeriesKey, List[float]] = {}
+        for instance in instances:
+            for (name, labels), value in self.instances[instance]["series"].items():
+                key = (name, tuple(label for label in labels if label[0] not in PER_RUN_LABELS))
+                values.setdefault(key, []).append(value)
+        return {key: aggregate_function(key[0])(samples) for key, samples in values.items()}
+
+    def _summarize(self, series: Dict[SeriesKey, float]) -> Dict[str, Optional[float]]:
+        """Headline values (throughput, latency quantiles, errors) of a series set"""
+        summary: Dict[str, Optional[float]] = {}
+        for summary_name, (metric, quantile) in SUMMARY_SERIES.items():
+            values = [value for (name, labels), value in series.items()
+                      if name == metric and (quantile is None or dict(labels).get("le") == quantile)]
+            summary[summary_name] = aggregate_function(metric)(values) if values else None
+        summary["errors"] = sum(value for (name, _), value in series.items()
+                                if name.startswith("errors_") and name != "errors_total")
+        return summary
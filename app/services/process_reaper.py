@@ -0,0 +1,98 @@
+import os
+import selectors
+import subprocess
+import threading
+import logging
+from typing import List, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+class ProcessReaper:
+    """Delivers exit notifications for child processes without polling
+
+    Uses pidfds multiplexed on a selector where the platform supports them
+    (Linux 5.3+), otherwise a blocking waiter thread per process. Processes
+    that are not our children (e.g. nb5 in a container) always get a waiter
+    thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._pending: List[Tuple[subprocess.Popen, Callable]] = []
+        self._selector = None
+        self._thread = None
+        self._wakeup_r = None
+        self._wakeup_w = None
+
+    def watch(self, process: subprocess.Popen, callback: Callable[[subprocess.Popen], None]):
+        """Invoke callback(process) once the process has exited and been reaped"""
+        if hasattr(os, 'pidfd_open') and isinstance(process, subprocess.Popen):
+            with self.lock:
+                self._ensure_selector_thread()
+                self._pending.append((process, callback))
+            os.write(self._wakeup_w, b'\0')
+        else:
+            threading.Thread(target=self._wait_and_notify, args=(process, callback), daemon=True).start()
+
+    def _ensure_selector_thread(self):
+        """Start the selector thread on first use"""
+        if self._thread is None:
+            self._selector = selectors.DefaultSelector()
+            self._wakeup_r, self._wakeup_w = os.pipe()
+            os.set_blocking(self._wakeup_r, False)
+            self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+            self._thread = threading.Thread(target=self._selector_loop, daemon=True)
+            self._thread.start()
+            logger.info("Process reaper thread started")
+
+    def _selector_loop(self):
+        """Wait on pidfds and the wakeup pipe, dispatching exits as they happen"""
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    self._register_pending()
+                    continue
+
+                process, callback = key.data
+                self._selector.unregister(key.fileobj)
+                os.close(key.fileobj)
+                self._notify(process, callback)
+
+    def _register_pending(self):
+        """Drain the wakeup pipe and open pidfds for newly watched processes"""
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self.lock:
+            pending, self._pending = self._pending, []
+
+        for process, callback in pending:
+            if process.returncode is not None:
+                # Already reaped by a concurrent wait(); the PID may have been reused
+                self._notify(process, callback)
+                continue
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except ProcessLookupError:
+                self._notify(process, callback)
+                continue
+            except OSError as e:
+                logger.warning(f"pidfd_open failed for PID {process.pid} ({e}), using a waiter thread")
+                threading.Thread(target=self._wait_and_notify, args=(process, callback), daemon=True).start()
+                continue
+            self._selector.register(pidfd, selectors.EVENT_READ, (process, callback))
+
+    def _wait_and_notify(self, process: subprocess.Popen, callback: Callable):
+        """Block until the process exits, then notify"""
+        self._notify(process, callback)
+
+    def _notify(self, process: subprocess.Popen, callback: Callable):
+        """Reap the process and invoke its callback"""
+        try:
+            process.wait()
+            callback(process)
+        except Exception as e:
+            logger.error(f"Exit callback failed for PID {process.pid}: {e}")
@@ -0,0 +1,101 @@
+import os
+import re
+import shlex
+import logging
+from typing import Dict, List, Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Scenario script (shipped next to the workload files) that runs the activity
+# and applies cyclerate changes from a control file without restarting nb5
+RATE_CONTROL_SCRIPT = "rate_control.js"
+CONTROL_FILE_NAME = "cyclerate.ctl"
+ACK_PREFIX = "RATE_CONTROL"
+
+TEMPLATE_PATTERN = re.compile(r"TEMPLATE\((\w+)(?:,([^)]*))?\)|<<(\w+)(?::([^>]*))?>>")
+
+def _resolve_templates(value: str, template_values: Dict[str, str]) -> Optional[str]:
+    """Substitute TEMPLATE(name,default) / <<name:default>> from params, or None if unresolvable"""
+    unresolved = False
+
+    def substitute(match):
+        nonlocal unresolved
+        name = match.group(1) or match.group(3)
+        default = match.group(2) if match.group(1) else match.group(4)
+        if name in template_values:
+            return template_values[name]
+        if default is None:
+            unresolved = True
+            return match.group(0)
+        return default
+
+    resolved = TEMPLATE_PATTERN.sub(substitute, value)
+    return None if unresolved else resolved
+
+def expand_scenario_step(workload_file_path: str, phase: str, params: Dict[str, str]) -> Dict[str, str]:
+    """Expand a named scenario step into activity params
+
+    `phase` is either scenario.step or a scenario name, which selects its
+    first (long-running) step. Locked step params (== / ===) win over
+    `params`; unlocked ones yield to them.
+    """
+    with open(workload_file_path, 'r') as f:
+        workload = yaml.safe_load(f)
+
+    scenario_name, _, step_name = phase.partition(".")
+    step = workload["scenarios"][scenario_name]
+    if isinstance(step, dict):
+        step = step[step_name] if step_name else next(iter(step.values()))
+
+    tokens = shlex.split(step)
+    if tokens and tokens[0] in ("run", "start"):
+        tokens = tokens[1:]
+
+    activity_params = dict(params)
+    for token in tokens:
+        match = re.match(r"(\w+)(={1,3})(.*)", token)
+        if not match:
+            continue
+        key, operator, value = match.groups()
+        value = _resolve_templates(value, params)
+        if value is None:
+            continue
+        if operator != "=" or key not in params:
+            activity_params[key] = value
+
+    return activity_params
+
+def build_rate_control_command(cmd: List[str], workload_file: str, phase: str, workload_file_path: str,
+                               script_path: str, control_file: str) -> List[str]:
+    """Rewrite an `nb5 <workload> <phase> params... --options` command to run the
+    phase's step under the rate control script"""
+    step_index = cmd.index(phase)
+    if step_index == 0 or cmd[step_index - 1] != workload_file:
+        raise ValueError(f"Cannot locate {workload_file} {phase} in command")
+
+    prefix = cmd[:step_index - 1]
+    params = {}
+    options = []
+    for arg in cmd[step_index + 1:]:
+        if arg.startswith("--") or "=" not in arg:
+            options.append(arg)
+        else:
+            key, value = arg.split("=", 1)
+            params[key] = value
+
+    activity_params = expand_scenario_step(workload_file_path, phase, params)
+    activity_params["workload"] = workload_file
+    activity_params["alias"] = phase.replace(".", "__")
+    activity_params["control_file"] = control_file
+
+    return (prefix + ["script", script_path] +
+            [f"{key}={value}" for key, value in activity_params.items()] + options)
+
+def write_rate_control(control_file: str, seq: int, cycle_rate: int):
+    """Atomically publish a cyclerate change for the script to pick up"""
+    tmp_file = f"{control_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        f.write(f"{seq} {cycle_rate}\n")
+    os.replace(tmp_file, control_file)
@@ -0,0 +1,379 @@
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    test_id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    workload TEXT NOT NULL,
+    phase TEXT,
+    database TEXT,
+    driver TEXT,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    exit_code INTEGER,
+    cycle_rate INTEGER,
+    log_dir TEXT,
+    results_dir TEXT,
+    summary TEXT,
+    group_id TEXT,
+    runner TEXT,
+    startup_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS runs_workload ON runs (workload, started_at);
+CREATE INDEX IF NOT EXISTS runs_database ON runs (database, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id);
+
+CREATE TABLE IF NOT EXISTS rate_changes (
+    test_id TEXT NOT NULL,
+    at REAL NOT NULL,
+    cycle_rate INTEGER NOT NULL,
+    method TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_changes_test ON rate_changes (test_id, at);
+
+CREATE TABLE IF NOT EXISTS capacity_searches (
+    search_id TEXT PRIMARY KEY,
+    workload TEXT NOT NULL,
+    database TEXT,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    capacity_rate INTEGER,
+    slo TEXT,
+    curve TEXT
+);
+CREATE INDEX IF NOT EXISTS capacity_searches_workload ON capacity_searches (workload, started_at);
+CREATE INDEX IF NOT EXISTS capacity_searches_database ON capacity_searches (database, started_at);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign_id TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    checkpoint TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS campaigns_created ON campaigns (created_at);
+"""
+
+CAPACITY_COLUMNS = ("search_id", "workload", "database", "status", "started_at", "finished_at",
+                    "capacity_rate", "slo", "curve")
+
+RUN_COLUMNS = ("test_id", "run_id", "workload", "phase", "database", "driver", "status", "started_at",
+               "ended_at", "exit_code", "cycle_rate", "log_dir", "results_dir", "summary", "group_id",
+               "runner", "startup_seconds")
+
+# Columns added to runs after its first release, with their definitions
+RUN_MIGRATIONS = {"group_id": "TEXT", "runner": "TEXT", "startup_seconds": "REAL"}
+
+class RunCatalog:
+    """SQLite catalog of benchmark runs, kept after their processes are gone
+
+    One row per test id (nb5 process). The shards of a benchmark share a
+    group id (the test id itself when it is not sharded). Restarts for a
+    cycle rate change get new test ids but keep the run id of the benchmark
+    they continue, and every rate applied (at start, in place or by restart)
+    is recorded with its timestamp, as is the time each process took to its
+    first operation. Summary statistics are computed by `summarize(test_id)`
+    on a background thread once a run has finished, as its result files are
+    complete only then.
+    """
+
+    def __init__(self, db_path: str, summarize: Callable[[str], Optional[Dict[str, Any]]] = None):
+        self.db_path = db_path
+        self.summarize = summarize
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(runs)")}
+        for column, definition in RUN_MIGRATIONS.items():
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {definition}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS runs_group_id ON runs (group_id)")
+
+        # Runs still open from a previous app process can no longer be tracked
+        interrupted = self.conn.execute(
+            "UPDATE runs SET status = 'interrupted' WHERE ended_at IS NULL"
+        ).rowcount
+        if interrupted:
+            logger.info(f"Marked {interrupted} runs of a previous session as interrupted")
+        self.conn.execute("UPDATE capacity_searches SET status = 'interrupted' WHERE finished_at IS NULL")
+
+        self._summary_queue: deque = deque()
+        self._condition = threading.Condition(self.lock)
+        self._stopped = False
+        self._thread = None
+        if summarize:
+            # Runs finished before a summary could be computed
+            self._summary_queue.extend(row["test_id"] for row in self.conn.execute(
+                "SELECT test_id FROM runs WHERE ended_at IS NOT NULL AND summary IS NULL"
+            ))
+            self._thread = threading.Thread(target=self._summary_loop, daemon=True)
+            self._thread.start()
+
+    def record_start(self, test_id: str, run_id: str, workload: str, phase: str, database: str,
+                     driver: str, cycle_rate: int, log_dir: str = None, results_dir: str = None,
+                     started_at: float = None, rate_method: str = "start", group_id: str = None,
+                     runner: str = None):
+        """Record a benchmark process starting, with its initial cycle rate and how it was launched"""
+        started_at = started_at or time.time()
+        with self.lock:
+            if self._stopped:
+                return
+            with self._transaction():
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO runs (test_id, run_id, workload, phase, database, driver, status, "
+                    "started_at, cycle_rate, log_dir, results_dir, group_id, runner) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 'running', ?, ?, ?, ?, ?, ?)",
+                    (test_id, run_id, workload, phase, database, driver, started_at, cycle_rate, log_dir,
+                     results_dir, group_id or test_id, runner)
+                )
+                self.conn.execute(
+                    "INSERT INTO rate_changes (test_id, at, cycle_rate, method) VALUES (?, ?, ?, ?)",
+                    (test_id, started_at, cycle_rate, rate_method)
+                )
+
+    def record_rate_change(self, test_id: str, cycle_rate: int, method: str = "live", at: float = None):
+        """Record a cycle rate applied to a running process"""
+        with self.lock:
+            if self._stopped:
+                return
+            with self._transaction():
+                self.conn.execute(
+                    "INSERT INTO rate_changes (test_id, at, cycle_rate, method) VALUES (?, ?, ?, ?)",
+                    (test_id, at or time.time(), cycle_rate, method)
+                )
+                self.conn.execute("UPDATE runs SET cycle_rate = ? WHERE test_id = ?", (cycle_rate, test_id))
+
+    def record_startup(self, test_id: str, startup_seconds: float):
+        """Record how long a benchmark process took from launch to its first operation"""
+        with self.lock:
+            if self._stopped:
+                return
+            self.conn.execute("UPDATE runs SET startup_seconds = ? WHERE test_id = ?", (startup_seconds, test_id))
+
+    def get_startup_stats(self, since: float = None) -> Dict[str, Dict[str, Any]]:
+        """Time to first operation per runner kind (docker, pool, local)"""
+        where = " AND started_at >= ?" if since is not None else ""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT runner, COUNT(*) AS runs, AVG(startup_seconds) AS mean_seconds, "
+                "MIN(startup_seconds) AS min_seconds, MAX(startup_seconds) AS max_seconds "
+                f"FROM runs WHERE startup_seconds IS NOT NULL{where} GROUP BY runner",
+                [since] if since is not None else []
+            ).fetchall()
+        return {row["runner"] or "unknown": {key: row[key] for key in ("runs", "mean_seconds", "min_seconds",
+                                                                        "max_seconds")}
+                for row in rows}
+
+    def record_finish(self, test_id: str, status: str, exit_code: int = None, ended_at: float = None):
+        """Record a benchmark process ending and queue its summary"""
+        with self.lock:
+            if self._stopped:
+                return
+            updated = self.conn.execute(
+                "UPDATE runs SET status = ?, exit_code = ?, ended_at = ? WHERE test_id = ? AND ended_at IS NULL",
+                (status, exit_code, ended_at or time.time(), test_id)
+            ).rowcount
+            if updated and self.summarize:
+                self._summary_queue.append(test_id)
+                self._condition.notify()
+
+    def get_run(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Get a catalogued run with its cycle rate history"""
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE test_id = ?", (test_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            changes = self.conn.execute(
+                "SELECT at, cycle_rate, method FROM rate_changes WHERE test_id = ? ORDER BY at", (test_id,)
+            ).fetchall()
+
+        run = self._row_to_run(row)
+        run["rate_history"] = [dict(change) for change in changes]
+        return run
+
+    def get_runs(self, test_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several catalogued runs (without rate history), in the given order"""
+        if not test_ids:
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE test_id IN ({', '.join('?' * len(test_ids))})",
+                list(test_ids)
+            ).fetchall()
+
+        runs = {row["test_id"]: self._row_to_run(row) for row in rows}
+        return [runs[test_id] for test_id in test_ids if test_id in runs]
+
+    def expand_test_ids(self, test_id: str) -> List[str]:
+        """Test ids a run id stands for: the shards of a group id, else the id itself"""
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM runs WHERE test_id = ?", (test_id,)).fetchone():
+                return [test_id]
+            rows = self.conn.execute(
+                "SELECT test_id FROM runs WHERE group_id = ? ORDER BY started_at, test_id", (test_id,)
+            ).fetchall()
+        return [row["test_id"] for row in rows] or [test_id]
+
+    def list_runs(self, workload: str = None, database: str = None, status: str = None, run_id: str = None,
+                  since: float = None, until: float = None, limit: int = 100, offset: int = 0,
+                  group_id: str = None) -> Dict[str, Any]:
+        """List runs, newest first, filtered by workload/database/status/run id/group id and start time"""
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("workload", workload), ("database", database), ("status", status),
+                              ("run_id", run_id), ("group_id", group_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("started_at < ?")
+            params.append(until)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT {', '.join(RUN_COLUMNS)} FROM runs{where} ORDER BY started_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        return {"runs": [self._row_to_run(row) for row in rows], "total": total, "limit": limit, "offset": offset}
+
+    def save_capacity_search(self, search: Dict[str, Any]):
+        """Insert or update a capacity search with its rate-vs-latency curve so far"""
+        with self.lock:
+            if self._stopped:
+                return
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO capacity_searches ({', '.join(CAPACITY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(CAPACITY_COLUMNS))})",
+                (search["search_id"], search["workload"], search.get("database"), search["status"],
+                 search["started_at"], search.get("finished_at"), search.get("capacity_rate"),
+                 json.dumps(search.get("slo")), json.dumps(search.get("curve", [])))
+            )
+
+    def get_capacity_search(self, search_id: str) -> Optional[Dict[str, Any]]:
+        """Get a persisted capacity search"""
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(CAPACITY_COLUMNS)} FROM capacity_searches WHERE search_id = ?", (search_id,)
+            ).fetchone()
+        return self._row_to_capacity_search(row) if row else None
+
+    def list_capacity_searches(self, workload: str = None, database: str = None,
+                               limit: int = 50) -> List[Dict[str, Any]]:
+        """List persisted capacity searches, newest first"""
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("workload", workload), ("database", database)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(CAPACITY_COLUMNS)} FROM capacity_searches{where} "
+                f"ORDER BY started_at DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [self._row_to_capacity_search(row) for row in rows]
+
+    def save_campaign(self, checkpoint: Dict[str, Any]):
+        """Insert or update a campaign checkpoint"""
+        with self.lock:
+            if self._stopped:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO campaigns (campaign_id, name, status, created_at, checkpoint) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (checkpoint["campaign_id"], checkpoint.get("name"), checkpoint["status"],
+                 checkpoint["created_at"], json.dumps(checkpoint))
+            )
+
+    def list_campaigns(self, statuses: List[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get campaign checkpoints, newest first, optionally only in the given states"""
+        where = f" WHERE status IN ({', '.join('?' * len(statuses))})" if statuses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT checkpoint FROM campaigns{where} ORDER BY created_at DESC LIMIT ?",
+                list(statuses or []) + [limit]
+            ).fetchall()
+        return [json.loads(row["checkpoint"]) for row in rows]
+
+    def stop(self):
+        """Stop the summary thread and close the database"""
+        with self.lock:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self.lock:
+            self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Group statements on the autocommit connection, rolling back if any fails (lock must be held)"""
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _row_to_run(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Turn a runs row into a dict, decoding the summary"""
+        run = dict(row)
+        run["summary"] = json.loads(run["summary"]) if run["summary"] else None
+        if run["ended_at"] is not None:
+            run["runtime_seconds"] = run["ended_at"] - run["started_at"]
+        return run
+
+    def _row_to_capacity_search(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Turn a capacity_searches row into a dict, decoding the SLO and curve"""
+        search = dict(row)
+        search["slo"] = json.loads(search["slo"]) if search["slo"] else None
+        search["curve"] = json.loads(search["curve"]) if search["curve"] else []
+        return search
+
+    def _summary_loop(self):
+        """Compute summaries of finished runs as they are queued"""
+        while True:
+            with self.lock:
+                while not self._stopped and not self._summary_queue:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                test_id = self._summary_queue.popleft()
+
+            try:
+                summary = self.summarize(test_id) or {}
+            except Exception as e:
+                logger.warning(f"Failed to summarize run {test_id}: {e}")
+                summary = {"error": str(e)}
+
+            with self.lock:
+                if self._stopped:
+                    return
+                self.conn.execute("UPDATE runs SET summary = ? WHERE test_id = ?", (json.dumps(summary), test_id))
@@ -0,0 +1,288 @@
+import math
+import logging
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+from .hdr_analysis import HistogramSet, IntervalHistogram
+from .metrics_query import MetricsQuery
+
+logger = logging.getLogger(__name__)
+
+# Compared metrics and the direction that counts as a regression
+METRICS = {
+    "ops_per_second": "lower",
+    "p50": "higher",
+    "p99": "higher",
+    "p999": "higher"
+}
+METRIC_PERCENTILES = {"p50": 50.0, "p99": 99.0, "p999": 99.9}
+
+def _interval_percentile(interval: IntervalHistogram, percentile: float) -> float:
+    """Percentile of one interval histogram (HdrHistogram's rounding rules), NaN if empty"""
+    total = int(interval.counts.sum())
+    if total == 0:
+        return float("nan")
+    rank = max(math.floor(percentile / 100.0 * total + 0.5), 1)
+    cumulative = np.cumsum(interval.counts)
+    position = min(int(np.searchsorted(cumulative, rank, side="left")), interval.values.size - 1)
+    return float(interval.values[position])
+
+def _merge_shard_intervals(intervals: List[IntervalHistogram]) -> List[IntervalHistogram]:
+    """Merge concurrent shards' intervals into one per reporting period, in time order
+
+    Shards start within a fraction of an interval of each other, so intervals
+    are binned by their offset from the earliest start in units of the
+    typical interval length.
+    """
+    if not intervals:
+        return []
+    first_start = min(interval.start for interval in intervals)
+    period = float(np.median([interval.length for interval in intervals])) or 1.0
+    bins: Dict[int, List[IntervalHistogram]] = {}
+    for interval in intervals:
+        bins.setdefault(int(round((interval.start - first_start) / period)), []).append(interval)
+
+    merged = []
+    for index in sorted(bins):
+        members = bins[index]
+        values, counts = HistogramSet(members).merge()
+        merged.append(IntervalHistogram(
+            tag=members[0].tag,
+            start=min(member.start for member in members),
+            length=float(np.mean([member.length for member in members])),
+            values=values,
+            counts=counts
+        ))
+    return merged
+
+def mann_whitney_u(baseline: np.ndarray, candidate: np.ndarray) -> float:
+    """Two-sided Mann-Whitney U p-value (normal approximation with tie and continuity correction)"""
+    n1, n2 = baseline.size, candidate.size
+    combined = np.concatenate([baseline, candidate])
+    n = combined.size
+
+    # Average ranks of tied values
+    unique_values, inverse, tie_counts = np.unique(combined, return_inverse=True, return_counts=True)
+    upper_ranks = np.cumsum(tie_counts)
+    ranks = (upper_ranks - (tie_counts - 1) / 2.0)[inverse]
+
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2.0
+    mean = n1 * n2 / 2.0
+    tie_term = float(np.sum(tie_counts ** 3 - tie_counts)) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / sigma
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+def bootstrap_relative_delta(baseline: np.ndarray, candidate: np.ndarray, confidence: float,
+                             resamples: int, rng: np.random.Generator) -> Tuple[float, float]:
+    """Confidence interval of (median(candidate) - median(baseline)) / median(baseline)"""
+    baseline_medians = np.median(baseline[rng.integers(0, baseline.size, (resamples, baseline.size))], axis=1)
+    candidate_medians = np.median(candidate[rng.integers(0, candidate.size, (resamples, candidate.size))], axis=1)
+    valid = baseline_medians != 0
+    deltas = (candidate_medians[valid] - baseline_medians[valid]) / baseline_medians[valid]
+    if deltas.size == 0:
+        return (float("nan"), float("nan"))
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    low, high = np.percentile(deltas, [tail, 100.0 - tail])
+    return (float(low), float(high))
+
+class RunComparator:
+    """Compares benchmark runs for throughput and latency regressions
+
+    Each run (a test id, or a group id standing for all its shards) is
+    reduced to per-interval samples (ops/s and latency
+    percentiles of every HDR histogram interval, or of every VictoriaMetrics
+    step when no histograms were captured). Warm-up and the trailing partial
+    interval are dropped and every run is cut to the shortest steady-state
+    window, so long runs do not outweigh short ones. A metric regresses when
+    its median moves the wrong way by at least `threshold` (relative), the
+    Mann-Whitney p-value is below `alpha` and the bootstrap confidence
+    interval of the relative delta excludes zero.
+    """
+
+    def __init__(self, results_path: str, metrics_query: MetricsQuery = None, run_catalog=None,
+                 resamples: int = 2000, min_samples: int = 5):
+        self.results_path = results_path
+        self.metrics_query = metrics_query
+        self.run_catalog = run_catalog
+        self.resamples = resamples
+        self.min_samples = min_samples
+
+    def compare(self, baseline_ids: List[str], candidate_ids: List[str], warmup_seconds: float = 60.0,
+                threshold: float = 0.05, alpha: float = 0.05, metrics: List[str] = None,
+                source: str = "auto", seed: int = 0) -> Dict[str, Any]:
+        """Compare candidate runs against baseline runs and return a verdict with a short report"""
+        metrics = metrics or list(METRICS)
+        unknown = [metric for metric in metrics if metric not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+        warnings: List[str] = []
+        if self.run_catalog is not None:
+            # A group's cycle rate is split across its shards
+            catalogued = [self.run_catalog.get_runs(self.run_catalog.expand_test_ids(test_id))
+                          for test_id in baseline_ids + candidate_ids]
+            if len({shard["workload"] for shards in catalogued for shard in shards}) > 1:
+                warnings.append("Runs belong to different workloads")
+            if len({sum(shard["cycle_rate"] or 0 for shard in shards) for shards in catalogued if shards}) > 1:
+                warnings.append("Runs ended at different cycle rates; throughput deltas may reflect the rate limit")
+        runs = {test_id: self._load_run(test_id, source, warnings) for test_id in baseline_ids + candidate_ids}
+        steady_length = self._align(runs, warmup_seconds, warnings)
+
+        rng = np.random.default_rng(seed)
+        results = {}
+        for metric in metrics:
+            baseline = self._pooled(runs, baseline_ids, metric)
+            candidate = self._pooled(runs, candidate_ids, metric)
+            results[metric] = self._compare_metric(metric, baseline, candidate, threshold, alpha, rng)
+
+        verdicts = [result["verdict"] for result in results.values()]
+        if "regression" in verdicts:
+            verdict = "fail"
+        elif all(v == "insufficient_data" for v in verdicts):
+            verdict = "inconclusive"
+        else:
+            verdict = "pass"
+
+        comparison = {
+            "verdict": verdict,
+            "baseline": baseline_ids,
+            "candidate": candidate_ids,
+            "sources": {test_id: run["source"] for test_id, run in runs.items()},
+            "steady_state_seconds": steady_length,
+            "warmup_seconds": warmup_seconds,
+            "threshold": threshold,
+            "alpha": alpha,
+            "metrics": results,
+            "warnings": warnings
+        }
+        comparison["report"] = self._report(comparison)
+        return comparison
+
+    def _load_run(self, test_id: str, source: str, warnings: List[str]) -> Dict[str, Any]:
+        """Per-interval samples of a run: {"source", "times", "lengths", <metric>: array}"""
+        test_ids = self.run_catalog.expand_test_ids(test_id) if self.run_catalog is not None else [test_id]
+        if source in ("auto", "histograms"):
+            histograms = HistogramSet.from_results(self.results_path, test_ids)
+            tag = histograms.primary_tag()
+            if tag is not None:
+                intervals = _merge_shard_intervals(histograms.select(tag)) if len(test_ids) > 1 else \
+                    sorted(histograms.select(tag), key=lambda interval: interval.start)
+                run = {
+                    "source": "histograms",
+                    "times": np.array([interval.start for interval in intervals]),
+                    "lengths": np.array([interval.length for interval in intervals]),
+                    "ops_per_second": np.array([interval.counts.sum() / interval.length if interval.length else np.nan
+                                                for interval in intervals], dtype=np.float64)
+                }
+                for metric, percentile in METRIC_PERCENTILES.items():
+                    run[metric] = np.array([_interval_percentile(interval, percentile)
+                                            for interval in intervals], dtype=np.float64)
+                return run
+            if source == "histograms":
+                raise ValueError(f"No histogram logs for run {test_id}")
+
+        if self.metrics_query is None or self.run_catalog is None:
+            raise ValueError(f"No histogram logs for run {test_id} and no metrics source configured")
+        catalogued = self.run_catalog.get_runs(test_ids)
+        if not catalogued or any(shard["ended_at"] is None for shard in catalogued):
+            raise ValueError(f"Run {test_id} is not a finished catalogued run")
+
+        # A group id also selects the series of its shards
+        series = self.metrics_query.get_run_metrics(test_id, min(shard["started_at"] for shard in catalogued),
+                                                    max(shard["ended_at"] for shard in catalogued))
+        warnings.append(f"{test_id}: no histograms, using VictoriaMetrics series ({series['step']}s steps)")
+        run = {
+            "source": "victoriametrics",
+            "times": np.array(series["timestamps"], dtype=np.float64),
+            "lengths": np.full(len(series["timestamps"]), float(series["step"]))
+        }
+        for metric in METRICS:
+            run[metric] = np.array([np.nan if value is None else value for value in series["series"][metric]],
+                                   dtype=np.float64)
+        return run
+
+    def _align(self, runs: Dict[str, Dict[str, Any]], warmup_seconds: float, warnings: List[str]) -> float:
+        """Drop warm-up and the trailing interval, then cut every run to the shortest steady window"""
+        windows = {}
+        for test_id, run in runs.items():
+            if run["times"].size == 0:
+                windows[test_id] = 0.0
+                continue
+            keep = run["times"] >= run["times"][0] + warmup_seconds
+            keep[-1] = False
+            for key in ("times", "lengths", *METRICS):
+                run[key] = run[key][keep]
+            windows[test_id] = float(run["lengths"].sum())
+
+        steady_length = min(windows.values()) if windows else 0.0
+        for test_id, run in runs.items():
+            if windows[test_id] == 0:
+                warnings.append(f"{test_id}: no steady-state intervals after {warmup_seconds:g}s warm-up")
+                continue
+            keep = np.cumsum(run["lengths"]) <= steady_length + 1e-6
+            for key in ("times", "lengths", *METRICS):
+                run[key] = run[key][keep]
+        return steady_length
+
+    def _pooled(self, runs: Dict[str, Dict[str, Any]], test_ids: List[str], metric: str) -> np.ndarray:
+        """Samples of a metric across several runs, without gaps"""
+        samples = np.concatenate([runs[test_id][metric] for test_id in test_ids]) if test_ids else np.zeros(0)
+        return samples[~np.isnan(samples)]
+
+    def _compare_metric(self, metric: str, baseline: np.ndarray, candidate: np.ndarray, threshold: float,
+                        alpha: float, rng: np.random.Generator) -> Dict[str, Any]:
+        """Delta, confidence interval, p-value and verdict of one metric"""
+        result: Dict[str, Any] = {
+            "worse_when": METRICS[metric],
+            "baseline_samples": int(baseline.size),
+            "candidate_samples": int(candidate.size)
+        }
+        baseline_median = float(np.median(baseline)) if baseline.size else 0.0
+        if baseline.size < self.min_samples or candidate.size < self.min_samples or baseline_median == 0:
+            result["verdict"] = "insufficient_data"
+            return result
+
+        candidate_median = float(np.median(candidate))
+        relative_delta = (candidate_median - baseline_median) / baseline_median
+        ci_low, ci_high = bootstrap_relative_delta(baseline, candidate, 1.0 - alpha, self.resamples, rng)
+        p_value = mann_whitney_u(baseline, candidate)
+
+        significant = (p_value < alpha and abs(relative_delta) >= threshold
+                       and not (ci_low <= 0.0 <= ci_high))
+        if not significant:
+            verdict = "no_change"
+        elif (relative_delta > 0) == (METRICS[metric] == "higher"):
+            verdict = "regression"
+        else:
+            verdict = "improvement"
+
+        result.update({
+            "baseline_median": baseline_median,
+            "candidate_median": candidate_median,
+            "relative_delta": relative_delta,
+            "confidence_interval": [ci_low, ci_high],
+            "p_value": p_value,
+            "verdict": verdict
+        })
+        return result
+
+    def _report(self, comparison: Dict[str, Any]) -> str:
+        """Short human-readable summary of a comparison"""
+        lines = [f"{comparison['verdict'].upper()}: {', '.join(comparison['candidate'])} vs "
+                 f"{', '.join(comparison['baseline'])} ({comparison['steady_state_seconds']:.0f}s steady state "
+                 f"per run, threshold {comparison['threshold']:.0%}, alpha {comparison['alpha']:g})"]
+        for metric, result in comparison["metrics"].items():
+            if result["verdict"] == "insufficient_data":
+                lines.append(f"  {metric}: insufficient data ({result['baseline_samples']} vs "
+                             f"{result['candidate_samples']} samples)")
+                continue
+            ci_low, ci_high = result["confidence_interval"]
+            lines.append(f"  {metric}: {result['baseline_median']:.4g} -> {result['candidate_median']:.4g} "
+                         f"({result['relative_delta']:+.1%}, CI [{ci_low:+.1%}, {ci_high:+.1%}], "
+                         f"p={result['p_value']:.3g}) {result['verdict']}")
+        lines.extend(f"  warning: {warning}" for warning in comparison["warnings"])
+        return "\n".join(lines)
@@ -0,0 +1,229 @@
+import os
+import subprocess
+import threading
+import time
+import logging
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Any
+
+from docker.errors import DockerException, ImageNotFound, NotFound, APIError
+
+from .container_runner import RUNNER_LABEL, ContainerExec, remove_labelled_containers
+
+logger = logging.getLogger(__name__)
+
+# Name prefix of pooled runner containers (tracked by DockerManager like other runner containers)
+POOL_CONTAINER_PREFIX = "nosqlbench-runner"
+POOL_LABEL = "nosqlbench-demo.runner-pool"
+# JVM class data archive written by the warm-up run and reused by benchmark runs (JDK 19+)
+CLASS_DATA_ARCHIVE = "/tmp/nb5.jsa"
+
+class RunnerPool:
+    """Idle, pre-started nb5 runner containers that benchmarks are exec'd into
+
+    Each runner is a container of the nb5 image sleeping on the benchmark
+    network, with the workloads, results and logs directories mounted. A
+    benchmark takes one with `acquire`, runs nb5 in it with an exec
+    and the container is discarded when the run ends; a background thread
+    keeps `size` runners idle. New runners execute nb5 once as a warm-up,
+    which pages the jar in and, for a plain `java` entrypoint, dumps a class
+    data archive that benchmark runs start from.
+    """
+
+    def __init__(self, client, image: str, network: str, volumes: Dict[str, str], size: int = 2,
+                 warmup: bool = True, class_data_sharing: bool = True, refill_interval: float = 5.0):
+        self.client = client
+        self.image = image
+        self.network = network
+        self.volumes = volumes  # host path -> container path
+        self.size = size
+        self.warmup = warmup
+        self.class_data_sharing = class_data_sharing
+        self.refill_interval = refill_interval
+
+        self.pool_id = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.idle: deque = deque()
+        self.busy: set = set()
+        self.entrypoint: Optional[List[str]] = None
+        self.workdir: Optional[str] = None
+        self._counter = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start keeping runners ready in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self._thread.start()
+
+    def acquire(self) -> Optional[str]:
+        """Take an idle runner container for one benchmark process (None if none is ready)"""
+        with self.lock:
+            container = self.idle.popleft() if self.idle else None
+            if container:
+                self.busy.add(container)
+        self._wakeup.set()
+        return container
+
+    def exec(self, container: str, args: List[str], stdout=subprocess.PIPE,
+             stderr=subprocess.PIPE) -> ContainerExec:
+        """Run the image's nb5 entrypoint with `args` inside a runner"""
+        return ContainerExec(self.client, container, self._java_command(self.entrypoint) + args,
+                             workdir=self.workdir, stdout=stdout, stderr=stderr)
+
+    def update_resources(self, container: str, cpuset: str, memory_bytes: int) -> bool:
+        """Apply a CPU set and memory limit to a runner before it is used"""
+        try:
+            self.client.api.update_container(container, cpuset_cpus=cpuset, mem_limit=memory_bytes,
+                                             memswap_limit=memory_bytes)
+            return True
+        except APIError as e:
+            logger.warning(f"Failed to update resources of runner {container}: {e}")
+            return False
+
+    def discard(self, container: str):
+        """Remove a used runner in the background"""
+        with self.lock:
+            if container not in self.busy:
+                return
+            self.busy.discard(container)
+        threading.Thread(target=self._remove, args=([container],), daemon=True).start()
+
+    def shutdown(self):
+        """Stop refilling and remove every runner of the pool"""
+        self._stopped.set()
+        self._wakeup.set()
+        with self.lock:
+            containers = list(self.idle) + list(self.busy)
+            self.idle.clear()
+            self.busy.clear()
+        if containers:
+            self._remove(containers)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Pool size, idle and busy runners"""
+        with self.lock:
+            return {
+                "pool_id": self.pool_id,
+                "size": self.size,
+                "idle": len(self.idle),
+                "busy": len(self.busy),
+                "image": self.image,
+                "entrypoint": self.entrypoint,
+                "class_data_sharing": self.class_data_sharing
+            }
+
+    def _refill_loop(self):
+        """Create runners whenever fewer than `size` are idle"""
+        try:
+            # Runners of an earlier app process were never handed back
+            stale = remove_labelled_containers(self.client, POOL_LABEL)
+            if stale:
+                logger.info(f"Removed {len(stale)} runners left over from an earlier pool")
+        except DockerException as e:
+            logger.warning(f"Failed to look for leftover runners: {e}")
+
+        if not self._inspect_image():
+            logger.error(f"Runner pool disabled: cannot determine the entrypoint of {self.image}")
+            return
+
+        while not self._stopped.is_set():
+            with self.lock:
+                missing = self.size - len(self.idle)
+            for _ in range(max(missing, 0)):
+                if self._stopped.is_set():
+                    break
+                container = self._create_runner()
+                if container is None:
+                    break
+                with self.lock:
+                    if self._stopped.is_set():
+                        self._remove([container])
+                        break
+                    self.idle.append(container)
+
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
+
+    def _inspect_image(self) -> bool:
+        """Read the nb5 image's entrypoint and working directory, pulling the image if needed"""
+        try:
+            try:
+                image = self.client.images.get(self.image)
+            except ImageNotFound:
+                logger.info(f"Pulling {self.image} for the runner pool")
+                image = self.client.images.pull(self.image)
+        except DockerException as e:
+            logger.error(f"Failed to get {self.image}: {e}")
+            return False
+
+        # Benchmark args replace the image's Cmd, as they do in runner containers of their own
+        image_config = image.attrs.get("Config") or {}
+        self.entrypoint = image_config.get("Entrypoint") or []
+        self.workdir = image_config.get("WorkingDir") or None
+        return bool(self.entrypoint)
+
+    def _java_command(self, entrypoint: List[str]) -> List[str]:
+        """The entrypoint, with the class data archive options when it is a plain java launch"""
+        if self.class_data_sharing and entrypoint and os.path.basename(entrypoint[0]) == "java":
+            return [entrypoint[0], "-XX:+AutoCreateSharedArchive",
+                    f"-XX:SharedArchiveFile={CLASS_DATA_ARCHIVE}"] + entrypoint[1:]
+        return list(entrypoint)
+
+    def _create_runner(self) -> Optional[str]:
+        """Start an idle runner container and warm it up"""
+        with self.lock:
+            self._counter += 1
+            container = f"{POOL_CONTAINER_PREFIX}-{self.pool_id}-{self._counter}"
+
+        started = time.monotonic()
+        try:
+            self.client.containers.run(
+                self.image, ["infinity"], entrypoint=["sleep"], name=container,
+                labels={POOL_LABEL: self.pool_id, RUNNER_LABEL: "pool"}, network=self.network,
+                volumes={host_path: {"bind": path, "mode": "rw"} for host_path, path in self.volumes.items()},
+                detach=True, auto_remove=True
+            )
+        except DockerException as e:
+            logger.error(f"Failed to start runner {container}: {e}")
+            return None
+
+        if self.warmup and not self._warm_up(container):
+            self._remove([container])
+            return None
+
+        logger.info(f"Runner {container} ready in {time.monotonic() - started:.1f}s")
+        return container
+
+    def _warm_up(self, container: str) -> bool:
+        """Run nb5 once in a new runner, falling back to plain launches if class data sharing fails"""
+        exit_code, output = self._run_nb5(container, ["--version"])
+        if exit_code != 0 and self.class_data_sharing:
+            logger.warning(f"nb5 failed with class data sharing, disabling it: {output[-200:]}")
+            self.class_data_sharing = False
+            exit_code, output = self._run_nb5(container, ["--version"])
+        if exit_code != 0:
+            logger.error(f"Warm-up of runner {container} failed: {output[-200:]}")
+        return exit_code == 0
+
+    def _run_nb5(self, container: str, args: List[str]):
+        """Run nb5 to completion in a runner; returns (exit code, output)"""
+        try:
+            result = self.client.containers.get(container).exec_run(
+                self._java_command(self.entrypoint) + args, workdir=self.workdir)
+            return result.exit_code, result.output.decode('utf-8', errors='replace').strip()
+        except DockerException as e:
+            return -1, str(e)
+
+    def _remove(self, containers: List[str]):
+        """Force-remove runner containers"""
+        for container in containers:
+            try:
+                self.client.api.remove_container(container, force=True)
+            except NotFound:
+                pass
+            except DockerException as e:
+                logger.warning(f"Failed to remove runner {container}: {e}")
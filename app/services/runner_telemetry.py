@@ -0,0 +1,232 @@
+import gzip
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Any, Callable
+
+import psutil
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Sampled values and the series they are pushed as (counters end in _total)
+RUNNER_SERIES = {
+    "cpu_percent": "nb5_runner_cpu_percent",  # Of one core, like `docker stats`
+    "cpu_seconds": "nb5_runner_cpu_seconds_total",
+    "memory_bytes": "nb5_runner_memory_bytes",  # RSS, or container memory without page cache
+    "memory_limit_bytes": "nb5_runner_memory_limit_bytes",
+    "threads": "nb5_runner_threads",
+    "voluntary_context_switches": "nb5_runner_voluntary_context_switches_total",
+    "involuntary_context_switches": "nb5_runner_involuntary_context_switches_total",
+    "read_chars": "nb5_runner_read_chars_total",  # read/recv syscall bytes, mostly socket traffic
+    "write_chars": "nb5_runner_write_chars_total",
+    "network_rx_bytes": "nb5_runner_network_receive_bytes_total",  # Containers with their own network
+    "network_tx_bytes": "nb5_runner_network_transmit_bytes_total"
+}
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render labels for the text exposition format"""
+    return "{" + ",".join(f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+                          for key, value in labels.items()) + "}"
+
+class RunnerTelemetry:
+    """Samples the resource usage of nb5 runners and pushes it to VictoriaMetrics
+
+    Every `interval` seconds each running runner (from `targets`) is sampled:
+    its process tree through psutil (CPU, RSS, threads, context switches and
+    syscall I/O, which for nb5 is mostly socket traffic) and, for containers,
+    the latest Docker stats sample (memory limit and network). The samples go
+    to VictoriaMetrics in one gzipped import labelled like nb5's own metrics
+    (job=nosqlbench, instance=<test_id>, group=<group_id>), so client load
+    lines up with the benchmark's latency on the same instance.
+    """
+
+    def __init__(self, push_url: str, targets: Callable[[], List[Dict[str, Any]]], interval: float = 5.0,
+                 timeout: float = 10.0):
+        self.import_url = f"{push_url.rstrip('/')}/api/v1/import/prometheus"
+        self.targets = targets
+        self.interval = interval
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        # Per test id: psutil handle of the runner's root process and the previous CPU reading
+        self._processes: Dict[str, psutil.Process] = {}
+        self._cpu_readings: Dict[str, tuple] = {}
+        self.session = requests.Session()
+        self.stats = {"samples": 0, "pushes": 0, "push_errors": 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling on an interval"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self._thread.start()
+            logger.info(f"Runner telemetry pushing to {self.import_url} every {self.interval}s")
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+
+    def get_latest(self, test_id: str = None) -> Dict[str, Any]:
+        """Get the latest sample of each running runner (or of one)"""
+        with self.lock:
+            if test_id is not None:
+                return dict(self.latest.get(test_id) or {})
+            return {instance: dict(sample) for instance, sample in self.latest.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sample and push counters"""
+        with self.lock:
+            return dict(self.stats, runners=len(self.latest))
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """Sample every running runner once"""
+        samples = []
+        for target in self.targets():
+            try:
+                sample = self._sample_target(target)
+            except Exception as e:
+                logger.debug(f"Failed to sample runner {target['test_id']}: {e}")
+                continue
+            if sample:
+                samples.append(sample)
+
+        # Runners that stopped no longer need their handles
+        running = {sample["test_id"] for sample in samples}
+        with self.lock:
+            self.latest = {sample["test_id"]: sample for sample in samples}
+            self.stats["samples"] += len(samples)
+        for test_id in [test_id for test_id in self._processes if test_id not in running]:
+            self._processes.pop(test_id, None)
+            self._cpu_readings.pop(test_id, None)
+        return samples
+
+    def push(self, samples: List[Dict[str, Any]]) -> bool:
+        """Send samples to VictoriaMetrics"""
+        lines = []
+        for sample in samples:
+            labels = _format_labels({"job": "nosqlbench", "instance": sample["test_id"],
+                                     "group": sample["group_id"] or sample["test_id"], "runner": sample["runner"]})
+            timestamp_ms = int(sample["sampled_at"] * 1000)
+            for field, name in RUNNER_SERIES.items():
+                if sample.get(field) is not None:
+                    lines.append(f"{name}{labels} {sample[field]} {timestamp_ms}")
+        if not lines:
+            return True
+
+        try:
+            response = self.session.post(
+                self.import_url,
+                data=gzip.compress(("\n".join(lines) + "\n").encode("utf-8")),
+                headers={"Content-Encoding": "gzip", "Content-Type": "text/plain"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            with self.lock:
+                self.stats["pushes"] += 1
+            return True
+        except requests.RequestException as e:
+            with self.lock:
+                self.stats["push_errors"] += 1
+            logger.warning(f"Failed to push {len(lines)} runner telemetry series to VictoriaMetrics: {e}")
+            return False
+
+    def _sample_loop(self):
+        """Sample and push every interval"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                samples = self.sample()
+                if samples:
+                    self.push(samples)
+            except Exception as e:
+                logger.error(f"Runner telemetry error: {e}")
+
+    def _sample_target(self, target: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Sample one runner from its process tree and/or container stats"""
+        now = time.time()
+        sample = {"test_id": target["test_id"], "group_id": target.get("group_id"),
+                  "runner": target.get("runner"), "sampled_at": now}
+
+        usage = self._sample_process_tree(target["test_id"], target.get("pid"), target.get("container_id"))
+        if usage:
+            cpu_seconds = usage["cpu_seconds"]
+            previous = self._cpu_readings.get(target["test_id"])
+            self._cpu_readings[target["test_id"]] = (cpu_seconds, now)
+            if previous and now > previous[1]:
+                # A child that exited takes its CPU time along; clamp rather than report negative load
+                sample["cpu_percent"] = max(cpu_seconds - previous[0], 0) / (now - previous[1]) * 100
+            sample.update(usage)
+
+        # Docker's view of a container: used as is when its processes are not visible from here
+        resources = target.get("resources")
+        if resources:
+            for field in ("memory_limit_bytes", "network_rx_bytes", "network_tx_bytes"):
+                sample[field] = resources.get(field)
+            if not usage:
+                sample["cpu_percent"] = resources.get("cpu_percent")
+                sample["memory_bytes"] = resources.get("memory_bytes")
+                sample["threads"] = resources.get("pids")
+
+        return sample if usage or resources else None
+
+    def _sample_process_tree(self, test_id: str, pid: Optional[int],
+                             container_id: str = None) -> Optional[Dict[str, Any]]:
+        """Sum the usage of a runner's process and its descendants (None if they are not visible)"""
+        if not pid:
+            return None
+
+        process = self._processes.get(test_id)
+        if process is None or process.pid != pid:
+            try:
+                process = psutil.Process(pid)
+            except psutil.Error:
+                return None
+            # A container's host PID means nothing when this app runs in another PID namespace
+            if container_id and not self._in_container(pid, container_id):
+                return None
+            self._processes[test_id] = process
+
+        try:
+            tree = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return None
+
+        usage = {"cpu_seconds": 0.0, "memory_bytes": 0, "threads": 0,
+                 "voluntary_context_switches": 0, "involuntary_context_switches": 0}
+        io_chars = hasattr(process, "io_counters")
+        if io_chars:
+            usage.update(read_chars=0, write_chars=0)
+
+        for member in tree:
+            try:
+                with member.oneshot():
+                    cpu_times = member.cpu_times()
+                    usage["cpu_seconds"] += cpu_times.user + cpu_times.system
+                    usage["memory_bytes"] += member.memory_info().rss
+                    usage["threads"] += member.num_threads()
+                    context_switches = member.num_ctx_switches()
+                    usage["voluntary_context_switches"] += context_switches.voluntary
+                    usage["involuntary_context_switches"] += context_switches.involuntary
+                    if io_chars:
+                        # Readable for our own processes only (containers usually run as another user)
+                        try:
+                            io_counters = member.io_counters()
+                            usage["read_chars"] += getattr(io_counters, "read_chars", 0)
+                            usage["write_chars"] += getattr(io_counters, "write_chars", 0)
+                        except psutil.AccessDenied:
+                            pass
+            except psutil.Error:
+                continue
+        return usage
+
+    @staticmethod
+    def _in_container(pid: int, container_id: str) -> bool:
+        """Check that a process belongs to the container (its cgroup path carries the container id)"""
+        try:
+            with open(f"/proc/{pid}/cgroup") as f:
+                return container_id in f.read()
+        except OSError:
+            return False
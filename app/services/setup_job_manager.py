@@ -0,0 +1,211 @@
+import threading
+import time
+import logging
+import uuid
+from typing import Dict, List, Optional, Any, Callable
+from dataclasses import dataclass, field
+
+from .setup_scheduler import SetupScheduler, SetupTask
+
+logger = logging.getLogger(__name__)
+
+# Terminal setup job states
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+@dataclass
+class SetupJob:
+    """Represents a background setup run over one or more workloads"""
+    job_id: str
+    workloads: List[str]
+    auto_start_benchmarks: bool
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    running_phases: Dict[str, str] = field(default_factory=dict)  # {workload: phase} in flight
+    phases: Dict[str, Dict[str, str]] = field(default_factory=dict)  # {workload: {phase: state}}
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    schedule: Dict[str, Any] = field(default_factory=dict)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the job"""
+        total_phases = sum(len(phases) for phases in self.phases.values())
+        finished_phases = sum(
+            1 for phases in self.phases.values() for state in phases.values()
+            if state not in ("pending", "running")
+        )
+        return {
+            "job_id": self.job_id,
+            "workloads": list(self.workloads),
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "running_phases": dict(self.running_phases),
+            "phases": {workload: dict(phases) for workload, phases in self.phases.items()},
+            "completed_phases": finished_phases,
+            "total_phases": total_phases,
+            "results": list(self.results),
+            "schedule": dict(self.schedule)
+        }
+
+class SetupJobManager:
+    """Runs workload setup phases as background jobs with progress notifications
+
+    Workloads within a job (and across concurrent jobs) are set up in parallel,
+    limited per database by `benchmark.setup_concurrency_per_database`.
+    """
+
+    def __init__(self, config_obj, benchmark_manager, state_manager, max_finished_jobs: int = 50):
+        self.config = config_obj
+        self.scheduler = SetupScheduler(default_limit=config_obj.benchmark.setup_concurrency_per_database)
+        self.benchmark_manager = benchmark_manager
+        self.state_manager = state_manager
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[str, SetupJob] = {}
+        self.lock = threading.Lock()
+        self.progress_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_progress_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with the job dict on every state transition"""
+        self.progress_listeners.append(listener)
+
+    def submit(self, workloads: List[str], database_config: Dict[str, Any],
+               auto_start_benchmarks: bool = True) -> Dict[str, Any]:
+        """Create a setup job and start it in the background"""
+        job = SetupJob(
+            job_id=uuid.uuid4().hex[:12],
+            workloads=list(workloads),
+            auto_start_benchmarks=auto_start_benchmarks
+        )
+        for workload in workloads:
+            workload_config = self.config.workload_configs.get(workload, {})
+            job.phases[workload] = {phase: "pending" for phase in workload_config.get("setup_phases", [])}
+
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._prune_finished_jobs()
+
+        threading.Thread(target=self._run_job, args=(job, database_config), daemon=True).start()
+        logger.info(f"Submitted setup job {job.job_id} for workloads: {', '.join(workloads)}")
+
+        return job.to_dict()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a setup job by ID"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """List setup jobs, newest first"""
+        with self.lock:
+            jobs = sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+            return [job.to_dict() for job in jobs]
+
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a setup job, terminating its running phases"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return {"success": False, "error": f"Setup job {job_id} not found"}
+            if job.status in FINISHED_STATES:
+                return {"success": False, "error": f"Setup job {job_id} already {job.status}"}
+            job.cancel_event.set()
+            running_workloads = list(job.running_phases)
+
+        for workload in running_workloads:
+            self.benchmark_manager.cancel_setup_phase(workload)
+
+        logger.info(f"Cancellation requested for setup job {job_id}")
+        return {"success": True, "job_id": job_id}
+
+    def _run_job(self, job: SetupJob, database_config: Dict[str, Any]):
+        """Run the job's workloads through the setup scheduler"""
+        with self.lock:
+            job.status = "running"
+            job.started_at = time.time()
+        self._publish(job)
+
+        tasks = []
+        for workload in job.workloads:
+            driver = self.config.workload_configs.get(workload, {}).get("driver", "unknown")
+            tasks.append(SetupTask(workload, driver, lambda workload=workload: self._run_workload(job, workload, database_config)))
+
+        report = self.scheduler.run(tasks)
+
+        with self.lock:
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+                for phases in job.phases.values():
+                    for phase, state in phases.items():
+                        if state in ("pending", "running"):
+                            phases[phase] = "cancelled"
+            elif all(result.get("success", False) for result in job.results):
+                job.status = "completed"
+            else:
+                job.status = "failed"
+            job.schedule = {
+                "critical_path": report["critical_path"],
+                "makespan_seconds": report["makespan_seconds"],
+                "serial_seconds": report["serial_seconds"],
+                "workloads": report["schedule"]
+            }
+            job.running_phases.clear()
+            job.finished_at = time.time()
+        logger.info(f"Setup job {job.job_id} {job.status}")
+        self._publish(job)
+
+    def _run_workload(self, job: SetupJob, workload: str, database_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one workload's setup phases in order (called from a scheduler thread)"""
+        if job.cancel_event.is_set():
+            result = {"success": False, "workload": workload, "error": "Cancelled"}
+            with self.lock:
+                job.results.append(result)
+            return result
+
+        def on_progress(workload_name, phase, phase_status):
+            with self.lock:
+                if phase_status == "running":
+                    job.running_phases[workload_name] = phase
+                else:
+                    job.running_phases.pop(workload_name, None)
+                job.phases.setdefault(workload_name, {})[phase] = phase_status
+            self._publish(job)
+
+        try:
+            result = self.benchmark_manager.run_setup_phase(
+                workload, database_config, job.auto_start_benchmarks,
+                progress_callback=on_progress,
+                cancel_event=job.cancel_event
+            )
+        except Exception as e:
+            logger.error(f"Setup job {job.job_id} failed for {workload}: {e}")
+            result = {"success": False, "workload": workload, "error": str(e)}
+
+        self.state_manager.update_setup_status(workload, result.get("success", False))
+        with self.lock:
+            job.running_phases.pop(workload, None)
+            job.results.append(result)
+        self._publish(job)
+        return result
+
+    def _publish(self, job: SetupJob):
+        """Notify progress listeners of a job state transition"""
+        with self.lock:
+            job_dict = job.to_dict()
+        for listener in self.progress_listeners:
+            try:
+                listener(job_dict)
+            except Exception as e:
+                logger.error(f"Setup progress listener failed: {e}")
+
+    def _prune_finished_jobs(self):
+        """Drop the oldest finished jobs beyond the retention limit (lock must be held)"""
+        finished = sorted(
+            (job for job in self.jobs.values() if job.status in FINISHED_STATES),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job.job_id]
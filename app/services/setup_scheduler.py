@@ -0,0 +1,104 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SetupTask:
+    """A workload's setup phase chain, run as one node of the setup DAG"""
+    workload: str
+    database: str
+    run: Callable[[], Dict[str, Any]]
+
+class SetupScheduler:
+    """Runs workload setup chains in parallel, capped per target database
+
+    Phases stay sequential within a workload (each task runs its own chain);
+    chains for different workloads run concurrently, with at most
+    `database_limits[database]` (default `default_limit`) at once per database.
+    Slots are shared across all run() calls on the same scheduler.
+    """
+
+    def __init__(self, database_limits: Dict[str, int] = None, default_limit: int = 1):
+        self.database_limits = database_limits or {}
+        self.default_limit = default_limit
+        self.lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._last_released: Dict[str, str] = {}
+
+    def run(self, tasks: List[SetupTask]) -> Dict[str, Any]:
+        """Run all tasks and return their results with the schedule and critical path"""
+        schedule: Dict[str, Dict[str, Any]] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        started = time.time()
+
+        if tasks:
+            with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="setup") as executor:
+                futures = {task.workload: executor.submit(self._run_task, task, schedule) for task in tasks}
+                for workload, future in futures.items():
+                    try:
+                        results[workload] = future.result()
+                    except Exception as e:
+                        logger.error(f"Setup for {workload} failed: {e}")
+                        results[workload] = {"success": False, "workload": workload, "error": str(e)}
+
+        makespan = time.time() - started
+        serial_time = sum(entry["duration_seconds"] for entry in schedule.values())
+        critical_path = self._critical_path(schedule)
+        logger.info(f"Setup of {len(tasks)} workload(s) took {makespan:.1f}s "
+                    f"(serial {serial_time:.1f}s), critical path: {' -> '.join(critical_path)}")
+
+        return {
+            "results": [results[task.workload] for task in tasks],
+            "schedule": schedule,
+            "critical_path": critical_path,
+            "makespan_seconds": makespan,
+            "serial_seconds": serial_time
+        }
+
+    def _get_slots(self, database: str) -> threading.BoundedSemaphore:
+        """Get the concurrency slots for a database"""
+        with self.lock:
+            if database not in self._slots:
+                limit = self.database_limits.get(database, self.default_limit)
+                self._slots[database] = threading.BoundedSemaphore(max(1, limit))
+            return self._slots[database]
+
+    def _run_task(self, task: SetupTask, schedule: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one task once a slot for its database is free"""
+        slots = self._get_slots(task.database)
+        entry = {"database": task.database, "queued_at": time.time(), "blocked_by": None}
+
+        if not slots.acquire(blocking=False):
+            logger.info(f"Setup for {task.workload} waiting for a {task.database} slot")
+            slots.acquire()
+            with self.lock:
+                entry["blocked_by"] = self._last_released.get(task.database)
+
+        entry["started_at"] = time.time()
+        try:
+            return task.run()
+        finally:
+            entry["finished_at"] = time.time()
+            entry["duration_seconds"] = entry["finished_at"] - entry["started_at"]
+            entry["wait_seconds"] = entry["started_at"] - entry["queued_at"]
+            with self.lock:
+                self._last_released[task.database] = task.workload
+                schedule[task.workload] = entry
+            slots.release()
+
+    def _critical_path(self, schedule: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Chain of workloads ending with the last to finish, following slot waits backwards"""
+        if not schedule:
+            return []
+
+        current: Optional[str] = max(schedule, key=lambda workload: schedule[workload]["finished_at"])
+        path = []
+        while current and current in schedule and current not in path:
+            path.insert(0, current)
+            current = schedule[current]["blocked_by"]
+        return path
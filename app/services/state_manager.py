@@ -8,6 +8,9 @@ from typing import Dict, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from .status_cache import ChangeNotifier
+from .state_persister import WriteBehindPersister
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -30,17 +33,28 @@ class ApplicationState:
         if self.last_updated is None:
             self.last_updated = datetime.now().isoformat()
 
-class StateManager:
+class StateManager(ChangeNotifier):
     """Manages persistent application state"""
     
-    def __init__(self, state_file: str = "app_state.json"):
+    def __init__(self, state_file: str = "app_state.json", persistence_config=None):
         # Store state file in project root
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         self.state_file = os.path.join(project_root, state_file)
         self.lock = threading.Lock()
         self._state = ApplicationState()
         self.load_state()
-        
+
+        # Mutations are persisted asynchronously, coalesced into atomic writes
+        persistence_options = {}
+        if persistence_config is not None:
+            persistence_options = {
+                "debounce_seconds": persistence_config.debounce_seconds,
+                "max_delay_seconds": persistence_config.max_delay_seconds,
+                "fsync_policy": persistence_config.fsync_policy,
+                "fsync_interval_seconds": persistence_config.fsync_interval_seconds
+            }
+        self.persister = WriteBehindPersister(self.state_file, self._snapshot_for_save, **persistence_options)
+
     def load_state(self):
         """Load state from disk"""
         try:
@@ -56,14 +70,22 @@ class StateManager:
             self._state = ApplicationState()
     
     def save_state(self):
-        """Save state to disk"""
-        try:
-            with self.lock:
-                self._state.last_updated = datetime.now().isoformat()
-                with open(self.state_file, 'w') as f:
-                    json.dump(asdict(self._state), f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save state: {e}")
+        """Schedule the current state to be written to disk"""
+        self.persister.mark_dirty()
+
+    def flush_state(self):
+        """Write any pending state changes to disk now"""
+        self.persister.flush()
+
+    def close(self):
+        """Flush pending state changes and stop the background writer"""
+        self.persister.stop(flush=True)
+
+    def _snapshot_for_save(self) -> Dict[str, Any]:
+        """Stamp and copy the state for the background writer"""
+        with self.lock:
+            self._state.last_updated = datetime.now().isoformat()
+            return asdict(self._state)
     
     def get_state(self) -> Dict[str, Any]:
         """Get current state as dictionary"""
@@ -75,6 +97,7 @@ class StateManager:
         with self.lock:
             self._state.infrastructure_ready = ready
         self.save_state()
+        self._notify_change("infrastructure")
     
     def update_database_config(self, config: Dict[str, Any]):
         """Update database configuration"""
@@ -82,12 +105,14 @@ class StateManager:
             self._state.database_config = config.copy()
             self._state.databases_configured = bool(config)
         self.save_state()
+        self._notify_change("databases", "workloads")
     
     def update_setup_status(self, workload: str, completed: bool):
         """Update setup completion status for a workload"""
         with self.lock:
             self._state.setup_completed[workload] = completed
         self.save_state()
+        self._notify_change("workloads")
     
     def get_setup_status(self, workload: str = None) -> Dict[str, bool]:
         """Get setup status for workload(s)"""
@@ -159,11 +184,16 @@ class StateManager:
         with self.lock:
             self._state = ApplicationState()
         self.save_state()
+        self._notify_change()
 
     def clear_all_state(self):
         """Clear all state and delete state file (for graceful shutdown)"""
         with self.lock:
             self._state = ApplicationState()
+        self._notify_change()
+
+        # Pending writes would recreate the file
+        self.persister.stop(flush=False)
 
         # Delete the state file
         try:
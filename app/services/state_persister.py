@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+import logging
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+class WriteBehindPersister:
+    """Coalesces state mutations into debounced, atomic JSON file writes
+
+    mark_dirty() returns immediately; a background thread writes the latest
+    snapshot once mutations have been quiet for `debounce_seconds`, or at most
+    `max_delay_seconds` after the first unsaved mutation. Writes go to a temp
+    file that is renamed over the target, so readers and crashes only ever see
+    a complete file. fsync_policy controls durability: "always" fsyncs every
+    write, "interval" at most every `fsync_interval_seconds`, "never" leaves it
+    to the OS. A failed write keeps the changes pending and is retried after
+    `max_delay_seconds`.
+    """
+
+    def __init__(self, path: str, snapshot: Callable[[], Dict[str, Any]],
+                 debounce_seconds: float = 0.2, max_delay_seconds: float = 2.0,
+                 fsync_policy: str = "always", fsync_interval_seconds: float = 5.0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+
+        self.path = path
+        self.snapshot = snapshot
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.fsync_policy = fsync_policy
+        self.fsync_interval_seconds = fsync_interval_seconds
+
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self._dirty_since = None
+        self._last_mark = 0.0
+        self._last_fsync = 0.0
+        self._retry_at = 0.0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Schedule a write of the current state"""
+        with self.condition:
+            if self._stopped:
+                return
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_mark = now
+            self.condition.notify()
+
+    def flush(self, fsync: bool = True):
+        """Write pending changes now (blocking)"""
+        self._write_pending(force_fsync=fsync)
+
+    def discard(self):
+        """Drop pending changes, waiting out any write in progress"""
+        with self.condition:
+            self._dirty_since = None
+        with self.write_lock:
+            pass
+
+    def stop(self, flush: bool = True):
+        """Stop the writer thread, optionally flushing pending changes first"""
+        if flush:
+            self.flush()
+        else:
+            self.discard()
+        with self.condition:
+            self._stopped = True
+            self.condition.notify()
+
+    def _writer_loop(self):
+        """Wait for a quiet period (bounded by max delay), then write"""
+        while True:
+            with self.condition:
+                while self._dirty_since is None and not self._stopped:
+                    self.condition.wait()
+                if self._stopped:
+                    return
+
+                now = time.monotonic()
+                due = max(min(self._last_mark + self.debounce_seconds,
+                              self._dirty_since + self.max_delay_seconds), self._retry_at)
+                if now < due:
+                    self.condition.wait(due - now)
+                    continue
+
+            self._write_pending()
+
+    def _write_pending(self, force_fsync: bool = False):
+        """Atomically replace the state file with a compact JSON snapshot, if changes are pending"""
+        with self.write_lock:
+            # Checked under the write lock so discard() cannot race a write that is about to start
+            with self.condition:
+                if self._dirty_since is None:
+                    return
+                dirty_since, self._dirty_since = self._dirty_since, None
+
+            try:
+                data = json.dumps(self.snapshot(), separators=(",", ":"))
+
+                now = time.monotonic()
+                fsync = force_fsync or self.fsync_policy == "always" or (
+                    self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval_seconds
+                )
+
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(data)
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+
+                if fsync:
+                    # Persist the rename itself
+                    dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+                    try:
+                        os.fsync(dir_fd)
+                    finally:
+                        os.close(dir_fd)
+                    self._last_fsync = now
+                self._retry_at = 0.0
+            except Exception as e:
+                logger.error(f"Failed to save state to {self.path}, retrying in {self.max_delay_seconds}s: {e}")
+                # Still unsaved (and no older than before), unless the persister is shutting down
+                with self.condition:
+                    if not self._stopped:
+                        self._dirty_since = min(dirty_since, self._dirty_since or dirty_since)
+                        self._retry_at = time.monotonic() + self.max_delay_seconds
+                        self.condition.notify()
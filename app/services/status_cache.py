@@ -0,0 +1,68 @@
+import threading
+import logging
+from typing import Dict, List, Set, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Top-level sections of the application status document
+STATUS_SECTIONS = ("infrastructure", "databases", "workloads", "benchmarks")
+
+class ChangeNotifier:
+    """Mixin for managers whose mutations should invalidate cached status sections"""
+
+    def add_change_listener(self, listener: Callable[..., None]):
+        """Register a callback invoked with the names of changed status sections"""
+        if not hasattr(self, '_change_listeners'):
+            self._change_listeners: List[Callable[..., None]] = []
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, *sections: str):
+        """Notify registered listeners that the given sections changed"""
+        for listener in getattr(self, '_change_listeners', []):
+            try:
+                listener(*sections)
+            except Exception as e:
+                logger.error(f"Change listener failed for sections {sections}: {e}")
+
+class StatusCache:
+    """In-process snapshot of the application status, rebuilt per section on invalidation"""
+
+    def __init__(self, builders: Dict[str, Callable[[], Dict[str, Any]]]):
+        self.builders = builders
+        # Rebuilds are serialized by `lock`; the dirty set has its own lock so that
+        # managers can invalidate while holding their own locks without deadlocking
+        self.lock = threading.Lock()
+        self._dirty_lock = threading.Lock()
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set(builders.keys())
+        self.version = 0
+
+    def invalidate(self, *sections: str):
+        """Mark sections dirty so the next read rebuilds them (all sections if none given)"""
+        with self._dirty_lock:
+            self._dirty.update(sections or self.builders.keys())
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Get the status snapshot, rebuilding only the sections marked dirty"""
+        with self.lock:
+            with self._dirty_lock:
+                # Take the flags first so a mutation during the build re-marks the section
+                dirty = self._dirty
+                self._dirty = set()
+
+            if dirty:
+                self._rebuild(dirty)
+            return dict(self._sections)
+
+    def _rebuild(self, sections: Set[str]):
+        """Rebuild the given sections in their canonical order"""
+        for section in STATUS_SECTIONS:
+            if section not in sections:
+                continue
+            try:
+                self._sections[section] = self.builders[section]()
+            except Exception:
+                with self._dirty_lock:
+                    self._dirty.update(sections)
+                raise
+        self.version += 1
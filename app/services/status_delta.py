@@ -0,0 +1,86 @@
+import threading
+import logging
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every read and are derived client-side instead
+# (runtime is computed in the browser from start_time)
+VOLATILE_FIELDS = frozenset({"runtime_seconds"})
+
+def _escape_pointer_token(token: Any) -> str:
+    """Escape a key for use in a JSON pointer path"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def strip_volatile_fields(value: Any) -> Any:
+    """Return a copy of a status value without volatile fields"""
+    if isinstance(value, dict):
+        return {k: strip_volatile_fields(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [strip_volatile_fields(v) for v in value]
+    return value
+
+def diff_values(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Compute JSON-patch style operations transforming old into new
+
+    Dicts are diffed key by key; lists and scalars are replaced wholesale.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape_pointer_token(key)}"})
+        for key, value in new.items():
+            child_path = f"{path}/{_escape_pointer_token(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child_path, "value": value})
+            else:
+                ops.extend(diff_values(old[key], value, child_path))
+        return ops
+
+    if old != new or type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+class StatusDeltaEncoder:
+    """Encodes successive status documents as sequenced per-section deltas"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seq = 0
+        self._last: Dict[str, Any] = {}
+
+    def encode(self, status: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a new status document and return its delta, or None if unchanged"""
+        status = strip_volatile_fields(status)
+
+        with self.lock:
+            sections = {}
+            for section in self._last:
+                if section not in status:
+                    sections[section] = [{"op": "remove", "path": ""}]
+            for section, value in status.items():
+                if section not in self._last:
+                    sections[section] = [{"op": "add", "path": "", "value": value}]
+                else:
+                    ops = diff_values(self._last[section], value)
+                    if ops:
+                        sections[section] = ops
+
+            if not sections:
+                return None
+
+            self.seq += 1
+            self._last = status
+            return {
+                "seq": self.seq,
+                "base_seq": self.seq - 1,
+                "sections": sections
+            }
+
+    def get_full_status(self) -> Dict[str, Any]:
+        """Get the last encoded document with its sequence number, for (re)syncing clients"""
+        with self.lock:
+            full_status = dict(self._last)
+            full_status["seq"] = self.seq
+            return full_status
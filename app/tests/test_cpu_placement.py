@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import cpu_placement
+from services.cpu_placement import CpuAllocator, format_cpu_list, parse_cpu_list
+
+GIB = 1 << 30
+
+@pytest.fixture
+def allocator(monkeypatch):
+    """Eight host CPUs, 0-1 reserved, 2 per runner and 16 GiB at 4 GiB per runner: room for three runners"""
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(cpu_placement.psutil, "virtual_memory", lambda: SimpleNamespace(total=16 * GIB))
+    return CpuAllocator(reserved_cpus="0-1", cpus_per_runner=2, memory_per_runner=4 * GIB, threads_per_cpu=2)
+
+def test_cpu_lists_round_trip():
+    assert parse_cpu_list("0-3, 6,8-9") == [0, 1, 2, 3, 6, 8, 9]
+    assert parse_cpu_list("") == []
+    assert format_cpu_list([9, 0, 1, 2, 6, 8]) == "0-2,6,8-9"
+
+def test_placements_are_disjoint_and_skip_reserved_cpus(allocator):
+    first = allocator.allocate("a", 2)
+    second = allocator.allocate("b", 1)
+
+    assert [placement.cpuset for placement in first + second] == ["2-3", "4-5", "6-7"]
+    assert all(placement.memory_bytes == 4 * GIB and placement.threads == 4 for placement in first + second)
+    assert allocator.get_inventory()["free_cpus"] == 0
+
+def test_requests_that_do_not_fit_are_refused(allocator):
+    assert allocator.capacity() == 3
+    assert allocator.allocate("too-big", 4, timeout=10) is None  # Never fits, so no wait
+
+    allocator.allocate("a", 2)
+    assert allocator.allocate("b", 2, timeout=0) is None
+    allocator.release("a")
+    assert [placement.cpuset for placement in allocator.allocate("b", 2)] == ["2-3", "4-5"]
+
+def test_memory_limits_runners_too(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(cpu_placement.psutil, "virtual_memory", lambda: SimpleNamespace(total=6 * GIB))
+    allocator = CpuAllocator(cpus_per_runner=2, memory_per_runner=4 * GIB, reserved_memory=1 * GIB)
+
+    assert allocator.capacity() == 1
+    assert allocator.allocate("a", 1) is not None
+    assert allocator.allocate("b", 1) is None
+
+def test_waiting_request_gets_released_cpus(allocator):
+    allocator.allocate("a", 3)
+    threading.Timer(0.1, allocator.release, args=("a",)).start()
+
+    started = time.monotonic()
+    placements = allocator.allocate("b", 1, timeout=5)
+    assert placements is not None and placements[0].cpuset == "2-3"
+    assert time.monotonic() - started < 5
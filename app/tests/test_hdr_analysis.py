@@ -0,0 +1,93 @@
+import base64
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from services.hdr_analysis import (COMPRESSED_COOKIE_V2, ENCODING_COOKIE_V2, HISTOGRAM_LOG_NAME, V2_HEADER,
+                                   HistogramSet, IntervalHistogram, decode_histogram)
+
+def _zigzag_leb128(value: int) -> bytes:
+    raw = (value << 1) ^ (value >> 63)
+    out = bytearray()
+    while True:
+        byte = raw & 0x7f
+        raw >>= 7
+        if raw:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def encode_histogram(counts_by_value: dict) -> str:
+    """Compressed V2 encoding with 2 significant digits, where values below 256 map to their own bucket"""
+    entries = []
+    position = 0
+    for value in sorted(counts_by_value):
+        if value > position:
+            entries.append(-(value - position))
+        entries.append(counts_by_value[value])
+        position = value + 1
+    payload = b"".join(_zigzag_leb128(entry) for entry in entries)
+    inner = V2_HEADER.pack(ENCODING_COOKIE_V2 | 0x10, len(payload), 0, 2, 1, 3600 * 10 ** 9, 1.0) + payload
+    compressed = zlib.compress(inner)
+    return base64.b64encode(struct.pack(">ii", COMPRESSED_COOKIE_V2 | 0x10, len(compressed)) + compressed).decode()
+
+def interval(counts_by_value: dict, start: float = 0.0, tag: str = "result-success") -> IntervalHistogram:
+    values, counts = decode_histogram(encode_histogram(counts_by_value))
+    return IntervalHistogram(tag, start, 10.0, values, counts)
+
+def test_decode_histogram_returns_the_recorded_buckets():
+    values, counts = decode_histogram(encode_histogram({3: 2, 100: 5, 200: 1}))
+
+    assert values.tolist() == [3, 100, 200]
+    assert counts.tolist() == [2, 5, 1]
+
+def test_decode_histogram_rejects_other_encodings():
+    encoded = base64.b64encode(struct.pack(">ii", 0x1c849301, 0)).decode()
+    with pytest.raises(ValueError, match="Unsupported"):
+        decode_histogram(encoded)
+
+def test_percentiles_merge_intervals_exactly():
+    histograms = HistogramSet([interval({10: 50, 20: 40}, start=0), interval({20: 5, 250: 5}, start=10)])
+    result = histograms.percentiles([50, 90, 99, 100], tag="result-success")
+
+    samples = np.repeat([10, 20, 250], [50, 45, 5])
+    assert result["count"] == 100
+    assert result["percentiles"] == {"50": 10, "90": 20, "99": 250, "100": 250}
+    assert (result["min"], result["max"]) == (10, 250)
+    assert result["mean"] == pytest.approx(samples.mean())
+
+def test_percentiles_select_by_tag_and_window():
+    histograms = HistogramSet([
+        interval({10: 1}, start=0),
+        interval({20: 1}, start=10),
+        interval({30: 1}, start=20),
+        interval({99: 1}, start=10, tag="result")
+    ])
+
+    result = histograms.percentiles([100], tag="result-success", start=10, end=20)
+    assert (result["count"], result["percentiles"]) == (1, {"100": 20})
+    assert histograms.tags() == ["result", "result-success"]
+    assert histograms.primary_tag() == "result-success"
+    assert histograms.percentiles([50], tag="missing")["count"] == 0
+
+def test_from_results_reads_each_runs_log(tmp_path):
+    for test_id, start_time, value in (("run_a", 1000.0, 10), ("run_b", 2000.0, 20)):
+        run_dir = tmp_path / test_id
+        run_dir.mkdir()
+        (run_dir / HISTOGRAM_LOG_NAME).write_text(
+            f"#[StartTime: {start_time} (seconds since epoch)]\n"
+            '"StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"\n'
+            f"Tag=result-success,0.000,10.000,{value / 1e6},{encode_histogram({value: 4})}\n"
+        )
+
+    histograms = HistogramSet.from_results(str(tmp_path), ["run_a", "run_b"])
+
+    assert sorted(i.start for i in histograms.intervals) == [1000.0, 2000.0]
+    assert histograms.time_range() == (1000.0, 2010.0)
+    summary = histograms.summary(percentiles=[50, 100])
+    assert summary["count"] == 8
+    assert summary["percentiles"] == {"50": 10, "100": 20}
+    assert summary["ops_per_second"] == pytest.approx(8 / 1010.0)
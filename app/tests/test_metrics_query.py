@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.metrics_query import MetricsQuery, MetricsQueryError, SERIES_QUERIES
+
+class StubVictoriaMetrics:
+    """query_range endpoint answering every series with one point per step"""
+
+    def __init__(self):
+        self.requests = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                stub.requests.append(dict(params, path=url.path))
+                stub.gate.wait(5)
+
+                if stub.fail:
+                    body = {"status": "error", "error": "bad query"}
+                else:
+                    start, end, step = int(params["start"]), int(params["end"]), int(params["step"].rstrip("s"))
+                    body = {"status": "success", "data": {"resultType": "matrix", "result": [
+                        {"metric": {"series": name},
+                         "values": [[timestamp, "NaN" if name == "errors" else str(timestamp % 7)]
+                                    for timestamp in range(start, end + 1, step)]}
+                        for name in SERIES_QUERIES
+                    ]}}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.gate.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def vm():
+    stub = StubVictoriaMetrics()
+    yield stub
+    stub.close()
+
+def test_window_is_aligned_to_the_step(vm):
+    query = MetricsQuery(vm.url, max_points=300, min_step_seconds=10)
+    result = query.get_run_metrics("sai_run_run_abcd1234", 1003, 1997)
+
+    assert (result["start"], result["end"], result["step"]) == (1000, 2000, 10)
+    assert result["timestamps"] == list(range(1000, 2001, 10))
+    assert result["series"]["ops_per_second"][:3] == [1000 % 7, 1010 % 7, 1020 % 7]
+    assert result["series"]["errors"] == [None] * 101
+    request = vm.requests[0]
+    assert request["path"] == "/api/v1/query_range"
+    assert (request["start"], request["end"], request["step"]) == ("1000", "2000", "10s")
+    # Shards of a group id are selected with it
+    assert 'instance=~"sai_run_run_abcd1234(-s[0-9]+)?"' in request["query"]
+
+def test_step_keeps_long_windows_within_max_points(vm):
+    query = MetricsQuery(vm.url, max_points=300, min_step_seconds=10)
+    result = query.get_run_metrics("t", 0, 6000)
+
+    assert result["step"] == 20
+    assert len(result["timestamps"]) == 301
+
+def test_viewers_within_one_step_share_a_cache_entry(vm):
+    query = MetricsQuery(vm.url, min_step_seconds=10)
+    first = query.get_run_metrics("t", 1003, 1997)
+    second = query.get_run_metrics("t", 1008, 1991)
+
+    assert second is first
+    assert len(vm.requests) == 1
+    assert query.get_stats()["hits"] == 1
+
+def test_live_entries_expire_after_their_ttl(vm):
+    query = MetricsQuery(vm.url, live_ttl=0.05, finished_ttl=60)
+    query.get_run_metrics("live", 1000, 2000, live=True)
+    query.get_run_metrics("done", 1000, 2000)
+    time.sleep(0.1)
+    query.get_run_metrics("live", 1000, 2000, live=True)
+    query.get_run_metrics("done", 1000, 2000)
+
+    assert [request["query"].count("live") > 0 for request in vm.requests] == [True, False, True]
+
+def test_least_recently_used_entry_is_evicted(vm):
+    query = MetricsQuery(vm.url, max_entries=2)
+    for test_id in ("a", "b", "a", "c"):
+        query.get_run_metrics(test_id, 1000, 2000)
+    assert len(vm.requests) == 3
+
+    query.get_run_metrics("a", 1000, 2000)
+    assert len(vm.requests) == 3
+    query.get_run_metrics("b", 1000, 2000)
+    assert len(vm.requests) == 4
+    assert query.get_stats()["entries"] == 2
+
+def test_concurrent_misses_share_one_query(vm):
+    query = MetricsQuery(vm.url)
+    vm.gate.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(query.get_run_metrics("t", 1000, 2000)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while not vm.requests and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    vm.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(vm.requests) == 1
+    assert len(results) == 5 and all(result is results[0] for result in results)
+    stats = query.get_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 4)
+
+def test_failed_query_raises_and_is_not_cached(vm):
+    query = MetricsQuery(vm.url)
+    vm.fail = True
+    with pytest.raises(MetricsQueryError, match="bad query"):
+        query.get_run_metrics("t", 1000, 2000)
+
+    vm.fail = False
+    assert query.get_run_metrics("t", 1000, 2000)["step"] == 10
+    assert len(vm.requests) == 2
+    assert query.get_stats()["errors"] == 1
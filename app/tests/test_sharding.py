@@ -0,0 +1,40 @@
+import pytest
+
+from services.benchmark_manager import shard_test_id, split_cycle_rate, split_cycles
+from services.log_lifecycle import test_id_for_dir as run_test_id_for_dir
+
+@pytest.mark.parametrize("cycle_rate, shards", [(10, 3), (1000, 4), (7, 7), (2, 5), (0, 3)])
+def test_split_cycle_rate_adds_up_and_differs_by_at_most_one(cycle_rate, shards):
+    rates = split_cycle_rate(cycle_rate, shards)
+
+    assert len(rates) == shards
+    assert sum(rates) == cycle_rate
+    assert max(rates) - min(rates) <= 1
+
+def test_split_cycle_rate_gives_the_remainder_to_the_first_shards():
+    assert split_cycle_rate(10, 3) == [4, 3, 3]
+
+@pytest.mark.parametrize("total_cycles, shards", [(10, 3), (1000000, 4), (5, 5), (3, 4)])
+def test_split_cycles_covers_the_range_contiguously(total_cycles, shards):
+    ranges = split_cycles(total_cycles, shards)
+
+    assert len(ranges) == shards
+    assert ranges[0][0] == 0 and ranges[-1][1] == total_cycles
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+
+def test_split_cycles_of_ten_in_three():
+    assert split_cycles(10, 3) == [(0, 3), (3, 6), (6, 10)]
+
+def test_shard_test_ids():
+    assert shard_test_id("sai_run_run_abcd1234", 0, 1) == "sai_run_run_abcd1234"
+    assert shard_test_id("sai_run_run_abcd1234", 2, 3) == "sai_run_run_abcd1234-s2"
+
+@pytest.mark.parametrize("name, test_id", [
+    ("sai_run_sai_run_run_abcd1234", "sai_run_run_abcd1234"),
+    ("sai_run_sai_run_run_abcd1234-s0", "sai_run_run_abcd1234-s0"),
+    ("unknown_sai_run_run_abcd1234-s12", "sai_run_run_abcd1234-s12"),
+    ("sai_run_run_abcd1234-sx", None),
+    ("campaigns", None)
+])
+def test_log_directories_map_back_to_shard_test_ids(name, test_id):
+    assert run_test_id_for_dir(name) == test_id
@@ -0,0 +1,50 @@
+from services.status_delta import StatusDeltaEncoder, diff_values, strip_volatile_fields
+
+def test_equal_values_have_no_operations():
+    assert diff_values({"a": [1, 2], "b": {"c": None}}, {"a": [1, 2], "b": {"c": None}}) == []
+
+def test_dicts_are_diffed_key_by_key():
+    old = {"keep": 1, "gone": 2, "nested": {"x": 1, "y": 2}}
+    new = {"keep": 1, "nested": {"x": 1, "y": 3}, "added": {"z": 0}}
+
+    assert diff_values(old, new) == [
+        {"op": "remove", "path": "/gone"},
+        {"op": "replace", "path": "/nested/y", "value": 3},
+        {"op": "add", "path": "/added", "value": {"z": 0}}
+    ]
+
+def test_lists_and_type_changes_are_replaced_wholesale():
+    assert diff_values({"a": [1, 2]}, {"a": [1, 3]}) == [{"op": "replace", "path": "/a", "value": [1, 3]}]
+    assert diff_values({"a": 1}, {"a": 1.0}) == [{"op": "replace", "path": "/a", "value": 1.0}]
+    assert diff_values({"a": {"b": 1}}, {"a": None}) == [{"op": "replace", "path": "/a", "value": None}]
+
+def test_keys_are_escaped_as_json_pointer_tokens():
+    assert diff_values({}, {"a/b~c": 1}) == [{"op": "add", "path": "/a~1b~0c", "value": 1}]
+
+def test_encoder_sequences_section_deltas_and_ignores_volatile_fields():
+    encoder = StatusDeltaEncoder()
+    status = {"benchmarks": {"running": {"sai": {"cycle_rate": 100, "runtime_seconds": 1.0}}}, "databases": {}}
+
+    first = encoder.encode(status)
+    assert (first["seq"], first["base_seq"]) == (1, 0)
+    assert first["sections"]["benchmarks"] == [
+        {"op": "add", "path": "", "value": {"running": {"sai": {"cycle_rate": 100}}}}
+    ]
+
+    status["benchmarks"]["running"]["sai"]["runtime_seconds"] = 2.0
+    assert encoder.encode(status) is None
+
+    status["benchmarks"]["running"]["sai"]["cycle_rate"] = 200
+    del status["databases"]
+    second = encoder.encode(status)
+    assert (second["seq"], second["base_seq"]) == (2, 1)
+    assert second["sections"] == {
+        "databases": [{"op": "remove", "path": ""}],
+        "benchmarks": [{"op": "replace", "path": "/running/sai/cycle_rate", "value": 200}]
+    }
+
+def test_strip_volatile_fields_copies_nested_values():
+    status = {"running": [{"runtime_seconds": 5, "pid": 1}]}
+
+    assert strip_volatile_fields(status) == {"running": [{"pid": 1}]}
+    assert status["running"][0]["runtime_seconds"] == 5
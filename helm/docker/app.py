@@ -11,15 +11,21 @@ import threading
 import time
 import signal
 import atexit
+import gzip
 import yaml
 from flask import Flask, render_template, request, jsonify
 from flask_socketio import SocketIO, emit
+from kubernetes import client
 from werkzeug.serving import make_server
 
 # Import Kubernetes services
+from services.campaign_backend import KubernetesCampaignBackend
+from services.campaign_runner import CampaignRunner, CampaignError
 from services.k8s_job_manager import KubernetesJobManager
 from services.k8s_state_manager import KubernetesStateManager
 from services.config_manager import ConfigManager
+from services.metrics_relay import MetricsRelay
+from services.pod_telemetry import PodTelemetry
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +47,34 @@ config_manager = ConfigManager()
 state_manager = KubernetesStateManager()
 job_manager = KubernetesJobManager(config_manager, state_manager)
 
+# nb5 pushes through the app when the relay is enabled
+relay_config = config_manager.get_metrics_relay_config()
+metrics_relay = MetricsRelay(
+    config_manager.get_metrics_endpoint(),
+    group_for_instance=job_manager.get_workload_for_test_id,
+    forward_interval=float(relay_config.get("forwardInterval", 10)),
+    instance_ttl=float(relay_config.get("instanceTtl", 30)),
+    forward_instances=bool(relay_config.get("forwardInstances", False))
+) if relay_config.get("enabled") else None
+
+# Benchmark pod CPU and memory, pushed next to the pods' own nb5 metrics
+telemetry_config = config_manager.get_runner_telemetry_config()
+pod_telemetry = PodTelemetry(
+    client.CustomObjectsApi(), job_manager.namespace,
+    label_selector=f"app.kubernetes.io/instance={job_manager.release_name},job-type=benchmark",
+    push_url=config_manager.get_metrics_endpoint(),
+    get_pod=job_manager.informer.get_pod,
+    interval=float(telemetry_config.get("interval", 15))
+) if telemetry_config.get("enabled") else None
+
+# Campaign checkpoints live in the state ConfigMaps; benchmark jobs outlive webapp restarts
+campaign_runner = CampaignRunner(
+    KubernetesCampaignBackend(job_manager),
+    save_checkpoint=state_manager.save_campaign,
+    load_checkpoints=lambda: state_manager.get_campaigns(statuses=["queued", "running"])
+)
+campaign_runner.add_progress_listener(lambda campaign: socketio.emit('campaign_progress', campaign))
+
 # Global variables for graceful shutdown
 shutdown_event = threading.Event()
 status_thread = None
@@ -268,15 +302,13 @@ def run_setup():
         if not workloads:
             return jsonify({"success": False, "error": "No workloads specified"}), 400
         
-        results = []
-        for workload in workloads:
-            logger.info(f"Running setup for workload: {workload}")
-            result = job_manager.run_setup_phases(workload)
-            results.append(result)
+        logger.info(f"Running setup for workloads: {', '.join(workloads)}")
+        report = job_manager.run_setup_for_workloads(workloads)
         
         return jsonify({
             "success": True,
-            "results": results
+            "results": report["results"],
+            "schedule": report["schedule"]
         })
         
     except Exception as e:
@@ -292,6 +324,7 @@ def start_benchmark():
         scenario = data.get('scenario')  # 'setup' or 'live'
         database_id = data.get('database_id')
         cycle_rate = data.get('cycle_rate', 10)
+        shards = data.get('shards', 1)
 
         if not all([workload, scenario, database_id]):
             return jsonify({"success": False, "error": "Missing required fields: workload, scenario, database_id"}), 400
@@ -299,7 +332,7 @@ def start_benchmark():
         if scenario not in ['setup', 'live']:
             return jsonify({"success": False, "error": "Scenario must be 'setup' or 'live'"}), 400
 
-        result = job_manager.start_job(workload, scenario, database_id, cycle_rate)
+        result = job_manager.start_job(workload, scenario, database_id, cycle_rate, shards=shards)
         return jsonify(result)
 
     except Exception as e:
@@ -351,6 +384,98 @@ def get_running_jobs():
         logger.error(f"Failed to get running jobs: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/campaigns', methods=['POST'])
+def run_campaign():
+    """Start a campaign from a YAML body or a JSON definition"""
+    try:
+        if request.is_json:
+            source = request.get_json().get('campaign')
+        else:
+            source = request.get_data(as_text=True)
+
+        if not source:
+            return jsonify({"success": False, "error": "No campaign specified"}), 400
+
+        campaign = campaign_runner.submit(source)
+        return jsonify({"success": True, "campaign_id": campaign["campaign_id"], "campaign": campaign}), 202
+
+    except CampaignError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to start campaign: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/campaigns')
+def list_campaigns():
+    """List campaigns of this pod, or persisted checkpoints with `history=true`"""
+    try:
+        if request.args.get('history', 'false').lower() == 'true':
+            campaigns = state_manager.get_campaigns()
+        else:
+            campaigns = campaign_runner.list_campaigns()
+        return jsonify({"success": True, "campaigns": campaigns})
+
+    except Exception as e:
+        logger.error(f"Failed to list campaigns: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/campaigns/<campaign_id>')
+def get_campaign(campaign_id):
+    """Get a campaign with the state of every step"""
+    campaign = campaign_runner.get_campaign(campaign_id)
+    if not campaign:
+        return jsonify({"success": False, "error": f"Campaign {campaign_id} not found"}), 404
+
+    return jsonify({"success": True, "campaign": campaign})
+
+@app.route('/api/campaigns/<campaign_id>/cancel', methods=['POST'])
+def cancel_campaign(campaign_id):
+    """Cancel a campaign (its teardown steps still run)"""
+    try:
+        result = campaign_runner.cancel_campaign(campaign_id)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Failed to cancel campaign {campaign_id}: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/v1/import/prometheus', methods=['POST'])
+@app.route('/api/v1/import/prometheus/metrics/job/<job>/instance/<instance>', methods=['POST'])
+def relay_prometheus_push(job=None, instance=None):
+    """Accept an nb5 Prometheus push for the metrics relay (same paths as VictoriaMetrics)"""
+    if metrics_relay is None:
+        return jsonify({"success": False, "error": "Metrics relay is disabled"}), 404
+
+    try:
+        path_labels = {key: value for key, value in (("job", job), ("instance", instance)) if value}
+        body = request.get_data()
+        if request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        samples = metrics_relay.ingest(body.decode('utf-8', errors='replace'), path_labels)
+        return jsonify({"success": True, "samples": samples})
+
+    except Exception as e:
+        logger.error(f"Failed to relay metrics push: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/metrics/live')
+def get_live_metrics():
+    """Get the latest pushed values per workload and job, without querying VictoriaMetrics"""
+    if metrics_relay is None:
+        return jsonify({"success": False, "error": "Metrics relay is disabled"}), 404
+
+    live = metrics_relay.get_live(request.args.get('group'))
+    return jsonify(dict(live, success=True, stats=metrics_relay.get_stats()))
+
+@app.route('/api/metrics/runners')
+def get_runner_telemetry():
+    """Get the latest CPU and memory usage sample of each running benchmark pod"""
+    if pod_telemetry is None:
+        return jsonify({"success": False, "error": "Runner telemetry is disabled"}), 404
+
+    return jsonify({"success": True, "runners": pod_telemetry.get_latest(),
+                    "stats": pod_telemetry.get_stats()})
+
 # WebSocket handlers
 @socketio.on('connect')
 def handle_connect():
@@ -372,6 +497,9 @@ def graceful_shutdown():
     """Gracefully shutdown the application"""
     logger.info("Shutting down application...")
     shutdown_event.set()
+
+    # Keep campaign checkpoints as they are so the next pod resumes them
+    campaign_runner.stop()
     
     # Stop any running jobs if needed
     try:
@@ -379,6 +507,18 @@ def graceful_shutdown():
     except Exception as e:
         logger.error(f"Error during job manager cleanup: {e}")
 
+    # Forward the last relayed metrics
+    if metrics_relay:
+        metrics_relay.stop()
+    if pod_telemetry:
+        pod_telemetry.stop()
+
+    # Write any batched state changes
+    try:
+        state_manager.close()
+    except Exception as e:
+        logger.error(f"Error flushing state: {e}")
+
 # Register shutdown handlers
 atexit.register(graceful_shutdown)
 signal.signal(signal.SIGTERM, signal_handler)
@@ -388,8 +528,16 @@ if __name__ == '__main__':
     try:
         # Start status monitoring
         start_status_monitor()
+        if metrics_relay:
+            metrics_relay.add_forward_listener(lambda live: socketio.emit('live_metrics', live))
+            metrics_relay.start()
+        if pod_telemetry:
+            pod_telemetry.start()
         
         # Auto-setup removed in simplified flow
+
+        # Continue campaigns interrupted by the last pod restart
+        campaign_runner.resume()
         
         # Run the application
         logger.info("Starting NoSQLBench Kubernetes Demo Application")
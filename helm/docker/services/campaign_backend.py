@@ -0,0 +1,41 @@
+"""
+Campaign Backend for NoSQLBench Demo
+Runs campaign steps as Kubernetes setup and benchmark jobs
+"""
+
+import threading
+import logging
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+class KubernetesCampaignBackend:
+    """Runs campaign steps against benchmark jobs (KubernetesJobManager)"""
+
+    def __init__(self, job_manager):
+        self.job_manager = job_manager
+
+    def setup(self, workloads: List[str], abort_event: threading.Event) -> Dict[str, Any]:
+        """Run the workloads' setup phases; running setup jobs finish even when the step is aborted"""
+        report = self.job_manager.run_setup_for_workloads(workloads)
+        errors = [f"{result.get('workload')}: {result.get('error')}"
+                  for result in report["results"] if not result.get("success")]
+        if errors:
+            return {"success": False, "error": f"Setup failed for {'; '.join(errors)}"}
+        return {"success": True, "schedule": report["schedule"]}
+
+    def start(self, workload: str, rate: int) -> Dict[str, Any]:
+        """Start a benchmark job"""
+        return self.job_manager.start_benchmark(workload, rate)
+
+    def update_rate(self, workload: str, rate: int) -> Dict[str, Any]:
+        """Change a running benchmark's cycle rate"""
+        return self.job_manager.update_benchmark_throughput(workload, rate)
+
+    def stop(self, workload: str) -> Dict[str, Any]:
+        """Stop a benchmark job"""
+        return self.job_manager.stop_benchmark(workload)
+
+    def is_running(self, workload: str) -> bool:
+        """Whether a benchmark job is running for the workload"""
+        return workload in self.job_manager.get_running_benchmarks()
@@ -0,0 +1,522 @@
+"""
+Campaign Runner for NoSQLBench Demo
+Runs declarative multi-workload benchmark campaigns with checkpointed progress
+"""
+
+import re
+import threading
+import time
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Union
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Terminal campaign states
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+STEP_ACTIONS = ("setup", "run", "start", "rate", "wait", "stop", "parallel", "sequence")
+STEP_OPTIONS = ("name", "timeout", "retries", "retry_delay", "continue_on_error")
+# Options of individual steps only: a group's steps time out and retry on their own
+ATTEMPT_OPTIONS = ("timeout", "retries", "retry_delay")
+DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+class CampaignError(Exception):
+    """Raised for invalid campaign definitions"""
+
+class StepFailed(Exception):
+    """Raised when a step fails after its retries"""
+
+class StepAborted(Exception):
+    """Raised inside a step when its campaign is cancelled or its timeout expires"""
+
+def parse_duration(value: Union[str, int, float, None]) -> Optional[float]:
+    """Seconds from 90, "90s", "30m", "1.5h" or "500ms"; None stays None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = DURATION_PATTERN.match(str(value))
+    if not match:
+        raise CampaignError(f"Invalid duration: {value}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+def _workload_list(value: Any, action: str) -> List[str]:
+    """A workload name or list of names"""
+    workloads = [value] if isinstance(value, str) else value
+    if not workloads or not isinstance(workloads, list) or not all(isinstance(w, str) for w in workloads):
+        raise CampaignError(f"{action} needs a workload name or list of names")
+    return list(workloads)
+
+def _normalize_step(raw: Any, step_id: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a step definition and flatten it into {id, action, ...options}"""
+    if not isinstance(raw, dict):
+        raise CampaignError(f"Step {step_id} must be a mapping")
+    actions = [key for key in raw if key in STEP_ACTIONS]
+    unknown = [key for key in raw if key not in STEP_ACTIONS and key not in STEP_OPTIONS]
+    if len(actions) != 1 or unknown:
+        raise CampaignError(f"Step {step_id} needs exactly one of {', '.join(STEP_ACTIONS)}"
+                            + (f" (unknown keys: {', '.join(unknown)})" if unknown else ""))
+
+    action = actions[0]
+    value = raw[action]
+    if action in ("parallel", "sequence"):
+        misplaced = [key for key in ATTEMPT_OPTIONS if key in raw]
+        if misplaced:
+            raise CampaignError(f"Step {step_id}: {', '.join(misplaced)} cannot be set on a {action} group, "
+                                f"only on its steps")
+    # Defaults are for the steps of a group, not the group itself
+    attempt_defaults = {} if action in ("parallel", "sequence") else defaults
+    step = {
+        "id": step_id,
+        "action": action,
+        "name": raw.get("name") or f"{action} {step_id}",
+        "timeout": parse_duration(raw.get("timeout", attempt_defaults.get("timeout"))),
+        "retries": int(raw.get("retries", attempt_defaults.get("retries", 0))),
+        "retry_delay": parse_duration(raw.get("retry_delay", attempt_defaults.get("retry_delay", 10))),
+        "continue_on_error": bool(raw.get("continue_on_error", False))
+    }
+
+    if action in ("parallel", "sequence"):
+        if not isinstance(value, list) or not value:
+            raise CampaignError(f"Step {step_id}: {action} needs a list of steps")
+        step["steps"] = [_normalize_step(child, f"{step_id}.{i}", defaults) for i, child in enumerate(value)]
+    elif action in ("setup", "stop"):
+        step["workloads"] = _workload_list(value, action)
+    elif action == "wait":
+        step["duration"] = parse_duration(value)
+    else:
+        if not isinstance(value, dict) or not value.get("workload") or value.get("rate") is None:
+            raise CampaignError(f"Step {step_id}: {action} needs workload and rate")
+        step["workload"] = value["workload"]
+        step["rate"] = int(value["rate"])
+        if action == "run":
+            if value.get("duration") is None:
+                raise CampaignError(f"Step {step_id}: run needs a duration")
+            step["duration"] = parse_duration(value["duration"])
+            step["keep_running"] = bool(value.get("keep_running", False))
+    return step
+
+def load_campaign(source: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Parse a campaign (YAML text or mapping) into its normalized plan"""
+    try:
+        spec = yaml.safe_load(source) if isinstance(source, str) else source
+    except yaml.YAMLError as e:
+        raise CampaignError(f"Invalid campaign YAML: {e}")
+    if not isinstance(spec, dict) or not isinstance(spec.get("steps"), list) or not spec["steps"]:
+        raise CampaignError("A campaign needs a non-empty steps list")
+
+    defaults = spec.get("defaults") or {}
+    return {
+        "name": spec.get("name", "campaign"),
+        "steps": [_normalize_step(step, str(i), defaults) for i, step in enumerate(spec["steps"])],
+        "teardown": [_normalize_step(step, f"teardown.{i}", defaults)
+                     for i, step in enumerate(spec.get("teardown") or [])]
+    }
+
+class Campaign:
+    """A campaign being executed, with per-step checkpoint state"""
+
+    def __init__(self, campaign_id: str, spec: Dict[str, Any], plan: Dict[str, Any]):
+        self.campaign_id = campaign_id
+        self.spec = spec
+        self.plan = plan
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.resumed = 0
+        # {step_id: {status, attempts, started_at, finished_at, held_seconds, error}}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.cancel_event = threading.Event()
+        self.abort_events: List[threading.Event] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the campaign, also its checkpoint"""
+        return {
+            "campaign_id": self.campaign_id,
+            "name": self.plan["name"],
+            "spec": self.spec,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "resumed": self.resumed,
+            "steps": {step_id: dict(state) for step_id, state in self.steps.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, checkpoint: Dict[str, Any]) -> "Campaign":
+        """Rebuild a campaign from its checkpoint"""
+        campaign = cls(checkpoint["campaign_id"], checkpoint["spec"], load_campaign(checkpoint["spec"]))
+        campaign.status = checkpoint["status"]
+        campaign.created_at = checkpoint["created_at"]
+        campaign.started_at = checkpoint.get("started_at")
+        campaign.error = checkpoint.get("error")
+        campaign.resumed = checkpoint.get("resumed", 0)
+        campaign.steps = {step_id: dict(state) for step_id, state in checkpoint.get("steps", {}).items()}
+        for state in campaign.steps.values():
+            # An attempt cut short by the restart does not count against the retries
+            if state["status"] == "running" and state["attempts"]:
+                state["attempts"] -= 1
+        return campaign
+
+class CampaignRunner:
+    """Executes declarative benchmark campaigns with checkpointed progress
+
+    A campaign is an ordered list of steps: setup, run (start or retune a
+    benchmark, hold it for a duration, then stop it), start, rate, wait,
+    stop, and parallel/sequence groups of steps, plus teardown steps that
+    always run at the end. Steps can have a timeout, retries with a delay
+    and continue_on_error. Step states, including how long a hold has
+    lasted, are checkpointed through `save_checkpoint` on every transition
+    and every `checkpoint_interval` seconds of a hold; `resume()` picks
+    unfinished campaigns up from their checkpoints after a restart, skipping
+    completed steps and holding only for the remaining time.
+
+    The backend drives the actual benchmarks and provides setup(workloads,
+    abort_event), start(workload, rate), update_rate(workload, rate),
+    stop(workload) and is_running(workload).
+    """
+
+    def __init__(self, backend, save_checkpoint: Callable[[Dict[str, Any]], None],
+                 load_checkpoints: Callable[[], List[Dict[str, Any]]], checkpoint_interval: float = 30.0,
+                 max_finished_campaigns: int = 50):
+        self.backend = backend
+        self.save_checkpoint = save_checkpoint
+        self.load_checkpoints = load_checkpoints
+        self.checkpoint_interval = checkpoint_interval
+        self.max_finished_campaigns = max_finished_campaigns
+        self.campaigns: Dict[str, Campaign] = {}
+        self.lock = threading.Lock()
+        self.progress_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._stopped = False
+
+    def add_progress_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with the campaign dict on every step transition"""
+        self.progress_listeners.append(listener)
+
+    def submit(self, source: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate a campaign and start it in the background"""
+        try:
+            spec = yaml.safe_load(source) if isinstance(source, str) else source
+        except yaml.YAMLError as e:
+            raise CampaignError(f"Invalid campaign YAML: {e}")
+        plan = load_campaign(spec)
+        campaign = Campaign(uuid.uuid4().hex[:12], spec, plan)
+
+        with self.lock:
+            self.campaigns[campaign.campaign_id] = campaign
+            self._prune_finished_campaigns()
+        self._checkpoint(campaign)
+
+        threading.Thread(target=self._run_campaign, args=(campaign,), daemon=True).start()
+        logger.info(f"Started campaign {campaign.campaign_id} ({plan['name']})")
+        return campaign.to_dict()
+
+    def resume(self) -> List[str]:
+        """Continue campaigns that were unfinished when the app stopped"""
+        resumed = []
+        for checkpoint in self.load_checkpoints():
+            if checkpoint.get("status") in FINISHED_STATES:
+                continue
+            try:
+                campaign = Campaign.from_dict(checkpoint)
+            except CampaignError as e:
+                logger.error(f"Cannot resume campaign {checkpoint.get('campaign_id')}: {e}")
+                continue
+
+            campaign.resumed += 1
+            with self.lock:
+                if campaign.campaign_id in self.campaigns:
+                    continue
+                self.campaigns[campaign.campaign_id] = campaign
+            threading.Thread(target=self._run_campaign, args=(campaign,), daemon=True).start()
+            logger.info(f"Resumed campaign {campaign.campaign_id} ({campaign.plan['name']})")
+            resumed.append(campaign.campaign_id)
+        return resumed
+
+    def stop(self):
+        """Freeze checkpoints for shutdown, so what the shutdown does to benchmarks is not recorded"""
+        with self.lock:
+            self._stopped = True
+
+    def get_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Get a campaign by ID"""
+        with self.lock:
+            campaign = self.campaigns.get(campaign_id)
+            return campaign.to_dict() if campaign else None
+
+    def list_campaigns(self) -> List[Dict[str, Any]]:
+        """List campaigns, newest first"""
+        with self.lock:
+            campaigns = sorted(self.campaigns.values(), key=lambda campaign: campaign.created_at, reverse=True)
+            return [campaign.to_dict() for campaign in campaigns]
+
+    def cancel_campaign(self, campaign_id: str) -> Dict[str, Any]:
+        """Cancel a campaign; its running steps are aborted and teardown still runs"""
+        with self.lock:
+            campaign = self.campaigns.get(campaign_id)
+            if not campaign:
+                return {"success": False, "error": f"Campaign {campaign_id} not found"}
+            if campaign.status in FINISHED_STATES:
+                return {"success": False, "error": f"Campaign {campaign_id} already {campaign.status}"}
+            campaign.cancel_event.set()
+            for abort_event in campaign.abort_events:
+                abort_event.set()
+
+        logger.info(f"Cancellation requested for campaign {campaign_id}")
+        return {"success": True, "campaign_id": campaign_id}
+
+    def _run_campaign(self, campaign: Campaign):
+        """Run the steps in order, then the teardown steps"""
+        with self.lock:
+            campaign.status = "running"
+            campaign.started_at = campaign.started_at or time.time()
+        self._checkpoint(campaign)
+
+        status, error = "completed", None
+        try:
+            self._run_steps(campaign, campaign.plan["steps"])
+        except StepAborted:
+            status = "cancelled"
+        except StepFailed as e:
+            status, error = "failed", str(e)
+        except Exception as e:
+            logger.error(f"Campaign {campaign.campaign_id} failed: {e}")
+            status, error = "failed", str(e)
+
+        if campaign.cancel_event.is_set():
+            status = "cancelled"
+        try:
+            # Teardown is not cancellable: it is what leaves the databases clean
+            self._run_steps(campaign, campaign.plan["teardown"], cancellable=False)
+        except Exception as e:
+            logger.error(f"Campaign {campaign.campaign_id} teardown failed: {e}")
+            error = error or f"Teardown failed: {e}"
+            if status == "completed":
+                status = "failed"
+
+        with self.lock:
+            campaign.status = status
+            campaign.error = error
+            campaign.finished_at = time.time()
+        logger.info(f"Campaign {campaign.campaign_id} {status}")
+        self._checkpoint(campaign)
+
+    def _run_steps(self, campaign: Campaign, steps: List[Dict[str, Any]], cancellable: bool = True):
+        """Run steps one after another"""
+        for step in steps:
+            self._run_step(campaign, step, cancellable)
+
+    def _run_step(self, campaign: Campaign, step: Dict[str, Any], cancellable: bool = True):
+        """Run a step (or group) with its retry policy, unless already completed"""
+        with self.lock:
+            state = campaign.steps.setdefault(step["id"], {
+                "name": step["name"], "status": "pending", "attempts": 0, "started_at": None,
+                "finished_at": None, "held_seconds": 0.0, "error": None
+            })
+            if state["status"] == "completed" or (state["status"] == "failed" and step["continue_on_error"]):
+                return
+            if cancellable and campaign.cancel_event.is_set():
+                raise StepAborted()
+            state["status"] = "running"
+            state["started_at"] = state["started_at"] or time.time()
+        self._checkpoint(campaign)
+
+        if step["action"] in ("parallel", "sequence"):
+            try:
+                if step["action"] == "sequence":
+                    self._run_steps(campaign, step["steps"], cancellable)
+                else:
+                    self._run_parallel(campaign, step["steps"], cancellable)
+                self._set_step(campaign, step, "completed")
+            except StepAborted:
+                self._set_step(campaign, step, "cancelled")
+                raise
+            except StepFailed as e:
+                self._set_step(campaign, step, "failed", str(e))
+                if not step["continue_on_error"]:
+                    raise
+            return
+
+        while True:
+            abort_event = threading.Event()
+            with self.lock:
+                state["attempts"] += 1
+                attempt = state["attempts"]
+                if cancellable:
+                    campaign.abort_events.append(abort_event)
+                    if campaign.cancel_event.is_set():
+                        abort_event.set()
+            try:
+                self._execute_with_timeout(campaign, step, state, abort_event)
+                self._set_step(campaign, step, "completed")
+                return
+            except StepAborted:
+                if cancellable and campaign.cancel_event.is_set():
+                    self._set_step(campaign, step, "cancelled")
+                    raise
+                error = f"Timed out after {step['timeout']:g}s"
+            except Exception as e:
+                error = str(e)
+            finally:
+                with self.lock:
+                    if abort_event in campaign.abort_events:
+                        campaign.abort_events.remove(abort_event)
+
+            logger.warning(f"Campaign {campaign.campaign_id} step {step['name']} attempt {attempt} failed: {error}")
+            if attempt > step["retries"]:
+                self._set_step(campaign, step, "failed", error)
+                if step["continue_on_error"]:
+                    return
+                raise StepFailed(f"{step['name']}: {error}")
+
+            with self.lock:
+                state["error"] = error
+            self._checkpoint(campaign)
+            if cancellable and campaign.cancel_event.wait(step["retry_delay"]):
+                self._set_step(campaign, step, "cancelled")
+                raise StepAborted()
+            if not cancellable:
+                time.sleep(step["retry_delay"])
+
+    def _run_parallel(self, campaign: Campaign, steps: List[Dict[str, Any]], cancellable: bool):
+        """Run steps concurrently; the group fails if any of them does"""
+        with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="campaign") as executor:
+            futures = [executor.submit(self._run_step, campaign, step, cancellable) for step in steps]
+            errors = []
+            aborted = False
+            for future in futures:
+                try:
+                    future.result()
+                except StepAborted:
+                    aborted = True
+                except Exception as e:
+                    errors.append(str(e))
+        if aborted:
+            raise StepAborted()
+        if errors:
+            raise StepFailed("; ".join(errors))
+
+    def _execute_with_timeout(self, campaign: Campaign, step: Dict[str, Any], state: Dict[str, Any],
+                              abort_event: threading.Event):
+        """Run a step's action, aborting it when its timeout expires"""
+        if step["timeout"] is None:
+            self._execute(campaign, step, state, abort_event)
+            return
+
+        outcome: Dict[str, Any] = {}
+
+        def target():
+            try:
+                self._execute(campaign, step, state, abort_event)
+            except BaseException as e:
+                outcome["error"] = e
+
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        worker.join(step["timeout"])
+        if worker.is_alive():
+            abort_event.set()
+            # The next attempt must not start or retune the workload while this one still might
+            while True:
+                worker.join(self.checkpoint_interval)
+                if not worker.is_alive():
+                    break
+                logger.warning(f"Campaign {campaign.campaign_id} step {step['name']} is still finishing "
+                               f"its timed-out attempt")
+            raise StepAborted()
+        if "error" in outcome:
+            raise outcome["error"]
+
+    def _execute(self, campaign: Campaign, step: Dict[str, Any], state: Dict[str, Any],
+                 abort_event: threading.Event):
+        """Perform one attempt of a step's action"""
+        action = step["action"]
+        if action == "setup":
+            self._check(self.backend.setup(step["workloads"], abort_event), f"Setup of {', '.join(step['workloads'])}")
+        elif action == "stop":
+            for workload in step["workloads"]:
+                if self.backend.is_running(workload):
+                    self._check(self.backend.stop(workload), f"Stop of {workload}")
+        elif action == "wait":
+            self._hold(campaign, state, step["duration"], abort_event)
+        elif action == "rate":
+            if not self.backend.is_running(step["workload"]):
+                raise RuntimeError(f"Benchmark {step['workload']} is not running")
+            self._check(self.backend.update_rate(step["workload"], step["rate"]), f"Rate change of {step['workload']}")
+        else:
+            self._ensure_running(step["workload"], step["rate"])
+            if action == "run":
+                self._hold(campaign, state, step["duration"], abort_event, step["workload"])
+                if not step["keep_running"]:
+                    self._check(self.backend.stop(step["workload"]), f"Stop of {step['workload']}")
+
+    def _ensure_running(self, workload: str, rate: int):
+        """Start a benchmark at `rate`, or retune it if it is already running"""
+        if self.backend.is_running(workload):
+            self._check(self.backend.update_rate(workload, rate), f"Rate change of {workload}")
+        else:
+            self._check(self.backend.start(workload, rate), f"Start of {workload}")
+
+    def _hold(self, campaign: Campaign, state: Dict[str, Any], duration: float, abort_event: threading.Event,
+              workload: str = None):
+        """Wait until the step has been held for `duration`, checkpointing progress along the way"""
+        while True:
+            with self.lock:
+                remaining = duration - state["held_seconds"]
+            if remaining <= 0:
+                return
+            started = time.monotonic()
+            aborted = abort_event.wait(min(self.checkpoint_interval, remaining))
+            with self.lock:
+                state["held_seconds"] += time.monotonic() - started
+            self._checkpoint(campaign)
+            if aborted:
+                raise StepAborted()
+            if workload and not self.backend.is_running(workload):
+                raise RuntimeError(f"Benchmark {workload} stopped after {state['held_seconds']:.0f}s")
+
+    def _check(self, result: Dict[str, Any], what: str):
+        """Raise unless a backend result reports success"""
+        if not result or not result.get("success"):
+            raise RuntimeError(f"{what} failed: {(result or {}).get('error', 'unknown error')}")
+
+    def _set_step(self, campaign: Campaign, step: Dict[str, Any], status: str, error: str = None):
+        """Record a step's final state and checkpoint it"""
+        with self.lock:
+            state = campaign.steps[step["id"]]
+            state["status"] = status
+            state["error"] = error
+            state["finished_at"] = time.time()
+        self._checkpoint(campaign)
+
+    def _checkpoint(self, campaign: Campaign):
+        """Persist the campaign's progress and notify listeners"""
+        with self.lock:
+            if self._stopped:
+                return
+            campaign_dict = campaign.to_dict()
+        try:
+            self.save_checkpoint(campaign_dict)
+        except Exception as e:
+            logger.error(f"Failed to checkpoint campaign {campaign.campaign_id}: {e}")
+        for listener in self.progress_listeners:
+            try:
+                listener(campaign_dict)
+            except Exception as e:
+                logger.error(f"Campaign progress listener failed: {e}")
+
+    def _prune_finished_campaigns(self):
+        """Drop the oldest finished campaigns beyond the retention limit (lock must be held)"""
+        finished = sorted(
+            (campaign for campaign in self.campaigns.values() if campaign.status in FINISHED_STATES),
+            key=lambda campaign: campaign.created_at
+        )
+        for campaign in finished[:max(0, len(finished) - self.max_finished_campaigns)]:
+            del self.campaigns[campaign.campaign_id]
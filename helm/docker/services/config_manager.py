@@ -96,38 +96,45 @@ class ConfigManager:
         self._workload_definitions = {
             "sai_longrun": {
                 "file": "sai_longrun.yaml",
+                "cycles_param": "read_cycles",
                 "driver": "cql",
                 "keyspace": "sai_test",
                 "enabled": True
             },
             "lwt_longrun": {
                 "file": "lwt_longrun.yaml",
+                "cycles_param": "live_cycles",
                 "driver": "cql",
                 "keyspace": "lwt_ks",
                 "enabled": True
             },
             "opensearch_basic_longrun": {
                 "file": "opensearch_basic_longrun.yaml",
+                "cycles_param": "search_count",
                 "driver": "opensearch",
                 "enabled": True
             },
             "opensearch_bulk_longrun": {
                 "file": "opensearch_bulk_longrun.yaml",
+                "cycles_param": "verify_count",
                 "driver": "opensearch",
                 "enabled": True
             },
             "opensearch_vector_search_longrun": {
                 "file": "opensearch_vector_search_longrun.yaml",
+                "cycles_param": "search_count",
                 "driver": "opensearch",
                 "enabled": True
             },
             "jdbc_analytics_longrun": {
                 "file": "jdbc_analytics_longrun.yaml",
+                "cycles_param": "analytics_cycles",
                 "driver": "jdbc",
                 "enabled": True
             },
             "jdbc_ecommerce_longrun": {
                 "file": "jdbc_ecommerce_longrun.yaml",
+                "cycles_param": "transaction_cycles",
                 "driver": "jdbc",
                 "enabled": True
             }
@@ -141,6 +148,21 @@ class ConfigManager:
         """Get metrics endpoint"""
         return self._app_config.get("metrics", {}).get("endpoint", "http://victoriametrics:8428")
     
+    def get_metrics_relay_config(self) -> Dict[str, Any]:
+        """Get metrics relay configuration"""
+        return self._app_config.get("metrics", {}).get("relay", {"enabled": False})
+
+    def get_runner_telemetry_config(self) -> Dict[str, Any]:
+        """Get benchmark pod telemetry configuration"""
+        return self._app_config.get("metrics", {}).get("runnerTelemetry", {"enabled": False})
+
+    def get_metrics_push_endpoint(self) -> str:
+        """Get the endpoint nb5 pushes metrics to (the app's relay when enabled)"""
+        relay_config = self.get_metrics_relay_config()
+        if relay_config.get("enabled") and relay_config.get("pushUrl"):
+            return relay_config["pushUrl"]
+        return self.get_metrics_endpoint()
+
     def get_workload_config(self, workload_name: str) -> Optional[Dict[str, Any]]:
         """Get configuration for a specific workload"""
         return self._workload_definitions.get(workload_name)
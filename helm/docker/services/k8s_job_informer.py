@@ -0,0 +1,183 @@
+"""
+Kubernetes Job Informer for NoSQLBench Demo
+Maintains a local job/pod index from label-selected watches
+"""
+
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Callable
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+class JobInformer:
+    """Caches release jobs and pods from list+watch, resuming by resourceVersion"""
+
+    # Server-side watch timeout; the watch is resumed from the last resourceVersion
+    WATCH_TIMEOUT_SECONDS = 300
+
+    def __init__(self, batch_v1, core_v1, namespace: str, label_selector: str):
+        self.batch_v1 = batch_v1
+        self.core_v1 = core_v1
+        self.namespace = namespace
+        self.label_selector = label_selector
+
+        self.condition = threading.Condition()
+        self.generation = 0
+        self._jobs: Dict[str, Any] = {}
+        self._pods: Dict[str, Any] = {}
+        self._synced = {"jobs": threading.Event(), "pods": threading.Event()}
+        self._watches: Dict[str, watch.Watch] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start the job and pod watch threads"""
+        if self._threads:
+            return
+
+        for kind, list_func, index in (
+            ("jobs", self.batch_v1.list_namespaced_job, self._jobs),
+            ("pods", self.core_v1.list_namespaced_pod, self._pods),
+        ):
+            thread = threading.Thread(target=self._watch_loop, args=(kind, list_func, index), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Started job informer for selector {self.label_selector}")
+
+    def stop(self):
+        """Stop the watch threads"""
+        self._stop_event.set()
+        for w in list(self._watches.values()):
+            w.stop()
+        with self.condition:
+            self.condition.notify_all()
+
+    def is_synced(self) -> bool:
+        """Check if the job index reflects a completed list (and is being watched)"""
+        return self._synced["jobs"].is_set()
+
+    def get_job(self, job_name: str) -> Optional[Any]:
+        """Get a job from the local index"""
+        with self.condition:
+            return self._jobs.get(job_name)
+
+    def list_jobs(self, predicate: Callable[[Any], bool] = None) -> List[Any]:
+        """List indexed jobs, optionally filtered"""
+        with self.condition:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if predicate is None or predicate(job)]
+
+    def get_job_pods(self, job_name: str) -> List[Any]:
+        """Get the indexed pods created for a job"""
+        with self.condition:
+            return [pod for pod in self._pods.values()
+                    if (pod.metadata.labels or {}).get("job-name") == job_name]
+
+    def get_pod(self, pod_name: str) -> Optional[Any]:
+        """Get a pod from the local index"""
+        with self.condition:
+            return self._pods.get(pod_name)
+
+    def upsert_job(self, job):
+        """Record a job we just created, so reads do not race its ADDED event"""
+        with self.condition:
+            current = self._jobs.get(job.metadata.name)
+            if current is None or self._is_newer(job, current):
+                self._jobs[job.metadata.name] = job
+            self._changed()
+
+    def wait_for_change(self, generation: int, timeout: float) -> int:
+        """Block until the index changes after `generation` (or timeout); returns the new generation"""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.generation != generation or self._stop_event.is_set(),
+                timeout=timeout
+            )
+            return self.generation
+
+    def _changed(self):
+        """Bump the generation and wake waiters (condition must be held)"""
+        self.generation += 1
+        self.condition.notify_all()
+
+    def _is_newer(self, candidate, current) -> bool:
+        """Compare resourceVersions (opaque in general, integers in practice)"""
+        try:
+            return int(candidate.metadata.resource_version) >= int(current.metadata.resource_version)
+        except (TypeError, ValueError):
+            return True
+
+    def _watch_loop(self, kind: str, list_func, index: Dict[str, Any]):
+        """List then watch, relisting when the resourceVersion has expired (410 Gone)"""
+        resource_version = None
+
+        while not self._stop_event.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self._relist(kind, list_func, index)
+
+                w = watch.Watch()
+                self._watches[kind] = w
+                for event in w.stream(list_func, namespace=self.namespace,
+                                      label_selector=self.label_selector,
+                                      resource_version=resource_version,
+                                      allow_watch_bookmarks=True,
+                                      timeout_seconds=self.WATCH_TIMEOUT_SECONDS):
+                    event_type = event["type"]
+
+                    if event_type == "ERROR":
+                        raw = event.get("raw_object") or {}
+                        if raw.get("code") == 410:
+                            raise ApiException(status=410, reason=raw.get("message", "Gone"))
+                        logger.warning(f"Watch error for {kind}: {raw}")
+                        break
+
+                    obj = event["object"]
+                    resource_version = obj.metadata.resource_version
+                    if event_type == "BOOKMARK":
+                        continue
+
+                    with self.condition:
+                        if event_type == "DELETED":
+                            index.pop(obj.metadata.name, None)
+                        else:
+                            index[obj.metadata.name] = obj
+                        self._changed()
+
+                # Stream ended (server timeout); resume from the last resourceVersion
+
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"Watch resourceVersion for {kind} expired, relisting")
+                    resource_version = None
+                    continue
+                logger.error(f"Watch for {kind} failed: {e}")
+                resource_version = None
+                self._synced[kind].clear()
+                self._stop_event.wait(5)
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.error(f"Watch for {kind} failed: {e}")
+                resource_version = None
+                self._synced[kind].clear()
+                self._stop_event.wait(5)
+
+        self._synced[kind].clear()
+
+    def _relist(self, kind: str, list_func, index: Dict[str, Any]) -> str:
+        """Replace the index with a full list and return its resourceVersion"""
+        response = list_func(namespace=self.namespace, label_selector=self.label_selector)
+
+        with self.condition:
+            index.clear()
+            index.update({item.metadata.name: item for item in response.items})
+            self._changed()
+
+        self._synced[kind].set()
+        logger.info(f"Listed {len(response.items)} {kind} (resourceVersion {response.metadata.resource_version})")
+        return response.metadata.resource_version
@@ -10,14 +10,35 @@ import time
 import logging
 import threading
 import uuid
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from kubernetes.stream import stream
+
+from .k8s_job_informer import JobInformer
+from .setup_scheduler import SetupScheduler, SetupTask
+from .rate_control import RATE_CONTROL_SCRIPT, CONTROL_FILE_PATH, ACK_PREFIX, build_rate_control_command
+
+# File nb5 writes HDR interval histograms to, inside results/<test_id>/
+HISTOGRAM_LOG_NAME = "histograms.hdr"
+
+# Sharded benchmarks run as Indexed Jobs; each pod reads its index from this
+# variable, which the kubelet also substitutes as $(JOB_COMPLETION_INDEX) in args
+SHARD_INDEX_VAR = "JOB_COMPLETION_INDEX"
+# Kubernetes cannot do arithmetic on the index, so shard i runs the cycles
+# spelled "i" followed by this many digits: i000000000..i999999999
+SHARD_CYCLE_DIGITS = 9
 
 logger = logging.getLogger(__name__)
 
+def shard_cycle_rate(cycle_rate: int, shards: int) -> str:
+    """Each shard's share of a cycle rate, as an nb5 cyclerate value"""
+    if shards <= 1:
+        return str(cycle_rate)
+    return f"{int(cycle_rate) / shards:.3f}".rstrip("0").rstrip(".")
+
 class KubernetesJobManager:
     """Manages NoSQLBench jobs in Kubernetes"""
     
@@ -47,6 +68,32 @@ class KubernetesJobManager:
         self.namespace = os.getenv('KUBERNETES_NAMESPACE', 'default')
         self.release_name = os.getenv('RELEASE_NAME', 'nosqlbench-demo')
         self.nosqlbench_image = os.getenv('NOSQLBENCH_IMAGE', 'nosqlbench/nosqlbench:5.21.8-preview')
+
+        # Benchmark jobs run under the rate control script so cyclerate can change in place
+        self.live_rate_control = os.getenv('LIVE_RATE_CONTROL', 'true').lower() == 'true'
+        self.rate_control_timeout = float(os.getenv('RATE_CONTROL_TIMEOUT', '15'))
+        self.workloads_path = os.getenv('WORKLOADS_PATH', '/app/workloads')
+
+        # HDR histogram logs of benchmark jobs go to results/<test_id>/ on the results
+        # volume (the release's data PVC when persistence is enabled, else pod-local)
+        self.capture_histograms = os.getenv('CAPTURE_HISTOGRAMS', 'true').lower() == 'true'
+        self.histogram_interval = os.getenv('HISTOGRAM_INTERVAL', '10s')
+        self.results_pvc = os.getenv('RESULTS_PVC', '')
+
+        # Live benchmarks can be split across this many pods of one Indexed Job
+        self.max_shards = int(os.getenv('MAX_SHARDS', '16'))
+
+        # Local job/pod index fed by a single label-selected watch per resource
+        self.informer = JobInformer(
+            self.batch_v1, self.core_v1, self.namespace,
+            label_selector=f"app.kubernetes.io/instance={self.release_name}"
+        )
+        self.informer.start()
+
+        # Setup phases run in parallel across workloads, capped per database
+        self.setup_scheduler = SetupScheduler(
+            default_limit=int(os.getenv('SETUP_CONCURRENCY_PER_DATABASE', '1'))
+        )
         
         logger.info(f"Initialized KubernetesJobManager for namespace: {self.namespace}")
 
@@ -87,37 +134,58 @@ class KubernetesJobManager:
             return []
     
     def get_job_status(self, job_name: str) -> Dict[str, Any]:
-        """Get status of a specific job"""
+        """Get status of a specific job, with its pods"""
+        # Served from the informer index once it is synced
+        if self.informer.is_synced():
+            job = self.informer.get_job(job_name)
+            if job is None:
+                return {"name": job_name, "status": "not_found"}
+            return self._build_job_status(job, self.informer.get_job_pods(job_name))
+
         try:
             job = self.batch_v1.read_namespaced_job(name=job_name, namespace=self.namespace)
-            
-            status = {
-                "name": job.metadata.name,
-                "active": job.status.active or 0,
-                "succeeded": job.status.succeeded or 0,
-                "failed": job.status.failed or 0,
-                "start_time": job.status.start_time,
-                "completion_time": job.status.completion_time,
-                "conditions": []
-            }
-            
-            if job.status.conditions:
-                for condition in job.status.conditions:
-                    status["conditions"].append({
-                        "type": condition.type,
-                        "status": condition.status,
-                        "reason": condition.reason,
-                        "message": condition.message,
-                        "last_transition_time": condition.last_transition_time
-                    })
-            
-            return status
+            pods = self.core_v1.list_namespaced_pod(
+                namespace=self.namespace, label_selector=f"job-name={job_name}"
+            ).items
+            return self._build_job_status(job, pods)
             
         except ApiException as e:
             if e.status == 404:
                 return {"name": job_name, "status": "not_found"}
             logger.error(f"Failed to get job status for {job_name}: {e}")
             return {"name": job_name, "status": "error", "error": str(e)}
+
+    def _build_job_status(self, job, pods: List[Any] = None) -> Dict[str, Any]:
+        """Build a status dictionary from a Job object (and its pods, when given)"""
+        # Freshly created jobs may not carry a status yet
+        job_status = job.status or client.V1JobStatus()
+
+        status = {
+            "name": job.metadata.name,
+            "active": job_status.active or 0,
+            "succeeded": job_status.succeeded or 0,
+            "failed": job_status.failed or 0,
+            "start_time": job_status.start_time,
+            "completion_time": job_status.completion_time,
+            "conditions": []
+        }
+
+        if job_status.conditions:
+            for condition in job_status.conditions:
+                status["conditions"].append({
+                    "type": condition.type,
+                    "status": condition.status,
+                    "reason": condition.reason,
+                    "message": condition.message,
+                    "last_transition_time": condition.last_transition_time
+                })
+
+        if pods is not None:
+            status["pods"] = [
+                {"name": pod.metadata.name, "phase": pod.status.phase if pod.status else None}
+                for pod in pods
+            ]
+        return status
     
     def create_setup_job(self, workload_name: str, phase: str) -> Dict[str, Any]:
         """Create a setup job for a workload phase"""
@@ -146,6 +214,7 @@ class KubernetesJobManager:
                 namespace=self.namespace,
                 body=job_spec
             )
+            self.informer.upsert_job(job)
             
             logger.info(f"Created setup job: {job_name} for {workload_name}.{phase}")
             
@@ -187,6 +256,7 @@ class KubernetesJobManager:
                 namespace=self.namespace,
                 body=job_spec
             )
+            self.informer.upsert_job(job)
             
             logger.info(f"Created benchmark job: {job_name} for {workload_name} with cycle rate {cycle_rate}")
             
@@ -271,6 +341,28 @@ class KubernetesJobManager:
             logger.error(f"Failed to run setup phases for {workload_name}: {e}")
             return {"success": False, "error": str(e)}
 
+    def run_setup_for_workloads(self, workload_names: List[str]) -> Dict[str, Any]:
+        """Run setup phases for several workloads in parallel, capped per database"""
+        tasks = []
+        for workload_name in workload_names:
+            workload_config = self.config_manager.get_workload_config(workload_name) or {}
+            tasks.append(SetupTask(
+                workload_name,
+                workload_config.get('driver', 'unknown'),
+                lambda workload_name=workload_name: self.run_setup_phases(workload_name)
+            ))
+
+        report = self.setup_scheduler.run(tasks)
+        return {
+            "results": report["results"],
+            "schedule": {
+                "critical_path": report["critical_path"],
+                "makespan_seconds": report["makespan_seconds"],
+                "serial_seconds": report["serial_seconds"],
+                "workloads": report["schedule"]
+            }
+        }
+
     def start_benchmark(self, workload_name: str, cycle_rate: int) -> Dict[str, Any]:
         """Start a benchmark job"""
         with self.lock:
@@ -328,23 +420,138 @@ class KubernetesJobManager:
             return result
 
     def update_benchmark_throughput(self, workload_name: str, new_cycle_rate: int) -> Dict[str, Any]:
-        """Update benchmark throughput by recreating the job"""
-        with self.lock:
-            # Stop current benchmark
-            stop_result = self.stop_benchmark(workload_name)
-            if not stop_result.get("success"):
-                return stop_result
+        """Update benchmark throughput in place, recreating the job as a fallback"""
+        try:
+            new_cycle_rate = int(new_cycle_rate)
+        except (TypeError, ValueError):
+            return {"success": False, "error": f"Invalid cycle rate: {new_cycle_rate}"}
+
+        job_id, job_info = self._find_benchmark_job(workload_name)
+        if job_info is not None:
+            shards = job_info.get("shards", 1)
+            if new_cycle_rate < shards:
+                return {"success": False, "error": f"Cycle rate {new_cycle_rate} is below the shard count {shards}"}
+
+            if self._update_rate_in_place(job_info["job_name"], new_cycle_rate):
+                if job_id is not None:
+                    self.state_manager.update_running_job(job_id, {"cycle_rate": new_cycle_rate})
+                logger.info(f"Updated throughput for {workload_name} to {new_cycle_rate} in place")
+                return {
+                    "success": True,
+                    "job_name": job_info["job_name"],
+                    "workload": workload_name,
+                    "cycle_rate": new_cycle_rate,
+                    "method": "live"
+                }
 
-            # Wait a moment for cleanup
-            time.sleep(2)
+            if shards > 1:
+                # The legacy restart below would drop the shards, so recreate the Indexed Job
+                stop_result = self.stop_job(job_id)
+                if not stop_result.get("success"):
+                    return stop_result
+                time.sleep(2)
+                start_result = self.start_job(workload_name, job_info["scenario"], job_info["database_id"],
+                                              new_cycle_rate, shards=shards)
+                if start_result.get("success"):
+                    start_result["method"] = "restart"
+                    logger.info(f"Updated throughput for {workload_name} to {new_cycle_rate} across {shards} shards")
+                return start_result
+
+        # Stop current benchmark
+        stop_result = self.stop_benchmark(workload_name)
+        if not stop_result.get("success"):
+            return stop_result
+
+        # Wait a moment for cleanup
+        time.sleep(2)
+
+        # Start with new cycle rate
+        start_result = self.start_benchmark(workload_name, new_cycle_rate)
+
+        if start_result.get("success"):
+            start_result["method"] = "restart"
+            logger.info(f"Updated throughput for {workload_name} to {new_cycle_rate}")
+
+        return start_result
+
+    def _find_benchmark_job(self, workload_name: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Find a workload's running benchmark job: (state job id, job info)
+
+        Jobs from start_job and start_benchmark are both tracked as running jobs;
+        a benchmark job running in the cluster without a state entry (job id None)
+        is found the way start_benchmark checks for one.
+        """
+        for job_id, job_info in self.state_manager.get_running_jobs().items():
+            if job_info.get("workload") == workload_name:
+                return job_id, job_info
+        for job in self.get_running_benchmark_jobs():
+            if job.get("workload") == workload_name:
+                return None, job
+        return None, None
+
+    def _update_rate_in_place(self, job_name: str, cycle_rate: int) -> bool:
+        """Write a cyclerate change into the job's running pods and wait for the script to apply it in all of them"""
+        job = self.informer.get_job(job_name)
+        if job is None or not (job.metadata.annotations or {}).get("nosqlbench-demo/rate-control"):
+            return False
 
-            # Start with new cycle rate
-            start_result = self.start_benchmark(workload_name, new_cycle_rate)
+        shards = int((job.metadata.annotations or {}).get("nosqlbench-demo/shards", "1"))
+        running_pods = [pod for pod in self.informer.get_job_pods(job_name)
+                        if pod.status and pod.status.phase == "Running"]
+        if len(running_pods) < shards:
+            logger.warning(f"{len(running_pods)} of {shards} pods of {job_name} running, cannot change its rate in place")
+            return False
+        pod_names = [pod.metadata.name for pod in running_pods]
 
-            if start_result.get("success"):
-                logger.info(f"Updated throughput for {workload_name} to {new_cycle_rate}")
+        # Sequence numbers must keep increasing across webapp restarts
+        seq = int(time.time() * 1000)
+        pod_rate = shard_cycle_rate(cycle_rate, shards)
+        control_tmp = f"{CONTROL_FILE_PATH}.tmp"
+        command = ["sh", "-c", f"echo '{seq} {pod_rate}' > {control_tmp} && mv {control_tmp} {CONTROL_FILE_PATH}"]
 
-            return start_result
+        for pod_name in pod_names:
+            try:
+                # stream() patches the API client it is given, so use a dedicated one
+                stream(client.CoreV1Api().connect_get_namespaced_pod_exec, pod_name, self.namespace,
+                       container="nosqlbench", command=command,
+                       stderr=True, stdin=False, stdout=True, tty=False)
+            except Exception as e:
+                logger.warning(f"Failed to write rate control file in {pod_name}: {e}")
+                return False
+
+        marker = f"{ACK_PREFIX} seq={seq} "
+        pending = set(pod_names)
+        deadline = time.time() + self.rate_control_timeout
+        while pending and time.time() < deadline:
+            for pod_name in list(pending):
+                try:
+                    log = self.core_v1.read_namespaced_pod_log(
+                        pod_name, self.namespace, container="nosqlbench",
+                        since_seconds=int(self.rate_control_timeout) + 5
+                    )
+                    if marker in log:
+                        pending.discard(pod_name)
+                except ApiException as e:
+                    logger.warning(f"Failed to read logs of {pod_name}: {e}")
+            if pending:
+                time.sleep(1)
+
+        if pending:
+            logger.warning(f"No acknowledgement of rate change from {', '.join(sorted(pending))}, recreating the job")
+            return False
+        return True
+
+    def _with_rate_control(self, cmd: List[str], workload_file: str, workload_arg: str, phase: str) -> List[str]:
+        """Run a benchmark command under the rate control script, or leave it unchanged if that fails"""
+        try:
+            return build_rate_control_command(
+                cmd, workload_arg, phase,
+                os.path.join(self.workloads_path, workload_file),
+                f"/workloads/{RATE_CONTROL_SCRIPT}", CONTROL_FILE_PATH
+            )
+        except Exception as e:
+            logger.warning(f"Live rate control unavailable for {workload_file} {phase}: {e}")
+            return cmd
 
     def get_setup_status(self) -> Dict[str, bool]:
         """Get setup status for all workloads"""
@@ -372,9 +579,7 @@ class KubernetesJobManager:
                 job_status = self.get_job_status(job_name)
 
                 # Check if job is still running
-                if (job_status.get("succeeded", 0) > 0 or
-                    job_status.get("failed", 0) > 0 or
-                    job_status.get("status") == "not_found"):
+                if self._is_job_finished(job_status, benchmark_info.get("shards", 1)):
                     # Job completed or failed, remove from running
                     self.state_manager.remove_running_benchmark(workload)
                     logger.info(f"Benchmark job {job_name} for {workload} completed")
@@ -384,14 +589,29 @@ class KubernetesJobManager:
 
             return self.state_manager.get_running_benchmarks()
 
+    def _is_job_finished(self, job_status: Dict[str, Any], shards: int = 1) -> bool:
+        """Whether a job is over; an Indexed Job only once Kubernetes marks it Complete or Failed"""
+        if job_status.get("status") == "not_found":
+            return True
+        if shards > 1:
+            # One shard finishing or being retried does not end the group
+            return any(condition["type"] in ("Complete", "Failed") and condition["status"] == "True"
+                       for condition in job_status.get("conditions", []))
+        return job_status.get("succeeded", 0) > 0 or job_status.get("failed", 0) > 0
+
     def get_running_benchmark_jobs(self) -> List[Dict[str, Any]]:
         """Get list of running benchmark jobs from Kubernetes"""
         try:
-            jobs = self.list_jobs(label_selector=f"app.kubernetes.io/instance={self.release_name},job-type=benchmark")
+            if self.informer.is_synced():
+                jobs = self.informer.list_jobs(
+                    lambda job: (job.metadata.labels or {}).get("job-type") == "benchmark"
+                )
+            else:
+                jobs = self.list_jobs(label_selector=f"app.kubernetes.io/instance={self.release_name},job-type=benchmark")
 
             running_jobs = []
             for job in jobs:
-                if job.status.active and job.status.active > 0:
+                if job.status and job.status.active and job.status.active > 0:
                     # Extract workload name from job name
                     job_name = job.metadata.name
                     workload = self._extract_workload_from_job_name(job_name)
@@ -408,8 +628,9 @@ class KubernetesJobManager:
             logger.error(f"Failed to get running benchmark jobs: {e}")
             return []
 
-    def start_job(self, workload_name: str, scenario: str, database_id: str, cycle_rate: int = 10) -> Dict[str, Any]:
-        """Start a job for a specific workload scenario and database"""
+    def start_job(self, workload_name: str, scenario: str, database_id: str, cycle_rate: int = 10,
+                  shards: int = 1) -> Dict[str, Any]:
+        """Start a job for a specific workload scenario and database, as an Indexed Job of `shards` pods"""
         try:
             # Get database configuration
             database_config = self.state_manager.get_database(database_id)
@@ -424,6 +645,20 @@ class KubernetesJobManager:
             if not workload_config:
                 return {"success": False, "error": f"Unknown workload: {workload_name}"}
 
+            try:
+                shards = int(shards or 1)
+            except (TypeError, ValueError):
+                return {"success": False, "error": f"Invalid shard count: {shards}"}
+            if not 1 <= shards <= self.max_shards:
+                return {"success": False, "error": f"Shard count must be between 1 and {self.max_shards}"}
+            if shards > 1:
+                if scenario != "live":
+                    return {"success": False, "error": "Only live scenarios can be sharded"}
+                if not workload_config.get("cycles_param"):
+                    return {"success": False, "error": f"Workload {workload_name} has no cycles_param to shard by"}
+                if int(cycle_rate) < shards:
+                    return {"success": False, "error": f"Cycle rate {cycle_rate} is below the shard count {shards}"}
+
             # Generate job ID and name (shortened to fit Kubernetes 63-char limit)
             # Use abbreviated workload names to save space
             workload_abbrev = self._abbreviate_workload_name(workload_name)
@@ -445,7 +680,8 @@ class KubernetesJobManager:
                 workload_name=workload_name,
                 scenario=scenario,
                 database_config=database_config,
-                cycle_rate=cycle_rate
+                cycle_rate=cycle_rate,
+                shards=shards
             )
 
             # Create the job
@@ -453,6 +689,7 @@ class KubernetesJobManager:
                 namespace=self.namespace,
                 body=job_spec
             )
+            self.informer.upsert_job(job)
 
             # Track the running job
             job_info = {
@@ -461,13 +698,15 @@ class KubernetesJobManager:
                 "database_id": database_id,
                 "database_name": database_config.get("name"),
                 "cycle_rate": cycle_rate,
+                "shards": shards,
                 "job_name": job_name,
                 "status": "running"
             }
 
             self.state_manager.add_running_job(job_id, job_info)
 
-            logger.info(f"Started {scenario} job for {workload_name} on {database_config.get('name')}: {job_name}")
+            logger.info(f"Started {scenario} job for {workload_name} on {database_config.get('name')}: {job_name}"
+                        + (f" ({shards} shards)" if shards > 1 else ""))
 
             return {
                 "success": True,
@@ -475,7 +714,8 @@ class KubernetesJobManager:
                 "job_name": job_name,
                 "workload": workload_name,
                 "scenario": scenario,
-                "database": database_config.get("name")
+                "database": database_config.get("name"),
+                "shards": shards
             }
 
         except Exception as e:
@@ -507,6 +747,17 @@ class KubernetesJobManager:
             logger.error(f"Failed to stop job {job_id}: {e}")
             return {"success": False, "error": str(e)}
 
+    def get_workload_for_test_id(self, test_id: str) -> str:
+        """Get the workload a metrics test id belongs to (the test id itself if none matches)"""
+        prefixes = {}
+        for workload_name, workload_config in self.config_manager.get_all_workload_configs().items():
+            prefixes[workload_name] = workload_name
+            if workload_config.get("file"):
+                prefixes[workload_config["file"]] = workload_name
+
+        matches = [prefix for prefix in prefixes if test_id.startswith(f"{prefix}_")]
+        return prefixes[max(matches, key=len)] if matches else test_id
+
     def get_running_jobs(self) -> Dict[str, Any]:
         """Get all running jobs with updated status"""
         try:
@@ -519,9 +770,7 @@ class KubernetesJobManager:
                     job_status = self.get_job_status(job_name)
 
                     # Check if job completed or failed
-                    if (job_status.get("succeeded", 0) > 0 or
-                        job_status.get("failed", 0) > 0 or
-                        job_status.get("status") == "not_found"):
+                    if self._is_job_finished(job_status, job_info.get("shards", 1)):
                         # Job completed, remove from running
                         self.state_manager.remove_running_job(job_id)
                         logger.info(f"Job {job_id} completed")
@@ -579,6 +828,7 @@ class KubernetesJobManager:
     def cleanup(self):
         """Cleanup resources"""
         logger.info("Cleaning up KubernetesJobManager resources")
+        self.informer.stop()
         # Could implement cleanup of old jobs here if needed
 
     def _build_job_spec(self, job_name: str, workload_name: str, workload_config: Dict[str, Any],
@@ -589,7 +839,14 @@ class KubernetesJobManager:
         db_config = self.config_manager.get_database_config()
 
         # Build NoSQLBench command
-        cmd = self._build_nosqlbench_command(workload_config, phase, cycle_rate, db_config)
+        test_id = f"{workload_config['file']}_{phase}_{uuid.uuid4().hex[:8]}" if cycle_rate else None
+        cmd = self._build_nosqlbench_command(workload_config, phase, cycle_rate, db_config, test_id)
+        annotations = {}
+        if job_type == "benchmark" and self.live_rate_control:
+            live_cmd = self._with_rate_control(cmd, workload_config["file"], workload_config["file"], phase)
+            if live_cmd is not cmd:
+                cmd = live_cmd
+                annotations["nosqlbench-demo/rate-control"] = CONTROL_FILE_PATH
 
         # Build environment variables
         env_vars = self._build_environment_variables(workload_config, db_config)
@@ -608,7 +865,8 @@ class KubernetesJobManager:
                     "job-type": job_type,
                     "workload": workload_name,
                     "phase": phase.replace(".", "-")
-                }
+                },
+                "annotations": annotations
             },
             "spec": {
                 "ttlSecondsAfterFinished": 3600,  # Clean up after 1 hour
@@ -648,14 +906,25 @@ class KubernetesJobManager:
             }
         }
 
+        self._add_results_volume(job_spec, test_id)
+
         return job_spec
 
     def _build_scenario_job_spec(self, job_name: str, workload_name: str, scenario: str,
-                                database_config: Dict[str, Any], cycle_rate: int) -> Dict[str, Any]:
+                                database_config: Dict[str, Any], cycle_rate: int,
+                                shards: int = 1) -> Dict[str, Any]:
         """Build Kubernetes Job specification for a scenario-based job"""
 
         # Build NoSQLBench command for scenario
-        cmd = self._build_scenario_command(workload_name, scenario, database_config, cycle_rate)
+        test_id = f"{workload_name}_{scenario}_{database_config.get('id', 'unknown')[:8]}_{uuid.uuid4().hex[:8]}"
+        cmd = self._build_scenario_command(workload_name, scenario, database_config, cycle_rate, test_id, shards)
+        annotations = {}
+        if scenario == "live" and self.live_rate_control:
+            workload_file = self.config_manager.get_workload_config(workload_name).get("file", f"{workload_name}.yaml")
+            live_cmd = self._with_rate_control(cmd, workload_file, f"/workloads/{workload_file}", scenario)
+            if live_cmd is not cmd:
+                cmd = live_cmd
+                annotations["nosqlbench-demo/rate-control"] = CONTROL_FILE_PATH
 
         # Build environment variables for database connection
         env_vars = self._build_database_environment_variables(database_config)
@@ -674,7 +943,8 @@ class KubernetesJobManager:
                     "workload": self._abbreviate_workload_name(workload_name),
                     "scenario": scenario,
                     "database-id": database_config.get("id", "unknown")[:8]
-                }
+                },
+                "annotations": annotations
             },
             "spec": {
                 "ttlSecondsAfterFinished": 3600,  # Clean up after 1 hour
@@ -688,7 +958,9 @@ class KubernetesJobManager:
                             "job-type": "benchmark",
                             "workload": self._abbreviate_workload_name(workload_name),
                             "scenario": scenario
-                        }
+                        },
+                        # Lets pod telemetry label usage with the instance nb5 reports as
+                        "annotations": {"nosqlbench-demo/test-id": test_id}
                     },
                     "spec": {
                         "restartPolicy": "Never",
@@ -715,11 +987,56 @@ class KubernetesJobManager:
             }
         }
 
+        if shards > 1:
+            self._make_indexed(job_spec, job_name, shards)
+
+        if scenario == "live":
+            self._add_results_volume(job_spec, test_id, shards)
+
         return job_spec
 
+    def _make_indexed(self, job_spec: Dict[str, Any], job_name: str, shards: int):
+        """Turn a job into an Indexed Job running all its shards at once under one group label"""
+        job_spec["spec"].update({
+            "completionMode": "Indexed",
+            "completions": shards,
+            "parallelism": shards
+        })
+        job_spec["metadata"]["labels"]["shard-group"] = job_name
+        job_spec["spec"]["template"]["metadata"]["labels"]["shard-group"] = job_name
+        job_spec["metadata"]["annotations"]["nosqlbench-demo/shards"] = str(shards)
+
+    def _add_results_volume(self, job_spec: Dict[str, Any], test_id: str, shards: int = 1):
+        """Mount results/<test_id>/ (results/<test_id>-s<n>/ per shard) at /results/<test_id> for the job's histogram logs"""
+        if not self.capture_histograms or not test_id:
+            return
+
+        pod_spec = job_spec["spec"]["template"]["spec"]
+        mount = {"name": "results", "mountPath": f"/results/{test_id}"}
+        if self.results_pvc:
+            # The kubelet creates the subPath directory on the shared volume
+            if shards > 1:
+                mount["subPathExpr"] = f"results/{test_id}-s$({SHARD_INDEX_VAR})"
+            else:
+                mount["subPath"] = f"results/{test_id}"
+            volume = {"name": "results", "persistentVolumeClaim": {"claimName": self.results_pvc}}
+        else:
+            volume = {"name": "results", "emptyDir": {}}
+
+        pod_spec["containers"][0]["volumeMounts"].append(mount)
+        pod_spec["volumes"].append(volume)
+        job_spec["metadata"]["annotations"]["nosqlbench-demo/test-id"] = test_id
+
+    def _histogram_args(self, test_id: str) -> List[str]:
+        """nb5 options writing HDR interval histograms of all timers for a run"""
+        if not self.capture_histograms:
+            return []
+        return [f"--log-histograms=/results/{test_id}/{HISTOGRAM_LOG_NAME}:.*:{self.histogram_interval}"]
+
     def _build_scenario_command(self, workload_name: str, scenario: str,
-                               database_config: Dict[str, Any], cycle_rate: int) -> List[str]:
-        """Build NoSQLBench command for a specific scenario"""
+                               database_config: Dict[str, Any], cycle_rate: int,
+                               test_id: str = None, shards: int = 1) -> List[str]:
+        """Build NoSQLBench command for a specific scenario, or for each shard of an Indexed Job"""
 
         # Get workload file name
         workload_config = self.config_manager.get_workload_config(workload_name)
@@ -774,7 +1091,12 @@ class KubernetesJobManager:
 
         # Add cycle rate for live scenarios
         if scenario == "live" and cycle_rate:
-            cmd.append(f"cyclerate={cycle_rate}")
+            cmd.append(f"cyclerate={shard_cycle_rate(cycle_rate, shards)}")
+
+        # Each shard takes its own block of cycles, picked by the kubelet from the pod's index
+        if shards > 1:
+            index = f"$({SHARD_INDEX_VAR})"
+            cmd.append(f"{workload_config['cycles_param']}={index}{'0' * SHARD_CYCLE_DIGITS}..{index}{'9' * SHARD_CYCLE_DIGITS}")
 
         # Add common parameters
         cmd.extend([
@@ -783,19 +1105,29 @@ class KubernetesJobManager:
         ])
 
         # Add metrics reporting
-        metrics_endpoint = self.config_manager.get_metrics_endpoint()
-        test_id = f"{workload_name}_{scenario}_{database_config.get('id', 'unknown')[:8]}_{uuid.uuid4().hex[:8]}"
-        metrics_url = f"{metrics_endpoint}/api/v1/import/prometheus/metrics/job/nosqlbench/instance/{test_id}"
+        metrics_endpoint = self.config_manager.get_metrics_push_endpoint()
+        if test_id is None:
+            test_id = f"{workload_name}_{scenario}_{database_config.get('id', 'unknown')[:8]}_{uuid.uuid4().hex[:8]}"
+
+        # Shards report as <test_id>-s<n>, all labelled group:<test_id>
+        instance = f"{test_id}-s$({SHARD_INDEX_VAR})" if shards > 1 else test_id
+        metrics_url = f"{metrics_endpoint}/api/v1/import/prometheus/metrics/job/nosqlbench/instance/{instance}"
 
         # Sanitize database name for Prometheus labels
         # Note: Don't include workload/scenario labels here as they conflict with workload YAML definitions
         sanitized_db_name = self._sanitize_label_value(database_config.get('name', 'unknown'))
 
+        labels = f"job:nosqlbench,instance:{instance},database:{sanitized_db_name}"
+        if shards > 1:
+            labels += f",group:{test_id}"
+
         cmd.extend([
             f"--report-prompush-to={metrics_url}",
-            f"--add-labels=job:nosqlbench,instance:{test_id},database:{sanitized_db_name}",
+            f"--add-labels={labels}",
             "--report-interval=10"
         ])
+        if scenario == "live":
+            cmd.extend(self._histogram_args(test_id))
 
         return cmd
 
@@ -838,7 +1170,8 @@ class KubernetesJobManager:
 
 
     def _build_nosqlbench_command(self, workload_config: Dict[str, Any], phase: str,
-                                 cycle_rate: int = None, db_config: Dict[str, Any] = None) -> List[str]:
+                                 cycle_rate: int = None, db_config: Dict[str, Any] = None,
+                                 test_id: str = None) -> List[str]:
         """Build NoSQLBench command arguments"""
 
         cmd = [
@@ -904,8 +1237,9 @@ class KubernetesJobManager:
 
         # Add metrics reporting only for benchmark jobs, not setup jobs
         if cycle_rate:  # This is a benchmark job
-            metrics_endpoint = self.config_manager.get_metrics_endpoint()
-            test_id = f"{workload_config['file']}_{phase}_{uuid.uuid4().hex[:8]}"
+            metrics_endpoint = self.config_manager.get_metrics_push_endpoint()
+            if test_id is None:
+                test_id = f"{workload_config['file']}_{phase}_{uuid.uuid4().hex[:8]}"
             metrics_url = f"{metrics_endpoint}/api/v1/import/prometheus/metrics/job/nosqlbench/instance/{test_id}"
 
             cmd.extend([
@@ -913,6 +1247,7 @@ class KubernetesJobManager:
                 f"--add-labels=job:nosqlbench,instance:{test_id},db_type:{driver}",
                 "--report-interval=10"
             ])
+            cmd.extend(self._histogram_args(test_id))
 
         return cmd
 
@@ -972,6 +1307,8 @@ class KubernetesJobManager:
 
         while time.time() - start_time < timeout:
             try:
+                # Capture the index generation before reading so no update is missed
+                generation = self.informer.generation
                 job_status = self.get_job_status(job_name)
 
                 if job_status.get("succeeded", 0) > 0:
@@ -984,8 +1321,12 @@ class KubernetesJobManager:
                     logger.error(f"Job {job_name} not found")
                     return False
 
-                # Job is still running, wait
-                time.sleep(10)
+                # Job is still running; wake on the next watch event, or poll if the informer is down
+                if self.informer.is_synced():
+                    remaining = timeout - (time.time() - start_time)
+                    self.informer.wait_for_change(generation, timeout=max(0, remaining))
+                else:
+                    time.sleep(10)
 
             except Exception as e:
                 logger.error(f"Error checking job status for {job_name}: {e}")
@@ -7,14 +7,27 @@ import os
 import json
 import logging
 import threading
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 
+from .k8s_state_persister import ConfigMapStatePersister
+
 logger = logging.getLogger(__name__)
 
+# Persisted shards and the state sections they hold; each shard is its own
+# ConfigMap so job churn does not rewrite the database catalog
+STATE_SHARDS = {
+    "databases": "configured_databases",
+    "jobs": "running_jobs",
+    "campaigns": "campaigns"
+}
+
+# Finished campaign checkpoints kept in the campaigns ConfigMap (1 MiB limit)
+MAX_FINISHED_CAMPAIGNS = 50
+
 class KubernetesStateManager:
     """Manages persistent application state using Kubernetes ConfigMaps"""
     
@@ -46,8 +59,16 @@ class KubernetesStateManager:
         self._state = {
             "configured_databases": {},  # {db_id: {type, host, port, name, username, password, verified}}
             "running_jobs": {},  # {job_id: {workload, scenario, database_id, start_time, cycle_rate}}
+            "campaigns": {},  # {campaign_id: campaign checkpoint}
             "last_updated": datetime.now().isoformat()
         }
+
+        self.persister = ConfigMapStatePersister(
+            self.core_v1, self.namespace, self.release_name,
+            shards={shard: f"{self.state_configmap_name}-{shard}" for shard in STATE_SHARDS},
+            on_remote_change=self._apply_remote_shard,
+            batch_window_seconds=float(os.getenv('STATE_BATCH_WINDOW_SECONDS', '0.5'))
+        )
         
         # Load existing state
         self.load_state()
@@ -55,75 +76,68 @@ class KubernetesStateManager:
         logger.info(f"Initialized KubernetesStateManager for namespace: {self.namespace}")
     
     def load_state(self):
-        """Load state from Kubernetes ConfigMap"""
+        """Load state from the shard ConfigMaps, migrating the legacy single ConfigMap if needed"""
+        legacy_state = None
+        for shard, section in STATE_SHARDS.items():
+            try:
+                entries = self.persister.load(shard)
+                if entries is None:
+                    if legacy_state is None:
+                        legacy_state = self._load_legacy_state()
+                    entries = legacy_state.get(section, {})
+                    for key, value in entries.items():
+                        self.persister.record(shard, key, value)
+                with self.lock:
+                    self._state[section] = entries
+                logger.info(f"Loaded {len(entries)} {section} from ConfigMap {self.persister.shards[shard]}")
+            except Exception as e:
+                logger.error(f"Failed to load {section} state: {e}")
+
+    def _load_legacy_state(self) -> Dict[str, Any]:
+        """Read state written as one document by earlier versions"""
         try:
             configmap = self.core_v1.read_namespaced_config_map(
                 name=self.state_configmap_name,
                 namespace=self.namespace
             )
-            
-            if 'state.json' in configmap.data:
-                state_data = json.loads(configmap.data['state.json'])
-                self._state.update(state_data)
-                logger.info(f"Loaded state from ConfigMap {self.state_configmap_name}")
-            
+            if 'state.json' in (configmap.data or {}):
+                logger.info(f"Migrating state from ConfigMap {self.state_configmap_name}")
+                return json.loads(configmap.data['state.json'])
         except ApiException as e:
-            if e.status == 404:
-                logger.info("State ConfigMap not found, will create new one")
-                self.save_state()
-            else:
+            if e.status != 404:
                 logger.error(f"Failed to load state from ConfigMap: {e}")
         except Exception as e:
             logger.error(f"Failed to parse state data: {e}")
+        return {}
+
+    def _apply_remote_shard(self, shard: str, entries: Dict[str, Any], pending_keys):
+        """Adopt entries written by another replica, keeping our unsaved changes"""
+        section = STATE_SHARDS[shard]
+        with self.lock:
+            local = self._state.setdefault(section, {})
+            for key in list(local):
+                if key not in entries and key not in pending_keys:
+                    del local[key]
+            for key, value in entries.items():
+                if key not in pending_keys:
+                    local[key] = value
+
+    def _record(self, section: str, key: str, value: Any = None):
+        """Queue a state entry for persistence (lock must be held); None deletes it"""
+        self._state["last_updated"] = datetime.now().isoformat()
+        shard = next(shard for shard, shard_section in STATE_SHARDS.items() if shard_section == section)
+        if value is None:
+            self.persister.record(shard, key)
+        else:
+            self.persister.record(shard, key, dict(value))
     
     def save_state(self):
-        """Save state to Kubernetes ConfigMap"""
-        try:
-            # Get a copy of the state to avoid holding the lock during API calls
-            with self.lock:
-                state_copy = self._state.copy()
-                state_copy["last_updated"] = datetime.now().isoformat()
-
-            state_json = json.dumps(state_copy, indent=2)
-
-            configmap_body = {
-                "apiVersion": "v1",
-                "kind": "ConfigMap",
-                "metadata": {
-                    "name": self.state_configmap_name,
-                    "namespace": self.namespace,
-                    "labels": {
-                        "app.kubernetes.io/name": "nosqlbench-demo",
-                        "app.kubernetes.io/instance": self.release_name,
-                        "app.kubernetes.io/component": "state"
-                    }
-                },
-                "data": {
-                    "state.json": state_json
-                }
-            }
-
-            try:
-                # Try to update existing ConfigMap
-                self.core_v1.patch_namespaced_config_map(
-                    name=self.state_configmap_name,
-                    namespace=self.namespace,
-                    body=configmap_body
-                )
-            except ApiException as e:
-                if e.status == 404:
-                    # ConfigMap doesn't exist, create it
-                    self.core_v1.create_namespaced_config_map(
-                        namespace=self.namespace,
-                        body=configmap_body
-                    )
-                else:
-                    raise
-
-            logger.debug(f"Saved state to ConfigMap {self.state_configmap_name}")
+        """Write pending state changes to the ConfigMaps now"""
+        self.persister.flush()
 
-        except Exception as e:
-            logger.error(f"Failed to save state to ConfigMap: {e}")
+    def close(self):
+        """Flush pending state changes and stop the background writer"""
+        self.persister.stop()
     
     def get_state(self) -> Dict[str, Any]:
         """Get current state as dictionary"""
@@ -152,13 +166,7 @@ class KubernetesStateManager:
                     self._state["configured_databases"] = {}
 
                 self._state["configured_databases"][db_id] = database_config
-
-            # Save state outside of lock to avoid blocking
-            try:
-                self.save_state()
-            except Exception as save_error:
-                logger.error(f"Failed to save state after adding database: {save_error}")
-                # Don't fail the operation if save fails
+                self._record("configured_databases", db_id, database_config)
 
             logger.info(f"Added database {database_config['name']} ({database_config['type']}) with ID {db_id}")
 
@@ -185,12 +193,7 @@ class KubernetesStateManager:
 
                 db_name = self._state["configured_databases"][db_id].get('name', db_id)
                 del self._state["configured_databases"][db_id]
-
-            # Save state outside of lock
-            try:
-                self.save_state()
-            except Exception as save_error:
-                logger.error(f"Failed to save state after removing database: {save_error}")
+                self._record("configured_databases", db_id)
 
             logger.info(f"Removed database {db_name} with ID {db_id}")
 
@@ -216,13 +219,7 @@ class KubernetesStateManager:
 
                 self._state["configured_databases"][db_id]["verified"] = verified
                 self._state["configured_databases"][db_id]["verified_at"] = datetime.now().isoformat()
-
-            # Save state outside of lock to avoid blocking
-            try:
-                self.save_state()
-            except Exception as save_error:
-                logger.error(f"Failed to save state after updating verification: {save_error}")
-                # Don't fail the operation if save fails
+                self._record("configured_databases", db_id, self._state["configured_databases"][db_id])
 
             return {"success": True}
 
@@ -256,12 +253,7 @@ class KubernetesStateManager:
 
             job_info['start_time'] = datetime.now().isoformat()
             self._state["running_jobs"][job_id] = job_info
-
-        # Save state outside of lock
-        try:
-            self.save_state()
-        except Exception as save_error:
-            logger.error(f"Failed to save state after adding job: {save_error}")
+            self._record("running_jobs", job_id, job_info)
 
         logger.info(f"Added running job: {job_id}")
 
@@ -271,17 +263,21 @@ class KubernetesStateManager:
         with self.lock:
             if job_id in self._state.get("running_jobs", {}):
                 del self._state["running_jobs"][job_id]
+                self._record("running_jobs", job_id)
                 removed = True
 
         if removed:
-            # Save state outside of lock
-            try:
-                self.save_state()
-            except Exception as save_error:
-                logger.error(f"Failed to save state after removing job: {save_error}")
-
             logger.info(f"Removed running job: {job_id}")
 
+    def update_running_job(self, job_id: str, updates: Dict[str, Any]):
+        """Update fields of a running job"""
+        with self.lock:
+            job_info = self._state.get("running_jobs", {}).get(job_id)
+            if job_info is None:
+                return
+            job_info.update(updates)
+            self._record("running_jobs", job_id, job_info)
+
     def get_running_jobs(self) -> Dict[str, Any]:
         """Get all running jobs"""
         with self.lock:
@@ -292,6 +288,26 @@ class KubernetesStateManager:
         with self.lock:
             return job_id in self._state.get("running_jobs", {})
 
+    def save_campaign(self, checkpoint: Dict[str, Any]):
+        """Insert or update a campaign checkpoint"""
+        with self.lock:
+            campaigns = self._state.setdefault("campaigns", {})
+            campaigns[checkpoint["campaign_id"]] = checkpoint
+            self._record("campaigns", checkpoint["campaign_id"], checkpoint)
+
+            finished = sorted((c for c in campaigns.values() if c.get("status") in ("completed", "failed", "cancelled")),
+                              key=lambda c: c.get("created_at", 0))
+            for expired in finished[:max(len(finished) - MAX_FINISHED_CAMPAIGNS, 0)]:
+                del campaigns[expired["campaign_id"]]
+                self._record("campaigns", expired["campaign_id"])
+
+    def get_campaigns(self, statuses: List[str] = None) -> List[Dict[str, Any]]:
+        """Get campaign checkpoints, newest first, optionally only in the given states"""
+        with self.lock:
+            campaigns = [checkpoint for checkpoint in self._state.get("campaigns", {}).values()
+                         if not statuses or checkpoint.get("status") in statuses]
+        return sorted(campaigns, key=lambda checkpoint: checkpoint.get("created_at", 0), reverse=True)
+
     # Legacy methods for backward compatibility
     def add_running_benchmark(self, workload: str, job_name: str, cycle_rate: int, start_time: float):
         """Add a running benchmark (legacy)"""
@@ -314,8 +330,8 @@ class KubernetesStateManager:
                 if job_info.get("workload") == workload:
                     jobs_to_remove.append(job_id)
 
-            for job_id in jobs_to_remove:
-                self.remove_running_job(job_id)
+        for job_id in jobs_to_remove:
+            self.remove_running_job(job_id)
 
     def get_running_benchmarks(self) -> Dict[str, Dict[str, Any]]:
         """Get all running benchmarks (legacy)"""
@@ -354,12 +370,17 @@ class KubernetesStateManager:
     def reset_state(self):
         """Reset all state (for testing/debugging)"""
         with self.lock:
+            for section in STATE_SHARDS.values():
+                for key in list(self._state.get(section, {})):
+                    self._record(section, key)
             self._state = {
+                "configured_databases": {},
+                "running_jobs": {},
+                "campaigns": {},
                 "setup_completed": {},
                 "running_benchmarks": {},
                 "last_updated": datetime.now().isoformat()
             }
-        self.save_state()
         logger.info("Reset application state")
     
     def get_metrics(self) -> Dict[str, Any]:
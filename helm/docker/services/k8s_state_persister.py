@@ -0,0 +1,213 @@
+"""
+Kubernetes State Persister for NoSQLBench Demo
+Batches state changes into sharded ConfigMaps with optimistic concurrency
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, Callable, Optional, Set
+
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+# Marks an entry removed in a pending change set
+DELETED = object()
+
+class ConfigMapStatePersister:
+    """Persists keyed state shards to one ConfigMap each, in batches
+
+    Changes are recorded per entry and written together `batch_window_seconds`
+    after the first one. Each write replaces the shard's ConfigMap at the
+    resourceVersion last seen; on a conflict the latest version is read back,
+    other writers' entries are adopted (through `on_remote_change`) and our
+    pending entries are reapplied on top before retrying. Changes that cannot
+    be written are kept for the next batch, which is held back (doubling up
+    to MAX_BACKOFF_SECONDS) while writes keep failing.
+    """
+
+    DATA_KEY = "state.json"
+    MAX_ATTEMPTS = 5
+    MAX_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, core_v1, namespace: str, release_name: str, shards: Dict[str, str],
+                 on_remote_change: Callable[[str, Dict[str, Any], Set[str]], None],
+                 batch_window_seconds: float = 0.5):
+        self.core_v1 = core_v1
+        self.namespace = namespace
+        self.release_name = release_name
+        self.shards = shards  # {shard: configmap name}
+        self.on_remote_change = on_remote_change
+        self.batch_window_seconds = batch_window_seconds
+
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}  # {shard: {key: value | DELETED}}
+        self._dirty_since: Optional[float] = None
+        self._retry_at = 0.0
+        self._backoff = 0.0
+        self._remote: Dict[str, Dict[str, Any]] = {shard: {} for shard in shards}
+        self._versions: Dict[str, Optional[str]] = {shard: None for shard in shards}
+        self._stopped = False
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def load(self, shard: str) -> Optional[Dict[str, Any]]:
+        """Read a shard's entries, or None if its ConfigMap does not exist yet"""
+        with self.write_lock:
+            return self._read(shard)
+
+    def record(self, shard: str, key: str, value: Any = DELETED):
+        """Queue an entry change (value omitted = delete) for the next batch"""
+        with self.condition:
+            if self._stopped:
+                return
+            self._pending.setdefault(shard, {})[key] = value
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self.condition.notify()
+
+    def flush(self):
+        """Write all pending changes now (blocking)"""
+        with self.condition:
+            self._dirty_since = None
+        with self.write_lock:
+            for shard in self.shards:
+                self._flush_shard(shard)
+
+    def stop(self):
+        """Flush pending changes and stop the writer thread"""
+        self.flush()
+        with self.condition:
+            self._stopped = True
+            self.condition.notify()
+
+    def _writer_loop(self):
+        """Write each batch once its window has elapsed"""
+        while True:
+            with self.condition:
+                while self._dirty_since is None and not self._stopped:
+                    self.condition.wait()
+                if self._stopped:
+                    return
+
+                due = max(self._dirty_since + self.batch_window_seconds, self._retry_at)
+                now = time.monotonic()
+                if now < due:
+                    self.condition.wait(due - now)
+                    continue
+                self._dirty_since = None
+
+            try:
+                with self.write_lock:
+                    for shard in self.shards:
+                        self._flush_shard(shard)
+            except Exception as e:
+                logger.error(f"State writer error: {e}")
+
+    def _flush_shard(self, shard: str):
+        """Write a shard's pending changes, merging with concurrent writers (write lock held)"""
+        with self.condition:
+            changes = self._pending.pop(shard, None)
+        if not changes:
+            return
+
+        for attempt in range(self.MAX_ATTEMPTS):
+            entries = dict(self._remote[shard])
+            for key, value in changes.items():
+                if value is DELETED:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = value
+
+            try:
+                configmap = self._write(shard, entries)
+                self._remote[shard] = entries
+                self._versions[shard] = configmap.metadata.resource_version
+                logger.debug(f"Saved {len(changes)} change(s) to ConfigMap {self.shards[shard]}")
+                with self.condition:
+                    self._retry_at = 0.0
+                    self._backoff = 0.0
+                return
+            except ApiException as e:
+                if e.status == 409:
+                    logger.info(f"ConfigMap {self.shards[shard]} changed concurrently, merging (attempt {attempt + 1})")
+                elif e.status == 404:
+                    logger.info(f"ConfigMap {self.shards[shard]} was deleted, recreating")
+                else:
+                    logger.error(f"Failed to save ConfigMap {self.shards[shard]}: {e}")
+                    break
+            except Exception as e:
+                # Connection errors and timeouts from the API client
+                logger.error(f"Failed to save ConfigMap {self.shards[shard]}: {e}")
+                break
+
+            try:
+                with self.condition:
+                    pending_keys = set(changes) | set(self._pending.get(shard, {}))
+                remote = self._read(shard)
+                if remote is not None:
+                    self.on_remote_change(shard, remote, pending_keys)
+            except Exception as e:
+                logger.error(f"Failed to reload ConfigMap {self.shards[shard]}: {e}")
+                break
+        else:
+            logger.error(f"Giving up saving ConfigMap {self.shards[shard]} after {self.MAX_ATTEMPTS} conflicts")
+
+        # Keep the changes for the next batch, under anything recorded since, and back off
+        with self.condition:
+            self._pending[shard] = {**changes, **self._pending.get(shard, {})}
+            self._backoff = min(max(self._backoff * 2, self.batch_window_seconds, 1.0), self.MAX_BACKOFF_SECONDS)
+            self._retry_at = time.monotonic() + self._backoff
+            if self._dirty_since is None and not self._stopped:
+                self._dirty_since = time.monotonic()
+                self.condition.notify()
+
+    def _read(self, shard: str) -> Optional[Dict[str, Any]]:
+        """Fetch a shard's entries and remember its resourceVersion"""
+        try:
+            configmap = self.core_v1.read_namespaced_config_map(
+                name=self.shards[shard],
+                namespace=self.namespace
+            )
+        except ApiException as e:
+            if e.status == 404:
+                self._remote[shard] = {}
+                self._versions[shard] = None
+                return None
+            raise
+
+        entries = json.loads((configmap.data or {}).get(self.DATA_KEY) or "{}")
+        self._remote[shard] = entries
+        self._versions[shard] = configmap.metadata.resource_version
+        return dict(entries)
+
+    def _write(self, shard: str, entries: Dict[str, Any]):
+        """Create the shard ConfigMap, or replace it at the last seen resourceVersion"""
+        metadata = {
+            "name": self.shards[shard],
+            "namespace": self.namespace,
+            "labels": {
+                "app.kubernetes.io/name": "nosqlbench-demo",
+                "app.kubernetes.io/instance": self.release_name,
+                "app.kubernetes.io/component": "state"
+            }
+        }
+        body = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": metadata,
+            "data": {self.DATA_KEY: json.dumps(entries, separators=(",", ":"))}
+        }
+
+        if self._versions[shard] is None:
+            return self.core_v1.create_namespaced_config_map(namespace=self.namespace, body=body)
+
+        metadata["resourceVersion"] = self._versions[shard]
+        return self.core_v1.replace_namespaced_config_map(
+            name=self.shards[shard],
+            namespace=self.namespace,
+            body=body
+        )
@@ -0,0 +1,188 @@
+"""
+Pod Telemetry for NoSQLBench Demo
+Samples benchmark pod resource usage from metrics-server and pushes it to VictoriaMetrics
+"""
+
+import gzip
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Any, Callable
+
+import requests
+from kubernetes.client.rest import ApiException
+from kubernetes.utils.quantity import parse_quantity
+
+logger = logging.getLogger(__name__)
+
+# Sampled values and the series they are pushed as, shared with the local app's runner telemetry
+RUNNER_SERIES = {
+    "cpu_percent": "nb5_runner_cpu_percent",  # Of one core, like `kubectl top`
+    "memory_bytes": "nb5_runner_memory_bytes",  # Working set
+    "memory_limit_bytes": "nb5_runner_memory_limit_bytes"
+}
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render labels for the text exposition format"""
+    return "{" + ",".join(f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+                          for key, value in labels.items()) + "}"
+
+class PodTelemetry:
+    """Samples the resource usage of benchmark pods and pushes it to VictoriaMetrics
+
+    Every `interval` seconds the release's benchmark pods are read from the
+    metrics.k8s.io API (metrics-server: CPU and working set memory, refreshed
+    about every 15s). Each pod is labelled like the nb5 metrics it pushes
+    (job=nosqlbench, instance=<test_id> or <test_id>-s<n> for a shard,
+    group=<test_id>), so client load lines up with the benchmark's latency.
+    """
+
+    def __init__(self, custom_api, namespace: str, label_selector: str, push_url: str,
+                 get_pod: Callable[[str], Optional[Any]], interval: float = 15.0, timeout: float = 10.0):
+        self.custom_api = custom_api
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.import_url = f"{push_url.rstrip('/')}/api/v1/import/prometheus"
+        self.get_pod = get_pod
+        self.interval = interval
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.session = requests.Session()
+        self.stats = {"samples": 0, "pushes": 0, "push_errors": 0, "sample_errors": 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling on an interval"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self._thread.start()
+            logger.info(f"Pod telemetry pushing to {self.import_url} every {self.interval}s")
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+
+    def get_latest(self, test_id: str = None) -> Dict[str, Any]:
+        """Get the latest sample of each running benchmark pod (or of one instance)"""
+        with self.lock:
+            if test_id is not None:
+                return dict(self.latest.get(test_id) or {})
+            return {instance: dict(sample) for instance, sample in self.latest.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sample and push counters"""
+        with self.lock:
+            return dict(self.stats, runners=len(self.latest))
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """Sample every running benchmark pod once"""
+        try:
+            pod_metrics = self.custom_api.list_namespaced_custom_object(
+                "metrics.k8s.io", "v1beta1", self.namespace, "pods", label_selector=self.label_selector
+            )
+        except ApiException as e:
+            # 404 when metrics-server is not installed, 403 without the role's metrics rule
+            with self.lock:
+                self.stats["sample_errors"] += 1
+            logger.warning(f"Failed to read pod metrics: {e.status} {e.reason}")
+            return []
+
+        samples = []
+        for pod_metric in pod_metrics.get("items", []):
+            sample = self._sample_pod(pod_metric)
+            if sample:
+                samples.append(sample)
+
+        with self.lock:
+            self.latest = {sample["test_id"]: sample for sample in samples}
+            self.stats["samples"] += len(samples)
+        return samples
+
+    def push(self, samples: List[Dict[str, Any]]) -> bool:
+        """Send samples to VictoriaMetrics"""
+        lines = []
+        for sample in samples:
+            labels = _format_labels({"job": "nosqlbench", "instance": sample["test_id"],
+                                     "group": sample["group_id"] or sample["test_id"], "runner": "pod"})
+            timestamp_ms = int(sample["sampled_at"] * 1000)
+            for field, name in RUNNER_SERIES.items():
+                if sample.get(field) is not None:
+                    lines.append(f"{name}{labels} {sample[field]} {timestamp_ms}")
+        if not lines:
+            return True
+
+        try:
+            response = self.session.post(
+                self.import_url,
+                data=gzip.compress(("\n".join(lines) + "\n").encode("utf-8")),
+                headers={"Content-Encoding": "gzip", "Content-Type": "text/plain"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            with self.lock:
+                self.stats["pushes"] += 1
+            return True
+        except requests.RequestException as e:
+            with self.lock:
+                self.stats["push_errors"] += 1
+            logger.warning(f"Failed to push {len(lines)} pod telemetry series to VictoriaMetrics: {e}")
+            return False
+
+    def _sample_loop(self):
+        """Sample and push every interval"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                samples = self.sample()
+                if samples:
+                    self.push(samples)
+            except Exception as e:
+                logger.error(f"Pod telemetry error: {e}")
+
+    def _sample_pod(self, pod_metric: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Sum a pod's container usage, named after the nb5 instance it runs (None for unknown pods)"""
+        pod_name = pod_metric["metadata"]["name"]
+        pod = self.get_pod(pod_name)
+        if pod is None or pod.status.phase != "Running":
+            return None
+
+        annotations = pod.metadata.annotations or {}
+        test_id = annotations.get("nosqlbench-demo/test-id")
+        if not test_id:
+            return None  # Started before pods carried their test id
+
+        # Shards of an Indexed Job report as <test_id>-s<n>, grouped under the test id
+        group_id = None
+        shard_index = annotations.get("batch.kubernetes.io/job-completion-index")
+        if shard_index is not None and "shard-group" in (pod.metadata.labels or {}):
+            group_id = test_id
+            test_id = f"{test_id}-s{shard_index}"
+
+        try:
+            cpu_cores = sum(float(parse_quantity(container["usage"]["cpu"]))
+                            for container in pod_metric.get("containers", []))
+            memory_bytes = sum(int(parse_quantity(container["usage"]["memory"]))
+                               for container in pod_metric.get("containers", []))
+        except (KeyError, ValueError) as e:
+            logger.debug(f"Unreadable metrics for pod {pod_name}: {e}")
+            return None
+
+        memory_limits = [(container.resources.limits or {}).get("memory")
+                         for container in pod.spec.containers if container.resources]
+        memory_limit_bytes = None
+        if memory_limits and all(memory_limits):
+            memory_limit_bytes = sum(int(parse_quantity(limit)) for limit in memory_limits)
+
+        return {
+            "test_id": test_id,
+            "group_id": group_id,
+            "pod": pod_name,
+            "cpu_percent": cpu_cores * 100,
+            "memory_bytes": memory_bytes,
+            "memory_limit_bytes": memory_limit_bytes,
+            "window": pod_metric.get("window"),
+            "sampled_at": time.time()
+        }
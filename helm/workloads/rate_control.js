@@ -0,0 +1,40 @@
+// Live cyclerate control for long-running demo benchmarks
+//
+// Starts the activity described by the script params, then polls
+// control_file for "<seq> <cyclerate>" lines and applies each new value to
+// the running activity in place. Every applied change is acknowledged on
+// stdout as "RATE_CONTROL seq=<seq> cyclerate=<cyclerate>"; the activity
+// having started is reported once as "RATE_CONTROL started alias=<alias>".
+//
+// nb5 --include=/workloads script rate_control.js workload=sai_longrun.yaml \
+//   alias=main tags=phase:main,type:read cyclerate=10 control_file=/logs/cyclerate.ctl
+
+var alias = params.alias;
+var controlFile = params.control_file;
+
+var activity = params.withOverrides({});
+activity.remove("control_file");
+
+scenario.start(activity);
+print("RATE_CONTROL started alias=" + alias);
+
+var lastSeq = null;
+while (scenario.isRunningActivity(alias)) {
+    var control = null;
+    try {
+        control = String(files.read(controlFile)).trim();
+    } catch (e) {
+        // No change requested yet
+    }
+
+    if (control) {
+        var fields = control.split(/\s+/);
+        if (fields.length == 2 && fields[0] != lastSeq) {
+            activities[alias].cyclerate = fields[1];
+            lastSeq = fields[0];
+            print("RATE_CONTROL seq=" + fields[0] + " cyclerate=" + fields[1]);
+        }
+    }
+
+    scenario.waitMillis(500);
+}